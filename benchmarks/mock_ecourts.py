@@ -0,0 +1,432 @@
+"""
+A local stand-in for the eCourts and SCI sites, built from the saved fixtures.
+
+Serves just enough of each site for the scrapers to run end to end:
+
+    /ecourts_home/                         homepage with the services links
+    /ecourtindia_v6/                       district CNR search form (cino, CAPTCHA, searchbtn)
+    /ecourtindia_v6/?p=cnr_status/searchByCNR/          search (JSON wrapping the case tables)
+    /ecourtindia_v6/?p=cnr_status/display_case_acknowledgement   acknowledgement modal
+    /ecourtindia_v6/?p=home/viewBusiness   business (daily status) of one hearing (JSON)
+    /ecourtindia_v6/?p=home/display_pdf    order and document PDFs
+    /hcservices/main.php                   High Court CNR search form
+    /hcservices/cases_qry/o_civil_case_history.php      High Court search (HTML)
+    /case-status-cnr-number/               SCI CNR search form, result list and cnrResultsDetails
+    /sci_api/...                           SCI judgement PDFs
+
+Every CAPTCHA image is the same generated PNG and the server accepts one
+fixed answer, the one the local CAPTCHA backend returns (CAPTCHA_BACKEND=local).
+The case pages are the fixtures with their CNR number replaced by the one
+searched for, so every case lands in its own folder.
+
+Run it on its own to point a scraper or http_engine at it by hand:
+
+    python -m benchmarks.mock_ecourts --port 8765
+"""
+import argparse
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from business_history import VIEW_BUSINESS_FIELDS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "case_parser", "fixtures")
+
+# CNR numbers the fixtures were saved with
+DISTRICT_FIXTURE_CNR = "MHPU010012342019"
+HIGH_COURT_FIXTURE_CNR = "HCBM010183452021"
+SCI_FIXTURE_CNR = "SCIN010281732022"
+
+DEFAULT_CAPTCHA_ANSWER = "123456"
+
+# Shared by both eCourts search forms: the acknowledgement and business modal and the scripts behind them
+MODAL_HTML = """
+<div class="modal" id="modal_ack" style="display:none">
+  <div class="modal-header"><button type="button" class="close" onclick="closeModal()">&times;</button></div>
+  <div class="modal-body" id="modal_ack_body"></div>
+</div>
+"""
+
+SEARCH_FORM_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{title}</title>
+<script>var app_token = "{app_token}";</script></head>
+<body>
+<div id="cnr_form">
+  <input type="text" id="cino" name="cino" maxlength="16" placeholder="Enter 16 digit CNR number">
+  <img id="captcha_image" src="{captcha_path}" width="120" height="40" alt="captcha">
+  <input type="text" id="fcaptcha_code" name="fcaptcha_code" class="form-control w-125" maxlength="6" placeholder="Enter Captcha">
+  <button type="button" id="searchbtn" class="btn btn-primary" onclick="funViewCinoHistory();">Search</button>
+</div>
+<div id="results"></div>
+{modal}
+<script>
+function post(url, data) {{
+  return fetch(url, {{method: "POST", body: new URLSearchParams(data),
+                      headers: {{"X-Requested-With": "XMLHttpRequest"}}}}).then(function (r) {{ return r.text(); }});
+}}
+function funViewCinoHistory() {{
+  var data = {{cino: document.getElementById("cino").value, ajax_req: "true", app_token: app_token}};
+  data["{captcha_field}"] = document.getElementById("fcaptcha_code").value;
+  post("{search_path}", data).then(function (text) {{
+    var html = text;
+    if ({json_response}) {{
+      var payload = JSON.parse(text);
+      app_token = payload.app_token || app_token;
+      html = payload.casetype_list || '<div id="history_cnr"><div class="alert alert-danger-cust">' + payload.errormsg + '</div></div>';
+    }}
+    document.getElementById("results").innerHTML = html;
+  }});
+}}
+function showModal(url) {{
+  var modal = document.getElementById("modal_ack");
+  document.getElementById("modal_ack_body").innerHTML = "";
+  modal.style.display = "block";
+  modal.classList.add("show");
+  fetch(url).then(function (r) {{ return r.text(); }}).then(function (html) {{
+    document.getElementById("modal_ack_body").innerHTML = html;
+  }});
+}}
+function closeModal() {{
+  var modal = document.getElementById("modal_ack");
+  modal.style.display = "none";
+  modal.classList.remove("show");
+}}
+function display_case_acknowledgement(cino) {{
+  showModal("?p=cnr_status/display_case_acknowledgement&cino=" + encodeURIComponent(cino));
+}}
+function viewBusiness() {{
+  var fields = {business_fields}, data = {{ajax_req: "true", app_token: app_token}};
+  for (var i = 0; i < fields.length; i++) {{ data[fields[i]] = arguments[i]; }}
+  var modal = document.getElementById("modal_ack");
+  modal.style.display = "block";
+  modal.classList.add("show");
+  post("?p=home/viewBusiness", data).then(function (text) {{
+    document.getElementById("modal_ack_body").innerHTML = JSON.parse(text).data_list;
+  }});
+}}
+function displayPdf(url) {{
+  window.open(url);
+}}
+</script>
+</body>
+</html>
+"""
+
+HOMEPAGE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>eCourts Services</title></head>
+<body>
+<a href="{base_url}/ecourtindia_v6/" title="District Court Services" class="btn btn-default" tabindex="0">District Court Services</a>
+<a href="{base_url}/hcservices/main.php" title="High courts Services" class="btn btn-default" tabindex="0">High courts Services</a>
+</body>
+</html>
+"""
+
+BUSINESS_HTML = """<div id="caseBusinessDiv_cnr">
+  <span>Daily Status</span>
+  <center>Civil Judge Senior Division, Pune</center>
+  <center>CNR Number : {cnr_number}</center>
+  <table width="87%">
+    <tr><td>Business Date</td><td>:</td><td>{business_date}</td></tr>
+    <tr><td>Next Date</td><td>:</td><td>{next_date}</td></tr>
+    <tr><td>Business</td><td>:</td><td>Evidence of plaintiff recorded. Adjourned for cross examination.</td></tr>
+    <tr><td>Next Purpose</td><td>:</td><td>Evidence</td></tr>
+  </table>
+</div>
+"""
+
+SCI_FORM_HTML = """<!DOCTYPE html>
+<html lang="en-US">
+<head><meta charset="UTF-8"><title>Case Status &#8211; Supreme Court of India</title></head>
+<body class="page">
+<form id="cnr-form" onsubmit="return searchCnr();">
+  <input type="text" id="cnr_no" name="cnr_no">
+  <img id="siwp_captcha_image_0" src="/sci_captcha.php?_siwp_captcha&amp;id=0" width="120" height="40" alt="captcha">
+  <input type="text" id="siwp_captcha_value_0" name="siwp_captcha_value">
+  <input type="submit" value="Search">
+</form>
+<div id="cnr_results"></div>
+<script>
+function load(url) {
+  fetch(url).then(function (r) { return r.text(); }).then(function (html) {
+    document.getElementById("cnr_results").innerHTML = html;
+  });
+}
+function searchCnr() {
+  load("?action=get_case_status_cnr&cnr_no=" + encodeURIComponent(document.getElementById("cnr_no").value) +
+       "&siwp_captcha_value=" + encodeURIComponent(document.getElementById("siwp_captcha_value_0").value));
+  return false;
+}
+function viewCase(cnr_no) {
+  load("?action=get_case_details&cnr_no=" + encodeURIComponent(cnr_no));
+}
+document.addEventListener("click", function (event) {
+  var table = event.target.closest("table.judgement_orders");
+  if (table && event.target.tagName === "BUTTON") {
+    table.querySelector("tbody").classList.toggle("hide");
+  }
+});
+</script>
+</body>
+</html>
+"""
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def body_of(html):
+    """
+    The markup between <body> and </body>, which the sites load into the search page
+    """
+    match = re.search(r"<body[^>]*>(.*)</body>", html, re.S)
+    return match.group(1) if match else html
+
+
+def captcha_png(width=120, height=40):
+    """
+    A grey, striped PNG to stand in for the CAPTCHA image, built without PIL
+    """
+    rows = b"".join(b"\x00" + bytes((x * 7 + y * 13) % 96 + 128 for x in range(width)) for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def fake_pdf(size_kb):
+    """
+    A PDF-looking payload of about size_kb kilobytes
+    """
+    head = b"%PDF-1.4\n% replay benchmark document\n"
+    tail = b"\n%%EOF\n"
+    return head + b"0" * max(0, size_kb * 1024 - len(head) - len(tail)) + tail
+
+
+class MockEcourts:
+    """
+    The pages and rules of the mock sites, independent of the HTTP plumbing
+    """
+
+    def __init__(self, captcha_answer=DEFAULT_CAPTCHA_ANSWER, reject_rate=0.0, pdf_kb=64, seed=0):
+        self.captcha_answer = captcha_answer
+        self.reject_rate = reject_rate
+        self.pdf = fake_pdf(pdf_kb)
+        self.captcha = captcha_png()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.app_token = "5f2b9c0e7d41a3b6c8e9f0a1b2c3d4e5"
+        self.district_case = body_of(load_fixture("district_case.html"))
+        self.district_modal = load_fixture("district_modal.html")
+        self.high_court_case = body_of(load_fixture("high_court_case.html"))
+        self.sci_case = body_of(load_fixture("sci_case.html")).replace("https://api.sci.gov.in/", "/sci_api/")
+        self.stats = {"requests": 0, "searches": 0, "captcha_rejected": 0, "pdfs": 0, "bytes": 0}
+
+    def captcha_ok(self, answer):
+        """
+        Accept the fixed answer, except for a reject_rate share of searches
+        """
+        with self.lock:
+            self.stats["searches"] += 1
+            rejected = answer != self.captcha_answer or self.random.random() < self.reject_rate
+            if rejected:
+                self.stats["captcha_rejected"] += 1
+        return not rejected
+
+    def district_search(self, form):
+        cnr_number = form.get("cino", "")
+        if not self.captcha_ok(form.get("fcaptcha_code", "")):
+            return json.dumps({"errormsg": "Invalid Captcha", "app_token": self.app_token}), "application/json"
+        html = self.district_case.replace(DISTRICT_FIXTURE_CNR, cnr_number)
+        return json.dumps({"casetype_list": html, "app_token": self.app_token}), "application/json"
+
+    def high_court_search(self, form):
+        cnr_number = form.get("cino", "")
+        # The browser form posts fcaptcha_code, http_engine posts captcha
+        if not self.captcha_ok(form.get("fcaptcha_code") or form.get("captcha", "")):
+            return '<div id="history_cnr"><div class="alert alert-danger-cust">Invalid Captcha</div></div>', "text/html"
+        return self.high_court_case.replace(HIGH_COURT_FIXTURE_CNR, cnr_number), "text/html"
+
+    def sci_page(self, query):
+        action = query.get("action")
+        cnr_number = query.get("cnr_no", "")
+        if action == "get_case_status_cnr":
+            if not self.captcha_ok(query.get("siwp_captcha_value", "")):
+                return '<div class="alert">The captcha code entered was incorrect.</div>'
+            return (f'<table class="table"><tr><td>{cnr_number}</td>'
+                    f'<td><a href="javascript:void(0)" onclick="viewCase(\'{cnr_number}\')">View</a></td></tr></table>')
+        if action == "get_case_details":
+            return self.sci_case.replace(SCI_FIXTURE_CNR, cnr_number)
+        return SCI_FORM_HTML
+
+    def district_business(self, form):
+        html = BUSINESS_HTML.format(cnr_number=form.get("cino", ""), business_date=form.get("businessDate", ""),
+                                    next_date=form.get("nextdate1", ""))
+        return json.dumps({"data_list": html, "app_token": self.app_token}), "application/json"
+
+    def district_page(self, query):
+        page = query.get("p", "")
+        if page == "cnr_status/display_case_acknowledgement":
+            return self.district_modal.replace(DISTRICT_FIXTURE_CNR, query.get("cino", ""))
+        return self.search_form("eCourts Services", "vendor/securimage/securimage_show.php", "fcaptcha_code",
+                                "?p=cnr_status/searchByCNR/", json_response=True)
+
+    def search_form(self, title, captcha_path, captcha_field, search_path, json_response):
+        return SEARCH_FORM_HTML.format(title=title, app_token=self.app_token, captcha_path=captcha_path,
+                                       captcha_field=captcha_field, search_path=search_path, modal=MODAL_HTML,
+                                       business_fields=json.dumps(list(VIEW_BUSINESS_FIELDS)),
+                                       json_response="true" if json_response else "false")
+
+    def handle(self, method, path, query, form, base_url):
+        """
+        Answer one request. Returns (status, content type, body bytes).
+        """
+        if "display_pdf" in path or query.get("p") == "home/display_pdf" or path.startswith("/sci_api/"):
+            with self.lock:
+                self.stats["pdfs"] += 1
+            return 200, "application/pdf", self.pdf
+        if path.endswith("securimage_show.php") or path == "/sci_captcha.php":
+            return 200, "image/png", self.captcha
+
+        if path.startswith("/ecourts_home"):
+            body, content_type = HOMEPAGE_HTML.format(base_url=base_url), "text/html"
+        elif path.startswith("/ecourtindia_v6"):
+            if method == "POST" and query.get("p") == "home/viewBusiness":
+                body, content_type = self.district_business(form)
+            elif method == "POST":
+                body, content_type = self.district_search(form)
+            else:
+                body, content_type = self.district_page(query), "text/html"
+        elif path == "/hcservices/cases_qry/o_civil_case_history.php":
+            body, content_type = self.high_court_search(form)
+        elif path.startswith("/hcservices"):
+            body = self.search_form("High Court Services", "securimage/securimage_show.php", "fcaptcha_code",
+                                    "cases_qry/o_civil_case_history.php", json_response=False)
+            content_type = "text/html"
+        elif path.startswith("/case-status-cnr-number"):
+            body, content_type = self.sci_page(query), "text/html"
+        else:
+            return 404, "text/plain", b"Not found"
+        return 200, f"{content_type}; charset=utf-8", body.encode("utf-8")
+
+
+def make_handler(site, latency):
+    """
+    A request handler class serving site, sleeping latency seconds before every answer
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def respond(self, method):
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+            form = {}
+            if method == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode("utf-8", "replace")
+                form = {key: values[0] for key, values in parse_qs(raw, keep_blank_values=True).items()}
+            base_url = f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+
+            if latency:
+                time.sleep(latency)
+            status, content_type, body = site.handle(method, url.path, query, form, base_url)
+            with site.lock:
+                site.stats["requests"] += 1
+                site.stats["bytes"] += len(body)
+
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            # A session cookie, so the PDF downloads exercise the cookie hand-over
+            self.send_header("Set-Cookie", "PHPSESSID=replaybenchmark; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_POST(self):
+            self.respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class MockEcourtsServer:
+    """
+    Serve a MockEcourts site on a background thread (port 0 picks a free port)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, **site_options):
+        self.site = MockEcourts(**site_options)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.site, latency))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def scraper_environment(self):
+        """
+        The environment variables that point the scrapers and http_engine at this server
+        """
+        return {
+            "ECOURTS_HOME_URL": f"{self.base_url}/ecourts_home/",
+            "ECOURTS_V6_BASE_URL": f"{self.base_url}/ecourtindia_v6/",
+            "ECOURTS_HC_BASE_URL": f"{self.base_url}/hcservices/",
+            "ECOURTS_SCI_SEARCH_URL": f"{self.base_url}/case-status-cnr-number/",
+            "CAPTCHA_BACKEND": "local",
+            "CAPTCHA_LOCAL_ANSWER": self.site.captcha_answer,
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-ecourts", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the mock eCourts and SCI sites from the saved fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Share of correct CAPTCHAs to reject anyway")
+    parser.add_argument("--pdf-kb", type=int, default=64, help="Size of every served PDF")
+    args = parser.parse_args()
+
+    server = MockEcourtsServer(args.host, args.port, latency=args.latency_ms / 1000,
+                               reject_rate=args.reject_rate, pdf_kb=args.pdf_kb)
+    print(f"Mock eCourts serving on {server.base_url}, point the scrapers at it with:")
+    for key, value in server.scraper_environment().items():
+        print(f"  export {key}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the offline case parsers against the saved HTML fixtures.
+
+Run from the repository root:
+
+    python -m benchmarks.parser_benchmark
+    python -m benchmarks.parser_benchmark --seconds 5 --profile
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import time
+
+from case_parser import parse_case_html, parse_modal_html, parse_sci_case_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "case_parser", "fixtures")
+BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+
+BENCHMARKS = [
+    ("district_case.html", lambda html: parse_case_html(html, base_url=BASE_URL, orders_base_url=BASE_URL)),
+    ("high_court_case.html", lambda html: parse_case_html(html, base_url=BASE_URL, sections=("details", "status"))),
+    ("district_modal.html", parse_modal_html),
+    ("sci_case.html", parse_sci_case_html),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def run_benchmark(parse, html, seconds):
+    """
+    Parse html repeatedly for about `seconds` seconds.
+    Returns (pages parsed, elapsed seconds).
+    """
+    # Warm up so lxml's first-call setup is not measured
+    parse(html)
+
+    pages = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(50):
+            parse(html)
+        pages += 50
+        if time.perf_counter() >= deadline:
+            break
+    return pages, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the offline case parsers on saved fixtures")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time to spend on each fixture")
+    parser.add_argument("--profile", action="store_true", help="Print the top cProfile entries for each fixture")
+    args = parser.parse_args()
+
+    print(f"{'fixture':<24}{'KB':>8}{'pages/s':>12}{'ms/page':>10}{'MB/s':>8}")
+    for name, parse in BENCHMARKS:
+        html = load_fixture(name)
+        pages, elapsed = run_benchmark(parse, html, args.seconds)
+        rate = pages / elapsed
+        print(f"{name:<24}{len(html) / 1024:>8.1f}{rate:>12.0f}{1000 / rate:>10.3f}{rate * len(html) / 1e6:>8.1f}")
+
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            for _ in range(200):
+                parse(html)
+            profiler.disable()
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(12)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Run the district, High Court and SCI scrapers end to end against the mock
+eCourts server (benchmarks/mock_ecourts.py) and report throughput.
+
+Every court gets a warm DriverPool browser, which scrapes --cases
+generated CNR numbers exactly as a pool worker does (search form,
+CAPTCHA, search, extraction, modal, business history, PDFs, database
+and Parquet writes). Reported per court: cases per minute, p50/p95
+case latency, the peak RSS of the browser's process tree and the
+scraper process, and the mean time of every metrics stage.
+
+Nothing leaves the machine except database writes: the rows go to
+ECOURTS_DATABASE_URL as usual, point it at a scratch PostgreSQL (or
+leave it unreachable, the flush errors are then part of the run).
+
+Run from the repository root (needs Chrome and chromedriver):
+
+    python -m benchmarks.replay_benchmark
+    python -m benchmarks.replay_benchmark --courts district --cases 50 --latency-ms 150
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.mock_ecourts import DEFAULT_CAPTCHA_ANSWER, MockEcourtsServer
+
+COURTS = ("district", "high", "supreme")
+
+# Generated CNR numbers: state/court prefix, six-digit case number, year
+CNR_FORMATS = {
+    "district": "MHPU01{:06d}2019",
+    "high": "HCBM01{:06d}2021",
+    "supreme": "SCIN01{:06d}2022",
+}
+
+
+def percentile(values, q):
+    """
+    The q-th percentile (0-100) of values by nearest rank
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def peak_process_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def configure_environment(server, output_dir, captcha_delay):
+    """
+    Point the scrapers at the mock server and keep all their output under output_dir.
+    Must run before the scraper modules are imported, they read their URLs at import.
+    """
+    os.environ.update(server.scraper_environment())
+    os.environ["CAPTCHA_LOCAL_DELAY"] = str(captcha_delay)
+    os.environ["ECOURTS_DATASET_DIR"] = os.path.join(output_dir, "case_dataset")
+    os.environ["ECOURTS_METRICS_LOG"] = os.path.join(output_dir, "scrape_metrics.jsonl")
+    os.environ["ECOURTS_METRICS_DIR"] = os.path.join(output_dir, "metrics")
+    # The mock's markup must not overwrite what the real sites taught the locator cache
+    os.environ["ECOURTS_LOCATOR_CACHE"] = os.path.join(output_dir, "locator_cache.json")
+
+
+def run_court(court, cases, output_dir, headless=True):
+    """
+    Scrape `cases` generated CNR numbers of one court with a single pooled browser.
+    Returns a result dict with the per-case latencies.
+    """
+    from driver_pool import DriverPool, driver_rss_mb
+    from worker_pool import COURT_MODULES, scrape_one
+
+    court_module = importlib.import_module(COURT_MODULES[court])
+    court_dir = os.path.join(output_dir, court)
+    os.makedirs(court_dir, exist_ok=True)
+    os.chdir(court_dir)
+
+    cnr_numbers = [CNR_FORMATS[court].format(number) for number in range(1, cases + 1)]
+    latencies = []
+    browser_peak = 0.0
+    succeeded = 0
+
+    pool = DriverPool(court_module, size=1, headless=headless, download_dir=court_dir)
+    launch_started = time.perf_counter()
+    pool.start()
+    pooled = pool.acquire()
+    launch_seconds = time.perf_counter() - launch_started
+    if pooled is None:
+        pool.close()
+        print(f"{court}: no browser reached the mock search form")
+        return {"court": court, "cases": cases, "ok": 0, "latencies": [], "seconds": 0.0,
+                "launch_seconds": launch_seconds, "browser_rss_mb": 0.0}
+    pool.release(pooled)
+
+    started = time.perf_counter()
+    try:
+        for cnr_number in cnr_numbers:
+            pooled = pool.acquire()
+            if pooled is None:
+                print(f"{court}: lost the browser, stopping early")
+                break
+            case_started = time.perf_counter()
+            try:
+                if scrape_one(court, court_module, pooled.driver, pooled.wait, cnr_number):
+                    succeeded += 1
+            except Exception as e:
+                print(f"{court} {cnr_number} failed: {e}")
+            latencies.append(time.perf_counter() - case_started)
+            browser_peak = max(browser_peak, driver_rss_mb(pooled.driver) or 0.0)
+            pool.release(pooled)
+        seconds = time.perf_counter() - started
+    finally:
+        pool.close()
+        flush_writers()
+
+    return {"court": court, "cases": cases, "ok": succeeded, "latencies": latencies, "seconds": seconds,
+            "launch_seconds": launch_seconds, "browser_rss_mb": browser_peak}
+
+
+def flush_writers():
+    """
+    Write out the buffered database rows and Parquet batches, as a worker does when it stops
+    """
+    from case_store import flush_all
+    from parquet_export import flush_exports
+
+    try:
+        flush_all()
+    except Exception as e:
+        print(f"Could not flush database rows: {e}")
+    try:
+        flush_exports()
+    except Exception as e:
+        print(f"Could not flush Parquet export: {e}")
+
+
+def stage_means(metrics_log):
+    """
+    Mean seconds per case of every stage, by court, from the metrics log
+    """
+    sums = {}
+    counts = {}
+    if not os.path.exists(metrics_log):
+        return {}
+    with open(metrics_log, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            court = entry["court"]
+            counts[court] = counts.get(court, 0) + 1
+            for name, stage in entry["stages"].items():
+                court_sums = sums.setdefault(court, {})
+                court_sums[name] = court_sums.get(name, 0.0) + stage["seconds"]
+    return {court: {name: total / counts[court] for name, total in stages.items()}
+            for court, stages in sums.items()}
+
+
+def print_report(results, means, server_stats):
+    print(f"\n{'court':<10}{'ok':>9}{'cases/min':>11}{'p50 s':>8}{'p95 s':>8}{'launch s':>10}{'browser MB':>12}")
+    for result in results:
+        rate = result["ok"] / result["seconds"] * 60 if result["seconds"] else 0.0
+        print(f"{result['court']:<10}{result['ok']:>4}/{result['cases']:<4}{rate:>11.1f}"
+              f"{percentile(result['latencies'], 50):>8.2f}{percentile(result['latencies'], 95):>8.2f}"
+              f"{result['launch_seconds']:>10.2f}{result['browser_rss_mb']:>12.0f}")
+    print(f"Peak scraper process RSS: {peak_process_rss_mb():.0f} MB")
+
+    for court, stages in means.items():
+        print(f"\nMean seconds per case, {court}:")
+        for name, seconds in sorted(stages.items(), key=lambda item: -item[1]):
+            print(f"  {name:<18}{seconds:>8.3f}")
+
+    print(f"\nMock server: {server_stats['requests']} requests, {server_stats['bytes'] / 1e6:.1f} MB served, "
+          f"{server_stats['captcha_rejected']}/{server_stats['searches']} CAPTCHAs rejected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers end to end against a local mock eCourts server")
+    parser.add_argument("--courts", nargs="+", choices=COURTS, default=list(COURTS), help="Courts to run")
+    parser.add_argument("--cases", type=int, default=20, help="CNR numbers to scrape per court")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay the mock server adds to every response")
+    parser.add_argument("--captcha-delay", type=float, default=0.0, help="Seconds the local CAPTCHA solver takes")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Share of CAPTCHA answers the server rejects")
+    parser.add_argument("--pdf-kb", type=int, default=64, help="Size of every served PDF")
+    parser.add_argument("--output-dir", default=None, help="Where case folders go (default: a new temporary directory)")
+    parser.add_argument("--visible", action="store_true", help="Use a visible browser instead of a headless one")
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output_dir or tempfile.mkdtemp(prefix="replay_benchmark_"))
+    os.makedirs(output_dir, exist_ok=True)
+
+    server = MockEcourtsServer(latency=args.latency_ms / 1000, captcha_answer=DEFAULT_CAPTCHA_ANSWER,
+                               reject_rate=args.reject_rate, pdf_kb=args.pdf_kb).start()
+    configure_environment(server, output_dir, args.captcha_delay)
+    print(f"Mock eCourts on {server.base_url}, output in {output_dir}")
+
+    results = []
+    try:
+        for court in args.courts:
+            print(f"\n=== {court}: {args.cases} cases ===")
+            results.append(run_court(court, args.cases, output_dir, headless=not args.visible))
+    finally:
+        server.stop()
+
+    print_report(results, stage_means(os.environ["ECOURTS_METRICS_LOG"]), server.site.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from metrics import instrument_driver
+
+# Requests a lean browser drops through CDP (Network.setBlockedURLs wildcard patterns).
+# The CAPTCHAs are served by securimage_show.php / ?_siwp_captcha, which no pattern
+# matches, and PDFs are not blocked, so CAPTCHA screenshots and downloads keep working.
+LEAN_BLOCKED_URL_PATTERNS = [
+    # Stylesheets and web fonts
+    "*.css", "*.css?*",
+    "*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.eot", "*.eot?*",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # Static images (logos, banners, icons)
+    "*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*", "*.gif", "*.gif?*",
+    "*.svg", "*.svg?*", "*.webp", "*.webp?*", "*.ico", "*.ico?*",
+    # Third-party analytics, tag managers, share widgets and embeds
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*connect.facebook.com*", "*platform.twitter.com*", "*addthis.com*",
+    "*sharethis.com*", "*hotjar.com*", "*clarity.ms*", "*youtube.com*", "*translate.google.com*",
+    "*translate.googleapis.com*",
+]
+
+# Renderer settings that cut memory and background work in lean mode
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--mute-audio",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--renderer-process-limit=2",
+    "--js-flags=--max-old-space-size=256",
+]
+
+
+def lean_by_default(headless):
+    """
+    ECOURTS_LEAN_BROWSER=1 or 0 forces lean mode on or off, otherwise headless drivers are lean
+    """
+    setting = os.environ.get("ECOURTS_LEAN_BROWSER")
+    if setting is not None:
+        return setting == "1"
+    return headless
+
+
+def block_requests(driver, patterns=None):
+    """
+    Tell Chrome to drop requests matching patterns (LEAN_BLOCKED_URL_PATTERNS by default)
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or LEAN_BLOCKED_URL_PATTERNS})
+
+
+def create_chrome_driver(headless=False, download_dir=None, lean=None):
+    """
+    Create a Chrome driver with the options shared by all scrapers.
+    Headless drivers get a fixed window size instead of --start-maximized,
+    and download_dir (if given) becomes Chrome's download directory.
+    A lean driver (see lean_by_default) is always headless, runs with lighter
+    renderer settings and does not load stylesheets, fonts, static images
+    or third-party scripts.
+    """
+    if lean is None:
+        lean = lean_by_default(headless)
+    headless = headless or lean
+
+    # Set up Chrome options
+    print("Setting up Chrome options...")
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--disable-dev-shm-usage")
+    else:
+        options.add_argument("--start-maximized")  # Start maximized
+    options.add_argument("--disable-notifications")  # Disable notifications
+
+    if lean:
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+
+    if download_dir:
+        options.add_experimental_option("prefs", {
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "plugins.always_open_pdf_externally": True,
+        })
+
+    # Initialize the Chrome driver
+    print("Initializing Chrome driver...")
+    driver = webdriver.Chrome(options=options)
+    instrument_driver(driver)
+
+    if lean:
+        try:
+            block_requests(driver)
+            print("Lean browser: blocking stylesheets, fonts, images and third-party scripts")
+        except Exception as e:
+            print(f"Could not enable request blocking: {e}")
+    return driver
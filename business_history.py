@@ -0,0 +1,184 @@
+"""
+Crawl the full hearing history of a district case.
+
+Every row of the Case History table links to viewBusiness(...), which
+loads that hearing's business into a modal. Instead of clicking each link
+and closing the modal again, the crawler takes the viewBusiness arguments
+of all hearings from the parsed page (Hearing.business_params), skips the
+dates whose business_details_<date>.txt is already in the case's history
+folder and posts the rest straight to the viewBusiness endpoint: from the
+page with one execute_async_script per batch (fetch_in_browser), or over
+a requests session carrying the site's cookies (fetch_over_http).
+
+Both send the requests one after another, because the site rotates its
+app_token on every response and the next request has to carry the new one.
+"""
+import json
+import os
+import traceback
+
+from case_parser import parse_business_html
+
+# viewBusiness endpoint, relative to the v6 search page
+BUSINESS_PATH = "?p=home/viewBusiness"
+
+# Form fields the site's viewBusiness(...) posts, in the order of its arguments
+VIEW_BUSINESS_FIELDS = ("cino", "court_code", "nextdate1", "state_code", "dist_code", "court_complex_code",
+                        "businessDate", "srno")
+
+HISTORY_FOLDER = "history"
+
+# Hearings fetched per execute_async_script call, and the script timeout of one call
+BROWSER_BATCH_SIZE = 25
+BROWSER_SCRIPT_TIMEOUT = 120
+
+# Posts forms[i] to url in order, handing each response's app_token on to the next request
+FETCH_SCRIPT = """
+var url = arguments[0], forms = arguments[1], done = arguments[arguments.length - 1];
+var token = typeof app_token !== "undefined" ? app_token : "";
+var results = [];
+function next(i) {
+    if (i >= forms.length) {
+        if (typeof app_token !== "undefined") { app_token = token; }
+        done(results);
+        return;
+    }
+    var form = forms[i];
+    form.app_token = token;
+    fetch(url, {method: "POST", body: new URLSearchParams(form), credentials: "same-origin",
+                headers: {"X-Requested-With": "XMLHttpRequest"}})
+        .then(function (response) { return response.text(); })
+        .then(function (text) {
+            try { token = JSON.parse(text).app_token || token; } catch (e) {}
+            results.push(text);
+            next(i + 1);
+        })
+        .catch(function () { results.push(null); next(i + 1); });
+}
+next(0);
+"""
+
+
+def business_form(params):
+    """
+    The POST fields for one viewBusiness(...) call (without the app_token)
+    """
+    form = dict(zip(VIEW_BUSINESS_FIELDS, params))
+    form["case_number1"] = form.get("cino", "")
+    form["search_by"] = "cnr"
+    form["ajax_req"] = "true"
+    return form
+
+
+def business_date(hearing):
+    """
+    The dd-mm-yyyy business date of a hearing, as the history files are named
+    """
+    params = hearing.business_params
+    date = params[6] if len(params) > 6 else hearing.business_date
+    return (date or "unknown_date").replace("/", "-")
+
+
+def business_filename(hearing):
+    return f"business_details_{business_date(hearing)}.txt"
+
+
+def pending_hearings(hearings, history_folder):
+    """
+    Hearings with viewBusiness arguments whose business is not saved in history_folder yet,
+    one per business date
+    """
+    stored = set(os.listdir(history_folder)) if os.path.isdir(history_folder) else set()
+    pending = []
+    for hearing in hearings:
+        filename = business_filename(hearing)
+        if hearing.business_params and filename not in stored:
+            stored.add(filename)
+            pending.append(hearing)
+    return pending
+
+
+def unwrap_response(text):
+    """
+    The HTML of a viewBusiness response, which may be JSON wrapping an HTML fragment.
+    Returns (html, app_token or None).
+    """
+    if not text:
+        return "", None
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return text, None
+    if not isinstance(payload, dict):
+        return text, None
+    html = next((value for value in payload.values() if isinstance(value, str) and "<" in value), "")
+    return html, payload.get("app_token")
+
+
+def fetch_in_browser(driver, forms):
+    """
+    Post the viewBusiness forms from the current page, whose cookies and app_token they use.
+    Returns the response texts (None for failed requests), one WebDriver round trip per batch.
+    """
+    driver.set_script_timeout(BROWSER_SCRIPT_TIMEOUT)
+    responses = []
+    for start in range(0, len(forms), BROWSER_BATCH_SIZE):
+        batch = forms[start:start + BROWSER_BATCH_SIZE]
+        responses.extend(driver.execute_async_script(FETCH_SCRIPT, BUSINESS_PATH, batch))
+    return responses
+
+
+def fetch_over_http(session, url, forms, app_token="", timeout=30):
+    """
+    Post the viewBusiness forms to url over session.
+    Returns (response texts with None for failed requests, the last app_token).
+    """
+    responses = []
+    for form in forms:
+        try:
+            response = session.post(url, data={**form, "app_token": app_token},
+                                    headers={"X-Requested-With": "XMLHttpRequest"}, timeout=timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error fetching business of {form.get('businessDate', '')}: {e}")
+            responses.append(None)
+            continue
+        app_token = unwrap_response(response.text)[1] or app_token
+        responses.append(response.text)
+    return responses, app_token
+
+
+def crawl_history(folder_path, hearings, fetch):
+    """
+    Save the business of every hearing that is not in folder_path/history yet.
+    fetch(forms) returns the viewBusiness responses of a list of business_form() dicts.
+    Returns the number of business dates saved.
+    """
+    history_folder = os.path.join(folder_path, HISTORY_FOLDER)
+    pending = pending_hearings(hearings, history_folder)
+    if not pending:
+        print("Business details of every hearing already saved")
+        return 0
+
+    print(f"Fetching business details of {len(pending)} hearings...")
+    os.makedirs(history_folder, exist_ok=True)
+    try:
+        responses = fetch([business_form(hearing.business_params) for hearing in pending])
+    except Exception as e:
+        print(f"Error fetching business details: {e}")
+        traceback.print_exc()
+        return 0
+
+    saved = 0
+    for hearing, response in zip(pending, responses):
+        lines = parse_business_html(unwrap_response(response)[0])
+        if not lines:
+            print(f"No business details returned for {business_date(hearing)}")
+            continue
+        file_path = os.path.join(history_folder, business_filename(hearing))
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        saved += 1
+
+    print(f"✅ Saved business details of {saved}/{len(pending)} hearings to {history_folder}")
+    return saved
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Offline CAPTCHA recognition with PIL and NumPy.
+
+The eCourts and SCI CAPTCHAs are short strings of dark glyphs on a light,
+speckled background. An image is binarized (Otsu threshold), cleaned of
+isolated noise pixels, cut into glyphs at empty columns and every glyph is
+matched against templates collected from labelled captures. A match takes
+milliseconds on CPU; when the weakest glyph match is below the confidence
+threshold, RecognizerBackend hands the image to the remote solver instead
+and keeps the answer as a new labelled capture, which is deleted again when
+the site rejects the answer (CaptchaTicket.report_bad).
+
+Labelled captures are image files named <answer>_<anything>.png, e.g.
+"x7k2p_1697000000.png" or "4+4_1697000000.png" for the SCI math CAPTCHA.
+
+    python captcha_recognizer.py train captures/ --model captcha_model.npz
+    python captcha_recognizer.py evaluate holdout/ --model captcha_model.npz
+"""
+import argparse
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_MODEL_PATH = "captcha_model.npz"
+
+# Glyphs are scaled to this size (width, height) before matching
+GLYPH_SIZE = (16, 20)
+
+# Lowest per-glyph similarity at which a local answer is trusted
+MIN_CONFIDENCE = 0.75
+
+# Templates kept per character, more only slow matching down
+MAX_TEMPLATES_PER_CHAR = 40
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+# Captures remembered for a rejection report, the oldest are forgotten (and kept) first
+MAX_UNCONFIRMED_CAPTURES = 256
+
+
+def load_gray(image_bytes):
+    """
+    Decode an image into a float32 grayscale array
+    """
+    return np.asarray(Image.open(io.BytesIO(image_bytes)).convert("L"), dtype=np.float32)
+
+
+def otsu_threshold(gray):
+    """
+    Grey level that best separates ink from background
+    """
+    hist = np.bincount(gray.astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def binarize(gray):
+    """
+    Boolean ink mask; the minority colour is taken to be the ink
+    """
+    ink = gray <= otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def remove_specks(ink, min_neighbours=2):
+    """
+    Drop ink pixels with fewer than min_neighbours inked 8-neighbours (background noise)
+    """
+    padded = np.pad(ink.astype(np.uint8), 1)
+    height, width = ink.shape
+    neighbours = sum(
+        padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+        for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+    )
+    return ink & (neighbours >= min_neighbours)
+
+
+def column_runs(ink, min_width=2):
+    """
+    (start, end) column ranges that contain ink, separated by empty columns
+    """
+    inked = ink.any(axis=0)
+    runs = []
+    start = None
+    for x, has_ink in enumerate(inked):
+        if has_ink and start is None:
+            start = x
+        elif not has_ink and start is not None:
+            if x - start >= min_width:
+                runs.append((start, x))
+            start = None
+    if start is not None and len(inked) - start >= min_width:
+        runs.append((start, len(inked)))
+    return runs
+
+
+def split_wide_runs(runs):
+    """
+    Split runs much wider than the typical glyph, which are usually touching characters
+    """
+    if not runs:
+        return runs
+    typical = float(np.median([end - start for start, end in runs]))
+    split = []
+    for start, end in runs:
+        parts = int(round((end - start) / typical)) if typical else 1
+        if parts <= 1 or (end - start) < 1.6 * typical:
+            split.append((start, end))
+            continue
+        step = (end - start) / parts
+        for i in range(parts):
+            split.append((start + int(round(i * step)), start + int(round((i + 1) * step))))
+    return split
+
+
+def normalize_glyph(glyph):
+    """
+    Scale a glyph's ink mask to GLYPH_SIZE and turn it into a zero-mean unit vector,
+    so a dot product between two glyphs is their correlation
+    """
+    rows = np.flatnonzero(glyph.any(axis=1))
+    if len(rows):
+        glyph = glyph[rows[0]:rows[-1] + 1]
+    image = Image.fromarray(glyph.astype(np.uint8) * 255).resize(GLYPH_SIZE, Image.BILINEAR)
+    vector = np.asarray(image, dtype=np.float32).ravel() / 255.0
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def extract_glyphs(image_bytes):
+    """
+    Preprocess a CAPTCHA image and return one normalized vector per glyph, left to right
+    """
+    ink = remove_specks(binarize(load_gray(image_bytes)))
+    runs = split_wide_runs(column_runs(ink))
+    return [normalize_glyph(ink[:, start:end]) for start, end in runs]
+
+
+def load_labelled_captures(directory):
+    """
+    Yield (image_bytes, label) for every <label>_<anything>.<ext> image in directory
+    """
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        label = stem.split("_", 1)[0]
+        if not label:
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            yield f.read(), label
+
+
+class TemplateRecognizer:
+    """
+    Nearest-template glyph classifier
+    """
+
+    def __init__(self, labels=(), templates=None):
+        self.labels = np.asarray(list(labels))
+        dimension = GLYPH_SIZE[0] * GLYPH_SIZE[1]
+        self.templates = templates if templates is not None else np.zeros((0, dimension), dtype=np.float32)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with np.load(path) as model:
+            return cls(model["labels"].tolist(), model["templates"])
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        np.savez_compressed(path, labels=self.labels, templates=self.templates)
+
+    @classmethod
+    def train(cls, samples):
+        """
+        Build templates from (image_bytes, label) pairs. Captures whose glyph count
+        does not match the label length are skipped, they would teach wrong templates.
+        """
+        per_char = {}
+        used = skipped = 0
+        for image_bytes, label in samples:
+            try:
+                glyphs = extract_glyphs(image_bytes)
+            except Exception as e:
+                print(f"Skipping unreadable capture {label}: {e}")
+                skipped += 1
+                continue
+            if len(glyphs) != len(label):
+                skipped += 1
+                continue
+            for char, glyph in zip(label, glyphs):
+                templates = per_char.setdefault(char, [])
+                if len(templates) < MAX_TEMPLATES_PER_CHAR:
+                    templates.append(glyph)
+            used += 1
+
+        labels = []
+        templates = []
+        for char in sorted(per_char):
+            labels.extend(char for _ in per_char[char])
+            templates.extend(per_char[char])
+        print(f"Trained on {used} captures ({skipped} skipped), {len(per_char)} characters, {len(templates)} templates")
+        dimension = GLYPH_SIZE[0] * GLYPH_SIZE[1]
+        matrix = np.vstack(templates).astype(np.float32) if templates else np.zeros((0, dimension), dtype=np.float32)
+        return cls(labels, matrix)
+
+    def recognize(self, image_bytes):
+        """
+        Read a CAPTCHA image. Returns (text, confidence) where confidence is the
+        similarity of the weakest glyph match (0 when nothing could be read).
+        """
+        if not len(self.templates):
+            return "", 0.0
+        glyphs = extract_glyphs(image_bytes)
+        if not glyphs:
+            return "", 0.0
+        scores = np.vstack(glyphs) @ self.templates.T
+        best = scores.argmax(axis=1)
+        text = "".join(self.labels[best])
+        confidence = float(scores[np.arange(len(best)), best].min())
+        return text, confidence
+
+
+class RecognizerBackend:
+    """
+    CAPTCHA service backend that answers locally when confident and otherwise asks the fallback
+    backend, saving its answers to capture_dir as new labelled captures. The solve id of a
+    saved answer is its capture path, so a rejected answer's capture can be deleted.
+    """
+    name = "recognizer"
+
+    def __init__(self, recognizer, fallback=None, min_confidence=MIN_CONFIDENCE, capture_dir=None):
+        self.recognizer = recognizer
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.capture_dir = capture_dir
+        # capture path -> solve id of the fallback backend
+        self.unconfirmed = OrderedDict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_model(cls, model_path=DEFAULT_MODEL_PATH, **kwargs):
+        """
+        Load the model if it has been trained, otherwise start empty and rely on the fallback
+        """
+        if os.path.exists(model_path):
+            recognizer = TemplateRecognizer.load(model_path)
+        else:
+            print(f"No CAPTCHA model at {model_path}, every image goes to the fallback solver")
+            recognizer = TemplateRecognizer()
+        return cls(recognizer, **kwargs)
+
+    def solve(self, image_bytes):
+        try:
+            text, confidence = self.recognizer.recognize(image_bytes)
+        except Exception as e:
+            print(f"Local CAPTCHA recognition failed: {e}")
+            text, confidence = "", 0.0
+
+        if text and confidence >= self.min_confidence:
+            print(f"CAPTCHA recognized locally: {text} (confidence {confidence:.2f})")
+            return text, None
+        if self.fallback is None:
+            return None, None
+
+        print(f"Low confidence ({confidence:.2f}), asking {self.fallback.name}...")
+        code, solve_id = self.fallback.solve(image_bytes)
+        if not code:
+            return code, solve_id
+        path = self.save_capture(image_bytes, code)
+        if path is None:
+            return code, solve_id
+        with self.lock:
+            self.unconfirmed[path] = solve_id
+            while len(self.unconfirmed) > MAX_UNCONFIRMED_CAPTURES:
+                self.unconfirmed.popitem(last=False)
+        return code, path
+
+    def save_capture(self, image_bytes, code):
+        """
+        Keep a remotely solved image as training data for the next model.
+        Returns the capture path, or None if it was not saved.
+        """
+        if not self.capture_dir or "_" in code or os.sep in code:
+            return None
+        try:
+            os.makedirs(self.capture_dir, exist_ok=True)
+            path = os.path.join(self.capture_dir, f"{code}_{time.time_ns()}.png")
+            with open(path, "wb") as f:
+                f.write(image_bytes)
+            return path
+        except Exception as e:
+            print(f"Could not save CAPTCHA capture: {e}")
+            return None
+
+    def report(self, solve_id, correct):
+        """
+        Forward the report to the fallback; a rejected answer's capture is deleted,
+        its label would teach wrong templates
+        """
+        with self.lock:
+            capture_path = solve_id if solve_id in self.unconfirmed else None
+            if capture_path is not None:
+                solve_id = self.unconfirmed.pop(capture_path)
+        if capture_path is not None and not correct:
+            try:
+                os.remove(capture_path)
+                print(f"Deleted rejected CAPTCHA capture {capture_path}")
+            except OSError as e:
+                print(f"Could not delete CAPTCHA capture {capture_path}: {e}")
+        if solve_id and self.fallback is not None:
+            self.fallback.report(solve_id, correct)
+
+
+def evaluate(recognizer, samples, min_confidence=MIN_CONFIDENCE):
+    """
+    Accuracy, coverage (share of images answered locally) and speed on labelled captures
+    """
+    total = accepted = correct_accepted = correct = 0
+    elapsed = 0.0
+    for image_bytes, label in samples:
+        started = time.perf_counter()
+        text, confidence = recognizer.recognize(image_bytes)
+        elapsed += time.perf_counter() - started
+        total += 1
+        correct += text == label
+        if confidence >= min_confidence:
+            accepted += 1
+            correct_accepted += text == label
+    if not total:
+        print("No labelled captures found")
+        return
+    print(f"Captures: {total}")
+    print(f"Accuracy (all): {correct / total:.1%}")
+    print(f"Answered locally at confidence >= {min_confidence}: {accepted / total:.1%}")
+    if accepted:
+        print(f"Accuracy (answered locally): {correct_accepted / accepted:.1%}")
+    print(f"Mean recognition time: {elapsed / total * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the offline CAPTCHA recognizer")
+    parser.add_argument("command", choices=["train", "evaluate", "recognize"])
+    parser.add_argument("path", help="Directory of labelled captures (train/evaluate) or an image (recognize)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model file to write or read")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        TemplateRecognizer.train(load_labelled_captures(args.path)).save(args.model)
+        print(f"Model saved to {args.model}")
+    elif args.command == "evaluate":
+        evaluate(TemplateRecognizer.load(args.model), load_labelled_captures(args.path), args.min_confidence)
+    else:
+        with open(args.path, "rb") as f:
+            text, confidence = TemplateRecognizer.load(args.model).recognize(f.read())
+        print(f"{text} (confidence {confidence:.2f})")
@@ -0,0 +1,218 @@
+"""
+Asynchronous CAPTCHA solving.
+
+Solving a CAPTCHA remotely takes 10-30 s. The scrapers hand the image to a
+CaptchaService, which solves it on a background thread (retrying failed
+solves) and returns a CaptchaTicket straight away. The browser thread can
+keep filling the form, or another case can be extracted, and the answer
+is collected later with ticket.result(). When the site rejects the answer,
+ticket.report_bad() tells the backend (2Captcha refunds the solve).
+
+Backends are plain objects with solve(image_bytes) -> (code, solve_id) and
+report(solve_id, correct). 2Captcha (the default) reads the account key
+from TWOCAPTCHA_API_KEY. Set CAPTCHA_BACKEND=local to swap 2Captcha for
+the local stand-in when testing, or CAPTCHA_BACKEND=recognizer to read
+images offline (captcha_recognizer) and only fall back to 2Captcha on low
+confidence.
+"""
+import base64
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from metrics import add_retries, stage
+
+
+def twocaptcha_api_key():
+    return os.environ.get("TWOCAPTCHA_API_KEY", "").strip()
+
+
+def twocaptcha_solver():
+    """
+    A twocaptcha.TwoCaptcha solver for the account in TWOCAPTCHA_API_KEY
+    """
+    api_key = twocaptcha_api_key()
+    if not api_key:
+        raise RuntimeError("The 2Captcha backend needs an API key: set TWOCAPTCHA_API_KEY, "
+                           "or pick another backend with CAPTCHA_BACKEND=local or recognizer")
+    from twocaptcha import TwoCaptcha
+
+    return TwoCaptcha(api_key)
+
+
+class TwoCaptchaBackend:
+    """
+    Solve image CAPTCHAs with a twocaptcha.TwoCaptcha solver
+    """
+    name = "2captcha"
+
+    def __init__(self, solver):
+        self.solver = solver
+
+    def solve(self, image_bytes):
+        result = self.solver.normal(base64.b64encode(image_bytes).decode("ascii"))
+        if not result or 'code' not in result:
+            print("Invalid response from 2Captcha.")
+            return None, None
+        return result['code'], result.get('captchaId')
+
+    def report(self, solve_id, correct):
+        if solve_id:
+            self.solver.report(solve_id, correct)
+
+
+class LocalCaptchaBackend:
+    """
+    Stand-in backend for tests and benchmarks: returns a fixed answer (or answer(image_bytes)
+    if answer is callable) after an optional simulated delay
+    """
+    name = "local"
+
+    def __init__(self, answer="123456", delay=0.0):
+        self.answer = answer
+        self.delay = delay
+
+    def solve(self, image_bytes):
+        if self.delay:
+            time.sleep(self.delay)
+        answer = self.answer(image_bytes) if callable(self.answer) else self.answer
+        return answer, None
+
+    def report(self, solve_id, correct):
+        pass
+
+
+def backend_from_env(solver=None):
+    """
+    Pick the backend named by CAPTCHA_BACKEND (2captcha by default). 2Captcha uses solver,
+    or a solver for TWOCAPTCHA_API_KEY, and raises RuntimeError when there is no key.
+    The local backend reads its answer and delay from CAPTCHA_LOCAL_ANSWER and CAPTCHA_LOCAL_DELAY;
+    the recognizer reads CAPTCHA_MODEL, CAPTCHA_MIN_CONFIDENCE and CAPTCHA_CAPTURE_DIR.
+    """
+    name = os.environ.get("CAPTCHA_BACKEND", TwoCaptchaBackend.name)
+    if name == "recognizer":
+        # Imported here so NumPy is only needed when the recognizer is used
+        from captcha_recognizer import DEFAULT_MODEL_PATH, MIN_CONFIDENCE, RecognizerBackend
+
+        # Without a 2Captcha key low-confidence images are not answered
+        if solver is None and twocaptcha_api_key():
+            solver = twocaptcha_solver()
+        return RecognizerBackend.from_model(
+            os.environ.get("CAPTCHA_MODEL", DEFAULT_MODEL_PATH),
+            fallback=TwoCaptchaBackend(solver) if solver is not None else None,
+            min_confidence=float(os.environ.get("CAPTCHA_MIN_CONFIDENCE", MIN_CONFIDENCE)),
+            capture_dir=os.environ.get("CAPTCHA_CAPTURE_DIR"),
+        )
+    if name == LocalCaptchaBackend.name:
+        return LocalCaptchaBackend(
+            answer=os.environ.get("CAPTCHA_LOCAL_ANSWER", "123456"),
+            delay=float(os.environ.get("CAPTCHA_LOCAL_DELAY", "0")),
+        )
+    if name == TwoCaptchaBackend.name:
+        return TwoCaptchaBackend(solver or twocaptcha_solver())
+    raise ValueError(f"Unknown CAPTCHA backend: {name}")
+
+
+class CaptchaTicket:
+    """
+    A CAPTCHA submitted to a CaptchaService whose answer may not be ready yet
+    """
+
+    def __init__(self, service, future):
+        self.service = service
+        self.future = future
+        self.submitted_at = time.time()
+
+    def result(self, timeout=None):
+        """
+        Block until the CAPTCHA is solved and return the code, or None if solving failed or timed out
+        """
+        timeout = self.service.timeout if timeout is None else timeout
+        # Only the time the caller is blocked counts, solving overlaps with filling the form
+        with stage("captcha"):
+            try:
+                solution = self.future.result(timeout=timeout)
+            except TimeoutError:
+                print(f"CAPTCHA not solved within {timeout}s")
+                self.future.cancel()
+                return None
+            if not solution:
+                add_retries(self.service.retries - 1)
+                return None
+            add_retries(solution["attempts"] - 1)
+            return solution["code"]
+
+    def report_bad(self):
+        """
+        Tell the backend the answer was rejected by the site
+        """
+        if self.future.done() and self.future.result():
+            self.service.report(self.future.result()["id"], False)
+
+
+class CaptchaService:
+    """
+    Solve CAPTCHAs on a small thread pool so callers never block on the solver
+    """
+
+    def __init__(self, backend, max_workers=4, retries=3, timeout=180):
+        self.backend = backend
+        self.retries = retries
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="captcha")
+
+    def submit(self, image_bytes):
+        """
+        Queue an image for solving and return a CaptchaTicket immediately
+        """
+        return CaptchaTicket(self, self.executor.submit(self.solve_with_retries, image_bytes))
+
+    def solve(self, image_bytes, timeout=None):
+        """
+        Solve an image synchronously. Returns the code or None.
+        """
+        return self.submit(image_bytes).result(timeout)
+
+    def solve_with_retries(self, image_bytes):
+        """
+        Runs on the pool: ask the backend up to `retries` times.
+        Returns {"code", "id", "seconds", "attempts"} or None.
+        """
+        started = time.time()
+        for attempt in range(self.retries):
+            try:
+                print(f"Attempt {attempt+1} to solve CAPTCHA ({self.backend.name})...")
+                code, solve_id = self.backend.solve(image_bytes)
+                if code:
+                    print(f"CAPTCHA solved: {code}")
+                    return {"code": code, "id": solve_id, "seconds": round(time.time() - started, 2),
+                            "attempts": attempt + 1}
+            except Exception as e:
+                print(f"Error solving CAPTCHA: {e}")
+        print("All attempts failed.")
+        return None
+
+    def report(self, solve_id, correct):
+        try:
+            self.backend.report(solve_id, correct)
+        except Exception as e:
+            print(f"Could not report CAPTCHA result: {e}")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_captcha_service():
+    """
+    The process-wide CaptchaService with the backend from CAPTCHA_BACKEND, created on first use
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CaptchaService(backend_from_env())
+        return _service
@@ -0,0 +1,133 @@
+"""
+Per-case manifest of downloaded documents and the last seen case status.
+
+Every CNR folder gets a manifest.json recording each PDF's source URL,
+size and SHA-256 together with the case's last Next Hearing Date and Case
+Stage. A re-scrape uses it to download only documents that are not in the
+folder yet and to tell whether the case moved since the previous run.
+"""
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_NAME = "manifest.json"
+
+# case_data keys that change whenever a District or High Court case moves
+STATUS_KEYS = ("Status_Next Hearing Date", "Status_Case Stage")
+
+# Their counterparts in the SCI case table
+SCI_STATUS_KEYS = ("Present/Last Listed On", "Status/Stage")
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file on disk
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def case_status(case_data, keys=STATUS_KEYS):
+    """
+    The status fields of a case that decide whether it changed since the last scrape
+    """
+    return {key: str(case_data.get(key, "")).strip() for key in keys}
+
+
+class CaseManifest:
+    """
+    manifest.json of one case folder.
+
+    Documents are keyed by their file name inside the folder rather than by
+    URL, because order links are built from the search response and are not
+    guaranteed to stay the same between searches.
+    """
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.path = os.path.join(folder_path, MANIFEST_NAME)
+        self.documents = {}
+        self.status = {}
+        self.updated_at = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.documents = data.get("documents", {})
+            self.status = data.get("status", {})
+            self.updated_at = data.get("updated_at")
+        except Exception as e:
+            # A damaged manifest only costs one full re-download
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def save(self):
+        """
+        Write the manifest atomically so an interrupted run never leaves half a file
+        """
+        os.makedirs(self.folder_path, exist_ok=True)
+        self.updated_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data = {"updated_at": self.updated_at, "status": self.status, "documents": self.documents}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def has_document(self, file_path, verify_hash=False):
+        """
+        True if file_path was downloaded before and is still on disk with the recorded size
+        (and hash, if verify_hash is set)
+        """
+        entry = self.documents.get(os.path.basename(file_path))
+        if not entry:
+            return False
+        try:
+            if os.path.getsize(file_path) != entry.get("size"):
+                return False
+        except OSError:
+            return False
+        if verify_hash:
+            return file_sha256(file_path) == entry.get("sha256")
+        return True
+
+    def pending(self, jobs, verify_hash=False):
+        """
+        Filter (url, file_path) pairs down to the documents that still need downloading
+        """
+        jobs = list(jobs)
+        pending = [job for job in jobs if not self.has_document(job[1], verify_hash)]
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            print(f"Skipping {skipped}/{len(jobs)} documents already saved in {self.folder_path}")
+        return pending
+
+    def record_downloads(self, results):
+        """
+        Record the successful PdfDownloader results
+        """
+        downloaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for result in results:
+            if not result["ok"]:
+                continue
+            self.documents[os.path.basename(result["path"])] = {
+                "url": result["url"],
+                "size": result["bytes"],
+                "sha256": result["sha256"] or file_sha256(result["path"]),
+                "downloaded_at": downloaded_at,
+            }
+
+    def status_changed(self, status):
+        """
+        True if the case status differs from the last scrape (or there was none)
+        """
+        return status != self.status
+
+    def update_status(self, status):
+        self.status = dict(status)
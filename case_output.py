@@ -0,0 +1,85 @@
+"""
+Save a scraped case outside the browser.
+
+Both engines (the Selenium scrapers and http_engine) hand the flat
+case_data dict of a District or High Court case to save_case(), which
+creates the case folder, appends the case to the Parquet dataset (and an
+Excel workbook with ECOURTS_WRITE_EXCEL=1) and queues its database rows.
+Nothing here imports Selenium, and pandas is only loaded for Excel.
+"""
+import os
+import traceback
+
+from case_schema import get_case_loader
+from case_store import get_writer
+from parquet_export import WRITE_EXCEL, export_case
+
+# case_data keys -> columns of public.ecourts_high_courts
+HIGH_COURT_DB_COLUMNS = {
+    'Filing Number': 'filing_number',
+    'Registration Number': 'registration_number',
+    'CNR Number': 'cnr_number',
+    'Status_First Hearing Date': 'status_first_hearing_date',
+    'Status_Next Hearing Date': 'status_next_hearing_date',
+    'Status_Case Stage': 'status_case_stage',
+    'Status_Court Number and Judge': 'status_court_number_and_judge',
+}
+
+
+def case_folder_name(cnr_number):
+    """
+    Folder name for a CNR number
+    """
+    folder_name = cnr_number.replace("/", "_").replace("\\", "_").strip()
+    return folder_name or "unknown_cnr"
+
+
+def write_excel(folder_name, row):
+    # Imported here so pandas is only needed for the optional workbooks
+    import pandas as pd
+
+    excel_path = os.path.join(folder_name, f"{folder_name}_case_details.xlsx")
+    pd.DataFrame([row]).to_excel(excel_path, index=False)
+    print(f"Saved case details to Excel: {excel_path}")
+
+
+def save_case(court, cnr_number, case_data, record=None):
+    """
+    Create the folder named after the CNR number and export case_data (its pdf_links are
+    left out) to the Parquet dataset, the optional Excel workbook and the database: High
+    Court rows go to public.ecourts_high_courts, and a parsed CaseRecord, when given, to
+    the normalized case tables. Errors are reported, never raised.
+    Returns the folder path.
+    """
+    print(f"Creating folder for CNR: {cnr_number}")
+    folder_name = case_folder_name(cnr_number)
+    os.makedirs(folder_name, exist_ok=True)
+    print(f"Created folder: {folder_name}")
+
+    if not case_data:
+        return folder_name
+
+    # The PDF links are downloaded separately
+    case_data = {key: value for key, value in case_data.items() if key != "pdf_links"}
+    try:
+        # Append to the partitioned Parquet dataset
+        export_case(case_data, court, cnr_number)
+
+        if court == "high":
+            row = {HIGH_COURT_DB_COLUMNS.get(key, key): value for key, value in case_data.items()}
+        else:
+            row = case_data
+        if WRITE_EXCEL:
+            write_excel(folder_name, row)
+
+        # Queue the rows for PostgreSQL, written in batches by the shared case store
+        if court == "high":
+            get_writer("ecourts_high_courts").add(row)
+            print("Case data queued for PostgreSQL table: public.ecourts_high_courts")
+        if record is not None:
+            get_case_loader().add(record, court, cnr_number)
+    except Exception as e:
+        print(f"Error saving case data: {e}")
+        traceback.print_exc()
+
+    return folder_name
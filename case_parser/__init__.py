@@ -0,0 +1,29 @@
+"""
+Offline parsers for eCourts and SCI case pages.
+
+Everything here works on raw HTML (bytes or str) with lxml, so pages can be
+parsed from driver.page_source, an HTTP response or a saved fixture alike.
+"""
+from case_parser.dates import parse_court_date
+from case_parser.ecourts import (CASE_SECTIONS, HIGH_COURT_SECTIONS, parse_business_html, parse_case_html,
+                                 parse_modal_html, split_party_entries)
+from case_parser.records import SCI_FIELDS, Act, CaseRecord, Hearing, Order, Party, SciCaseRecord
+from case_parser.sci import parse_sci_case_html
+
+__all__ = [
+    "CASE_SECTIONS",
+    "HIGH_COURT_SECTIONS",
+    "SCI_FIELDS",
+    "Act",
+    "CaseRecord",
+    "Hearing",
+    "Order",
+    "Party",
+    "SciCaseRecord",
+    "parse_business_html",
+    "parse_case_html",
+    "parse_court_date",
+    "parse_modal_html",
+    "parse_sci_case_html",
+    "split_party_entries",
+]
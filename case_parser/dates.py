@@ -0,0 +1,18 @@
+import re
+from datetime import datetime
+
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%d %B %Y", "%d %b %Y", "%d.%m.%Y")
+
+
+def parse_court_date(value):
+    """
+    Parse the date formats the eCourts pages use ("10-08-2021", "23rd August 2021", ...).
+    Returns a date, or None if value is empty or not a date.
+    """
+    value = re.sub(r"(\d+)(st|nd|rd|th)\b", r"\1", (value or "").strip())
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,269 @@
+import re
+from html import unescape
+from urllib.parse import urljoin
+
+from case_parser.records import Act, CaseRecord, Hearing, Order, Party
+from case_parser.text import cell_text, find_first, first_text_node, has_class, inner_html, parse_document, text_content
+
+CASE_SECTIONS = ("details", "status", "parties", "acts", "history")
+
+# Only the case details and status tables go to the High Court's Excel/PostgreSQL
+HIGH_COURT_SECTIONS = ("details", "status")
+
+PARTY_NUMBER = re.compile(r"^\s*(\d+)\s*\)\s*")
+ADVOCATE_PREFIX = re.compile(r"^\s*Advocate\s*-?\s*", re.IGNORECASE)
+
+
+def table_rows(table):
+    return table.xpath(".//tr")
+
+
+def row_cells(row):
+    return row.xpath("./td")
+
+
+def detail_label(label_cell):
+    """
+    Label of a Case Details cell: first direct text node, else label/textContent
+    """
+    key = first_text_node(label_cell)
+
+    # Fall back to the text content, or the label text if there is one
+    if not key:
+        key = text_content(label_cell).strip()
+        labels = label_cell.xpath(".//label")
+        if labels and cell_text(labels[0]):
+            key = cell_text(labels[0])
+
+    # Clean up potential extra whitespace/newlines and a trailing colon in the key
+    return ' '.join(key.split()).rstrip(":").strip()
+
+
+def detail_value(key, value_cell):
+    """
+    Value of a Case Details cell. The CNR Number cell also links to the QR code
+    acknowledgement, only the number itself (in its <span>) is the value.
+    """
+    if key == "CNR Number":
+        spans = value_cell.xpath(".//span")
+        if spans and cell_text(spans[0]):
+            return cell_text(spans[0])
+    return cell_text(value_cell)
+
+
+def parse_details(table):
+    """
+    Case Details table: label | value pairs, two per row for e.g. Filing Number | Filing Date
+    """
+    details = {}
+    for row in table_rows(table):
+        cells = row_cells(row)
+        for index in range(0, len(cells) - 1, 2):
+            key = detail_label(cells[index])
+            if key:
+                details[key] = detail_value(key, cells[index + 1])
+    return details
+
+
+def parse_status(table):
+    """
+    Case Status table: label (or cell text) | value
+    """
+    status = {}
+    for row in table_rows(table):
+        cells = row_cells(row)
+        if len(cells) >= 2:
+            labels = cells[0].xpath(".//label")
+            key = cell_text(labels[0]) if labels else cell_text(cells[0])
+            if key:
+                status[key] = cell_text(cells[1])
+    return status
+
+
+def parse_party_entries(table):
+    """
+    Petitioner/Respondent and Advocate table: one entry per <br> separated line of the first cell
+    """
+    entries = []
+    for row in table_rows(table):
+        cells = row_cells(row)
+        if cells:
+            html_content = inner_html(cells[0])
+            entries.extend(entry.strip() for entry in html_content.split("<br>") if entry.strip())
+    return entries
+
+
+def split_party_entries(side, entries):
+    """
+    Group Petitioner/Respondent table lines ("1) Name", "Advocate- Name", ...) into Party objects
+    """
+    parties = []
+    for entry in entries:
+        entry = " ".join(unescape(entry).split())
+        if ADVOCATE_PREFIX.match(entry):
+            advocate = ADVOCATE_PREFIX.sub("", entry).strip()
+            if parties and advocate:
+                parties[-1].advocates.append(advocate)
+            continue
+        match = PARTY_NUMBER.match(entry)
+        position = int(match.group(1)) if match else len(parties) + 1
+        name = PARTY_NUMBER.sub("", entry).strip()
+        if name:
+            parties.append(Party(side, position, name))
+    return parties
+
+
+def parse_history(table):
+    """
+    Case History table: Judge | Business on Date | Hearing Date | Purpose of Hearing
+    """
+    hearings = []
+    for row in table_rows(table):
+        cells = row_cells(row)
+        if len(cells) >= 4:
+            links = cells[1].xpath(".//a[contains(@onclick, 'viewBusiness')]")
+            params = tuple(re.findall(r"'([^']*)'", links[0].get("onclick", ""))) if links else ()
+            hearings.append(Hearing(cell_text(cells[0]), cell_text(cells[1]), cell_text(cells[2]),
+                                    cell_text(cells[3]), params))
+    return hearings
+
+
+def parse_acts(table):
+    """
+    Acts table: Act | Section rows, header rows skipped
+    """
+    acts = []
+    for row in table_rows(table):
+        if row.xpath("./th"):
+            continue
+        cells = row_cells(row)
+        if len(cells) >= 2:
+            act = cell_text(cells[0])
+            section = cell_text(cells[1])
+            if act or section:
+                acts.append(Act(act, section))
+    return acts
+
+
+def parse_pdf_links(root, base_url=None):
+    pdf_links = []
+    for href in root.xpath("//a[contains(@href, 'display_pdf') or contains(@href, '.pdf')]/@href"):
+        pdf_links.append(urljoin(base_url, href) if base_url else str(href))
+    return pdf_links
+
+
+def parse_orders(root, base_url):
+    """
+    Order table: (date, PDF URL) pairs from the displayPdf('...') onclick handlers
+    """
+    orders = []
+    order_table = find_first(root, f"//table[{has_class('order_table')} and {has_class('table')}]")
+    if order_table is None:
+        return orders
+    for row in table_rows(order_table):
+        cells = row_cells(row)
+        if len(cells) >= 3:
+            links = cells[2].xpath(".//a")
+            onclick_attr = links[0].get("onclick", "") if links else ""
+            if "displayPdf" in onclick_attr:
+                params_start = onclick_attr.find("('") + 2
+                params_end = onclick_attr.find("')")
+                if params_start > 1 and params_end > params_start:
+                    orders.append(Order(cell_text(cells[1]), f"{base_url}{onclick_attr[params_start:params_end]}"))
+    return orders
+
+
+def parse_case_html(html, base_url=None, sections=CASE_SECTIONS, orders_base_url=None):
+    """
+    Parse an eCourts (District or High Court) results page into a CaseRecord.
+    Modal data is not part of the results page and has to be added with parse_modal_html.
+    sections limits which tables are parsed; relative PDF links are resolved against
+    base_url and order links (displayPdf handlers) against orders_base_url.
+    """
+    record = CaseRecord()
+    root = parse_document(html)
+    if root is None:
+        return record
+
+    if "details" in sections:
+        table = find_first(root, f"//table[{has_class('case_details_table')}]")
+        if table is not None:
+            record.details = parse_details(table)
+
+    if "status" in sections:
+        table = find_first(root, f"//table[{has_class('case_status_table')}]")
+        if table is not None:
+            record.status = parse_status(table)
+
+    if "parties" in sections:
+        table = find_first(root, f"//table[{has_class('Petitioner_Advocate_table')}]")
+        if table is not None:
+            record.petitioner_advocates = parse_party_entries(table)
+        table = find_first(root, f"//table[{has_class('Respondent_Advocate_table')}]")
+        if table is not None:
+            record.respondent_advocates = parse_party_entries(table)
+
+    if "acts" in sections:
+        table = find_first(root, f"//table[{has_class('acts_table')}]")
+        if table is not None:
+            record.acts = parse_acts(table)
+
+    if "history" in sections:
+        table = find_first(root, f"//table[{has_class('history_table')}]")
+        if table is not None:
+            record.hearings = parse_history(table)
+
+    record.pdf_links = parse_pdf_links(root, base_url)
+    if orders_base_url:
+        record.orders = parse_orders(root, orders_base_url)
+    return record
+
+
+def parse_business_html(html):
+    """
+    Parse one hearing's business (the viewBusiness response) into text lines: "Daily Status"
+    and a separator if present, the court heading lines, then "Label: Value" for every
+    Label | : | Value row with a value
+    """
+    lines = []
+    root = parse_document(html)
+    if root is None:
+        return lines
+    if root.xpath("//span[contains(., 'Daily Status')]"):
+        lines.append("Daily Status")
+        lines.append("-" * 50)
+    for center in root.xpath("//center"):
+        text = cell_text(center)
+        if text:
+            lines.append(text)
+    table = find_first(root, "//table[@width='87%']")
+    if table is None:
+        table = find_first(root, "//table")
+    if table is not None:
+        for row in table_rows(table):
+            cells = row_cells(row)
+            if len(cells) >= 3:
+                label = cell_text(cells[0])
+                value = cell_text(cells[2])
+                if label and value:
+                    lines.append(f"{label}: {value}")
+    return lines
+
+
+def parse_modal_html(html):
+    """
+    Parse the acknowledgement modal body (Label | : | Value rows) into a label -> value dict
+    """
+    modal = {}
+    root = parse_document(html)
+    if root is None:
+        return modal
+    table = find_first(root, "//table")
+    if table is not None:
+        for row in table_rows(table):
+            cells = row_cells(row)
+            if len(cells) >= 3:
+                label = cell_text(cells[0])
+                if label:
+                    modal[label] = cell_text(cells[2])
+    return modal
@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Act:
+    act: str
+    section: str
+
+
+@dataclass
+class Order:
+    date: str
+    url: str
+
+
+@dataclass
+class Hearing:
+    """
+    One Case History row; business_params are the viewBusiness(...) arguments
+    that load that date's business from the server
+    """
+    judge: str
+    business_date: str
+    hearing_date: str
+    purpose: str
+    business_params: tuple = ()
+
+
+@dataclass
+class Party:
+    """
+    A petitioner or respondent with the advocates listed under it
+    """
+    side: str
+    position: int
+    name: str
+    advocates: list = field(default_factory=list)
+
+
+@dataclass
+class CaseRecord:
+    """
+    A District or High Court case parsed from an eCourts results page
+    """
+    details: dict = field(default_factory=dict)
+    status: dict = field(default_factory=dict)
+    petitioner_advocates: list = field(default_factory=list)
+    respondent_advocates: list = field(default_factory=list)
+    acts: list = field(default_factory=list)
+    modal: dict = field(default_factory=dict)
+    pdf_links: list = field(default_factory=list)
+    orders: list = field(default_factory=list)
+    hearings: list = field(default_factory=list)
+
+    def to_case_data(self):
+        """
+        Flatten into the case_data dict the scrapers write to Excel/PostgreSQL
+        (Status_*, Petitioner_Advocate_*, Respondent_Advocate_*, Acts_*, Modal_*, pdf_links)
+        """
+        case_data = dict(self.details)
+        for key, value in self.status.items():
+            case_data[f"Status_{key}"] = value
+        for i, entry in enumerate(self.petitioner_advocates):
+            case_data[f"Petitioner_Advocate_{i+1}"] = entry
+        for i, entry in enumerate(self.respondent_advocates):
+            case_data[f"Respondent_Advocate_{i+1}"] = entry
+        for i, act in enumerate(self.acts):
+            case_data[f"Acts_Act_{i+1}"] = act.act
+            case_data[f"Acts_Section_{i+1}"] = act.section
+        for key, value in self.modal.items():
+            case_data[f"Modal_{key}"] = value
+        case_data["pdf_links"] = list(self.pdf_links)
+        return case_data
+
+
+# Labels of the SCI case table, in the order they are written to the TXT file
+SCI_FIELDS = [
+    "Diary Number", "Case Number", "CNR Number", "Present/Last Listed On", "Status/Stage",
+    "Admitted", "Category", "Petitioner(s)", "Respondent(s)",
+    "Petitioner Advocate(s)", "Respondent Advocate(s)"
+]
+
+
+@dataclass
+class SciCaseRecord:
+    """
+    A Supreme Court case parsed from the SCI case status page
+    """
+    heading: str = ""
+    fields: dict = field(default_factory=dict)
+
+    def to_row(self, cnr_number):
+        """
+        Row for the public.ecourts_supreme_courts table
+        """
+        return {
+            "cnr_number": self.fields.get("CNR Number", cnr_number),
+            "title": self.heading.strip(),
+            "diary_number": self.fields.get("Diary Number", ""),
+            "case_number": self.fields.get("Case Number", ""),
+            "present_last_listed_on": self.fields.get("Present/Last Listed On", ""),
+            "status_stage": self.fields.get("Status/Stage", ""),
+            "admitted": self.fields.get("Admitted", ""),
+            "category": self.fields.get("Category", ""),
+            "petitioner": self.fields.get("Petitioner(s)", ""),
+            "respondent": self.fields.get("Respondent(s)", ""),
+            "petitioner_advocate": self.fields.get("Petitioner Advocate(s)", ""),
+            "respondent_advocate": self.fields.get("Respondent Advocate(s)", "")
+        }
@@ -0,0 +1,38 @@
+from case_parser.records import SciCaseRecord
+from case_parser.text import find_first, iter_strings, parse_document
+
+
+def joined_strings(element, separator=""):
+    """
+    Stripped, non-empty text pieces of element joined with separator
+    """
+    return separator.join(text.strip() for text in iter_strings(element) if text.strip())
+
+
+def parse_sci_case_html(html):
+    """
+    Parse the SCI case status page (#cnrResultsDetails heading and the fetched case table)
+    into a SciCaseRecord
+    """
+    record = SciCaseRecord()
+    root = parse_document(html)
+    if root is None:
+        return record
+
+    # Header content
+    header_div = find_first(root, "//div[@id='cnrResultsDetails']")
+    if header_div is not None:
+        for tag in ("h3", "h4"):
+            heading = find_first(header_div, f".//{tag}")
+            if heading is not None:
+                record.heading += joined_strings(heading) + "\n"
+
+    # Table data
+    tbody = find_first(root, "//tbody[@data-fetched='true']")
+    if tbody is not None:
+        for row in tbody.xpath(".//tr"):
+            cols = row.xpath("./td")
+            if len(cols) == 2:
+                key = joined_strings(cols[0]).replace("\xa0", " ").strip()
+                record.fields[key] = joined_strings(cols[1], separator=" ")
+    return record
@@ -0,0 +1,107 @@
+import html as html_lib
+
+from lxml import etree
+
+# Elements whose text is never rendered, so Selenium's .text skips it
+NON_RENDERED_TAGS = {"script", "style", "noscript", "template"}
+
+
+def parse_document(html):
+    """
+    Parse raw HTML (bytes or str, full page or fragment) into an lxml tree.
+    Returns None for empty input.
+    """
+    if isinstance(html, str):
+        # lxml refuses str input that carries an XML encoding declaration
+        html = html.encode("utf-8")
+    if not html or not html.strip():
+        return None
+    # Plain etree elements: lxml.html's custom element classes cost a lookup per node
+    return etree.HTML(html)
+
+
+def has_class(class_name):
+    """
+    XPath predicate matching elements whose class attribute contains class_name as a whole word
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def find_first(root, xpath):
+    """
+    First element matching xpath, or None
+    """
+    matches = root.xpath(xpath)
+    return matches[0] if matches else None
+
+
+def collect_text(element, parts):
+    """
+    Append the rendered text of element's children (and their tails) to parts
+    """
+    for child in element:
+        if child.tag is etree.Comment or child.tag is etree.ProcessingInstruction:
+            pass
+        elif child.tag == "br":
+            parts.append("\n")
+        elif child.tag not in NON_RENDERED_TAGS:
+            if child.text:
+                parts.append(child.text)
+            collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def iter_strings(element):
+    """
+    Yield the text pieces inside element in document order, skipping comments and scripts
+    """
+    if element.text:
+        yield element.text
+    for child in element:
+        if child.tag is not etree.Comment and child.tag is not etree.ProcessingInstruction \
+                and child.tag not in NON_RENDERED_TAGS:
+            yield from iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def cell_text(cell):
+    """
+    Visible text of a cell, like Selenium's .text: <br> becomes a line break
+    and runs of whitespace are collapsed
+    """
+    parts = [cell.text or ""]
+    collect_text(cell, parts)
+    lines = [' '.join(line.split()) for line in "".join(parts).split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def first_text_node(cell):
+    """
+    First non-empty text node directly inside the cell (ignores nested labels/links)
+    """
+    candidates = [cell.text] + [child.tail for child in cell]
+    for text in candidates:
+        if text and text.strip():
+            return text.strip()
+    return ""
+
+
+def text_content(element):
+    """
+    Raw text content of the element, like the DOM textContent property
+    """
+    return element.xpath("string()")
+
+
+def inner_html(element):
+    """
+    Serialized children of the element, matching the browser's innerHTML
+    (<br> tags, escaped text and &nbsp; entities)
+    """
+    parts = [html_lib.escape(element.text or "", quote=False)]
+    for child in element:
+        parts.append(etree.tostring(child, encoding="unicode", method="html", with_tail=False))
+        parts.append(html_lib.escape(child.tail or "", quote=False))
+    return "".join(parts).replace("\xa0", "&nbsp;")
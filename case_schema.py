@@ -0,0 +1,287 @@
+"""
+Normalized PostgreSQL schema for District and High Court cases.
+
+The scrapers' Excel output flattens a case into one wide row. Here a case
+is split into:
+
+    cases           one row per CNR number, dates stored as DATE
+    case_parties    petitioners and respondents
+    case_advocates  advocates, linked to the party they appear for
+    case_acts       act / section pairs
+    case_hearings   the Case History table
+
+with indexes for the usual lookups (cases of an advocate or party, next
+hearings in a date range, cases under an act). CaseLoader bulk-loads parsed
+CaseRecords in batches: cases are upserted on cnr_number and the child rows
+of a case are only replaced when its content hash changed.
+"""
+import threading
+import time
+import traceback
+
+from sqlalchemy import (Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, Table, Text, delete, func,
+                        literal_column)
+from sqlalchemy.dialects.postgresql import insert
+
+from case_parser import parse_court_date, split_party_entries
+from case_store import BATCH_SIZE, FLUSH_INTERVAL, content_hash, get_engine, register_writer
+from metrics import timed
+
+metadata = MetaData()
+
+cases_table = Table("cases", metadata,
+    Column("cnr_number", Text, primary_key=True),
+    Column("court", Text, nullable=False),
+    Column("case_type", Text),
+    Column("filing_number", Text),
+    Column("filing_date", Date),
+    Column("registration_number", Text),
+    Column("registration_date", Date),
+    Column("first_hearing_date", Date),
+    Column("next_hearing_date", Date),
+    Column("case_stage", Text),
+    Column("court_number_and_judge", Text),
+    Column("content_hash", Text),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_cases_next_hearing_date", "next_hearing_date"),
+    Index("ix_cases_case_stage", "case_stage"),
+    schema="public"
+)
+
+parties_table = Table("case_parties", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("cnr_number", Text, ForeignKey("public.cases.cnr_number", ondelete="CASCADE"), nullable=False),
+    Column("side", Text, nullable=False),
+    Column("position", Integer),
+    Column("name", Text, nullable=False),
+    Index("ix_case_parties_cnr_number", "cnr_number"),
+    schema="public"
+)
+
+advocates_table = Table("case_advocates", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("cnr_number", Text, ForeignKey("public.cases.cnr_number", ondelete="CASCADE"), nullable=False),
+    Column("side", Text, nullable=False),
+    Column("party_position", Integer),
+    Column("name", Text, nullable=False),
+    Index("ix_case_advocates_cnr_number", "cnr_number"),
+    schema="public"
+)
+
+acts_table = Table("case_acts", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("cnr_number", Text, ForeignKey("public.cases.cnr_number", ondelete="CASCADE"), nullable=False),
+    Column("act", Text),
+    Column("section", Text),
+    Index("ix_case_acts_cnr_number", "cnr_number"),
+    Index("ix_case_acts_act", "act"),
+    schema="public"
+)
+
+hearings_table = Table("case_hearings", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("cnr_number", Text, ForeignKey("public.cases.cnr_number", ondelete="CASCADE"), nullable=False),
+    Column("judge", Text),
+    Column("business_date", Date),
+    Column("hearing_date", Date),
+    Column("purpose", Text),
+    Index("ix_case_hearings_cnr_number_business_date", "cnr_number", "business_date"),
+    Index("ix_case_hearings_hearing_date", "hearing_date"),
+    schema="public"
+)
+
+# Name lookups are case-insensitive: WHERE lower(name) = lower(:name)
+Index("ix_case_parties_name_lower", func.lower(parties_table.c.name))
+Index("ix_case_advocates_name_lower", func.lower(advocates_table.c.name))
+
+CHILD_TABLES = (parties_table, advocates_table, acts_table, hearings_table)
+
+# Labels of the Case Details / Case Status tables -> cases columns
+DETAIL_COLUMNS = {
+    "Case Type": "case_type",
+    "Filing Number": "filing_number",
+    "Registration Number": "registration_number",
+    "CNR Number": "cnr_number",
+}
+DATE_DETAIL_COLUMNS = {
+    "Filing Date": "filing_date",
+    "Registration Date": "registration_date",
+}
+STATUS_COLUMNS = {
+    "Case Stage": "case_stage",
+    "Court Number and Judge": "court_number_and_judge",
+}
+DATE_STATUS_COLUMNS = {
+    "First Hearing Date": "first_hearing_date",
+    "Next Hearing Date": "next_hearing_date",
+}
+
+
+def normalize_record(record, court, cnr_number=None):
+    """
+    Split a CaseRecord into rows for the normalized tables.
+    Returns a dict of table name -> list of rows (the "cases" list has one row).
+    """
+    case = {"court": court}
+    for label, column in DETAIL_COLUMNS.items():
+        case[column] = record.details.get(label)
+    for label, column in DATE_DETAIL_COLUMNS.items():
+        case[column] = parse_court_date(record.details.get(label))
+    for label, column in STATUS_COLUMNS.items():
+        case[column] = record.status.get(label)
+    for label, column in DATE_STATUS_COLUMNS.items():
+        case[column] = parse_court_date(record.status.get(label))
+    # The searched CNR number is the key, the parsed one only when none was given
+    case["cnr_number"] = cnr_number or case["cnr_number"]
+    cnr = case["cnr_number"]
+
+    parties = []
+    advocates = []
+    for side, entries in (("petitioner", record.petitioner_advocates), ("respondent", record.respondent_advocates)):
+        for party in split_party_entries(side, entries):
+            parties.append({"cnr_number": cnr, "side": side, "position": party.position, "name": party.name})
+            for advocate in party.advocates:
+                advocates.append({"cnr_number": cnr, "side": side, "party_position": party.position, "name": advocate})
+
+    acts = [{"cnr_number": cnr, "act": act.act, "section": act.section} for act in record.acts]
+
+    hearings = [{
+        "cnr_number": cnr,
+        "judge": hearing.judge,
+        "business_date": parse_court_date(hearing.business_date),
+        "hearing_date": parse_court_date(hearing.hearing_date),
+        "purpose": hearing.purpose,
+    } for hearing in record.hearings]
+
+    return {
+        "cases": [case],
+        "case_parties": parties,
+        "case_advocates": advocates,
+        "case_acts": acts,
+        "case_hearings": hearings,
+    }
+
+
+class CaseLoader:
+    """
+    Buffers parsed cases and bulk-loads them into the normalized tables
+    """
+
+    def __init__(self, engine=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cases = {}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.timer = None
+        self.schema_checked = False
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    def add(self, record, court, cnr_number=None):
+        """
+        Queue one parsed CaseRecord; flushes when the batch is full or the flush interval has passed
+        """
+        rows = normalize_record(record, court, cnr_number)
+        case = rows["cases"][0]
+        if not case["cnr_number"]:
+            print("Case without a CNR number not stored in the normalized tables")
+            return
+
+        # Hash everything that is stored for the case, so a new hearing or party counts as a change
+        case["content_hash"] = content_hash(
+            {name: [{k: v for k, v in row.items() if k != "content_hash"} for row in table_rows]
+             for name, table_rows in rows.items()},
+            list(rows),
+        )
+        with self.lock:
+            self.cases[case["cnr_number"]] = rows
+            due = len(self.cases) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        elif self.timer is None or not self.timer.is_alive():
+            self.timer = threading.Timer(self.flush_interval, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def pending(self):
+        """
+        Number of cases queued and not yet loaded
+        """
+        with self.lock:
+            return len(self.cases)
+
+    def upsert_cases(self, conn, case_rows):
+        """
+        Upsert the cases rows, skipping those whose content hash is unchanged.
+        Returns {cnr_number: inserted?} for the rows that were written.
+        """
+        stmt = insert(cases_table).values(case_rows)
+        excluded = stmt.excluded
+        updates = {column.name: excluded[column.name] for column in cases_table.columns
+                   if column.name not in ("cnr_number", "updated_at")}
+        updates["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["cnr_number"],
+            set_=updates,
+            where=cases_table.c.content_hash.is_distinct_from(excluded.content_hash),
+        ).returning(cases_table.c.cnr_number, literal_column("(xmax = 0)").label("inserted"))
+        return {cnr: inserted for cnr, inserted in conn.execute(stmt)}
+
+    @timed("db_write")
+    def flush(self):
+        """
+        Load all queued cases in one transaction.
+        Returns the {"inserted", "updated", "unchanged"} counts of this flush.
+        """
+        with self.lock:
+            queued, self.cases = self.cases, {}
+            self.last_flush = time.monotonic()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not queued:
+            return counts
+
+        engine = self.engine or get_engine()
+        try:
+            if not self.schema_checked:
+                metadata.create_all(engine, checkfirst=True)
+                self.schema_checked = True
+
+            with engine.begin() as conn:
+                written = {}
+                queued_rows = list(queued.values())
+                for start in range(0, len(queued_rows), self.batch_size):
+                    batch = queued_rows[start:start + self.batch_size]
+                    written.update(self.upsert_cases(conn, [rows["cases"][0] for rows in batch]))
+
+                # Replace the child rows of every case that was inserted or changed
+                changed = list(written)
+                for table in CHILD_TABLES:
+                    for start in range(0, len(changed), self.batch_size):
+                        conn.execute(delete(table).where(table.c.cnr_number.in_(changed[start:start + self.batch_size])))
+                    child_rows = [row for cnr in changed for row in queued[cnr][table.name]]
+                    for start in range(0, len(child_rows), self.batch_size):
+                        conn.execute(insert(table).values(child_rows[start:start + self.batch_size]))
+
+            counts["inserted"] = sum(1 for inserted in written.values() if inserted)
+            counts["updated"] = len(written) - counts["inserted"]
+            counts["unchanged"] = len(queued) - len(written)
+            for key, value in counts.items():
+                self.stats[key] += value
+            print(f"Normalized case tables: {counts['inserted']} inserted, "
+                  f"{counts['updated']} updated, {counts['unchanged']} unchanged")
+            return counts
+        except Exception as e:
+            print(f"Failed to load {len(queued)} cases into the normalized tables: {e}")
+            traceback.print_exc()
+            with self.lock:
+                queued.update(self.cases)
+                self.cases = queued
+            return counts
+
+
+def get_case_loader():
+    """
+    The process-wide CaseLoader, flushed together with the case_store writers
+    """
+    return register_writer("cases", CaseLoader)
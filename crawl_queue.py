@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Durable, SQLite-backed crawl queue.
+
+Every (court, CNR number) job moves through
+
+    pending -> captcha -> extracted -> pdfs -> persisted
+
+or back to pending after an error, until max_attempts is reached and the
+job is failed. Each state records the last step that completed: captcha
+while the search is being solved, extracted once the case details are
+saved, pdfs once the documents are downloaded and persisted once the
+buffered database rows and Parquet export have been flushed. Attempts and
+the last error are kept per job, so a crashed or interrupted run picks up
+exactly where it stopped and never redoes persisted cases.
+
+    python crawl_queue.py add district cnrs.txt
+    python crawl_queue.py status
+    python crawl_queue.py retry-failed district
+    python worker_pool.py district cnrs.txt --queue crawl_queue.sqlite3
+"""
+import argparse
+import sqlite3
+import time
+
+DEFAULT_QUEUE_PATH = "crawl_queue.sqlite3"
+
+PENDING = "pending"
+CAPTCHA = "captcha"
+EXTRACTED = "extracted"
+PDFS = "pdfs"
+PERSISTED = "persisted"
+FAILED = "failed"
+
+STATES = (PENDING, CAPTCHA, EXTRACTED, PDFS, PERSISTED, FAILED)
+
+# Claimed but not persisted: the worker holding them crashed or was stopped. Cases in the
+# pdfs state are redone too, their rows may have died in the buffer; the manifest skips
+# the documents already on disk and the upserts make the rewrite a no-op.
+IN_PROGRESS_STATES = (CAPTCHA, EXTRACTED, PDFS)
+
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    court TEXT NOT NULL,
+    cnr_number TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    folder TEXT,
+    claimed_by TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (court, cnr_number)
+);
+CREATE INDEX IF NOT EXISTS jobs_court_state ON jobs (court, state);
+"""
+
+
+class CrawlQueue:
+    """
+    One SQLite file shared by every worker process; each process opens its own connection
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        # Autocommit mode, transactions are opened explicitly where several statements must be atomic
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, court, cnr_numbers):
+        """
+        Enqueue CNR numbers; ones already in the queue keep their state. Returns the number added.
+        """
+        now = time.time()
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (court, cnr_number, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            [(court, cnr_number, now, now) for cnr_number in cnr_numbers],
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def requeue_interrupted(self, court):
+        """
+        Put jobs left in progress by a previous run back to pending. Call before starting workers.
+        """
+        placeholders = ", ".join("?" for _ in IN_PROGRESS_STATES)
+        cursor = self.conn.execute(
+            f"UPDATE jobs SET state = ?, claimed_by = NULL, updated_at = ? "
+            f"WHERE court = ? AND state IN ({placeholders})",
+            (PENDING, time.time(), court, *IN_PROGRESS_STATES),
+        )
+        if cursor.rowcount:
+            print(f"Resuming {cursor.rowcount} {court} jobs interrupted by an earlier run")
+        return cursor.rowcount
+
+    def claim(self, court, worker, cnr_number=None):
+        """
+        Atomically take the next pending job (or cnr_number, if it is pending) and move it to
+        the captcha state. Returns the CNR number, or None when there is nothing left to do.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if cnr_number is None:
+                row = self.conn.execute(
+                    "SELECT cnr_number FROM jobs WHERE court = ? AND state = ? ORDER BY attempts, created_at LIMIT 1",
+                    (court, PENDING),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT cnr_number FROM jobs WHERE court = ? AND state = ? AND cnr_number = ?",
+                    (court, PENDING, cnr_number),
+                ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, claimed_by = ?, updated_at = ? "
+                "WHERE court = ? AND cnr_number = ?",
+                (CAPTCHA, worker, time.time(), court, row[0]),
+            )
+            self.conn.execute("COMMIT")
+            return row[0]
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def mark(self, court, cnr_number, state, folder=None, worker=None):
+        """
+        Record that a job reached state
+        """
+        self.conn.execute(
+            "UPDATE jobs SET state = ?, folder = COALESCE(?, folder), claimed_by = COALESCE(?, claimed_by), "
+            "last_error = NULL, updated_at = ? WHERE court = ? AND cnr_number = ?",
+            (state, folder, worker, time.time(), court, cnr_number),
+        )
+
+    def fail(self, court, cnr_number, error):
+        """
+        Record a failed attempt: back to pending for a retry, or failed once max_attempts is reached.
+        Returns the new state.
+        """
+        row = self.conn.execute(
+            "SELECT attempts FROM jobs WHERE court = ? AND cnr_number = ?", (court, cnr_number)
+        ).fetchone()
+        state = FAILED if row and row[0] >= self.max_attempts else PENDING
+        self.conn.execute(
+            "UPDATE jobs SET state = ?, last_error = ?, claimed_by = NULL, updated_at = ? "
+            "WHERE court = ? AND cnr_number = ?",
+            (state, str(error)[:2000], time.time(), court, cnr_number),
+        )
+        return state
+
+    def promote(self, court, worker, from_state=PDFS, to_state=PERSISTED):
+        """
+        Move every job of worker from from_state to to_state, e.g. after a checkpoint flush
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET state = ?, updated_at = ? WHERE court = ? AND claimed_by = ? AND state = ?",
+            (to_state, time.time(), court, worker, from_state),
+        )
+        return cursor.rowcount
+
+    def retry_failed(self, court):
+        """
+        Give failed jobs a fresh set of attempts
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET state = ?, attempts = 0, updated_at = ? WHERE court = ? AND state = ?",
+            (PENDING, time.time(), court, FAILED),
+        )
+        return cursor.rowcount
+
+    def pending(self, court):
+        """
+        CNR numbers waiting to be scraped, in claim order
+        """
+        rows = self.conn.execute(
+            "SELECT cnr_number FROM jobs WHERE court = ? AND state = ? ORDER BY attempts, created_at",
+            (court, PENDING),
+        )
+        return [cnr_number for (cnr_number,) in rows.fetchall()]
+
+    def persisted(self, court, cnr_numbers):
+        """
+        How many of cnr_numbers are persisted
+        """
+        rows = self.conn.execute("SELECT cnr_number FROM jobs WHERE court = ? AND state = ?", (court, PERSISTED))
+        done = {cnr_number for (cnr_number,) in rows.fetchall()}
+        return sum(1 for cnr_number in set(cnr_numbers) if cnr_number in done)
+
+    def counts(self, court=None):
+        """
+        Number of jobs per state, for one court or all of them
+        """
+        if court:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs WHERE court = ? GROUP BY state", (court,))
+        else:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        counts = {state: 0 for state in STATES}
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def failures(self, court, limit=20):
+        return self.conn.execute(
+            "SELECT cnr_number, attempts, last_error FROM jobs WHERE court = ? AND state = ? "
+            "ORDER BY updated_at DESC LIMIT ?",
+            (court, FAILED, limit),
+        ).fetchall()
+
+
+def checkpoint(queue, court, worker):
+    """
+    Flush the buffered database rows and Parquet export of this process, then mark the
+    cases worker has downloaded as persisted. Cases stay in the pdfs state if anything
+    could not be written. Returns the flush_all() counts.
+    """
+    # Imported here so the queue can be inspected without the database and Parquet dependencies
+    from case_store import flush_all, pending_rows
+    from parquet_export import flush_exports, pending_exports
+
+    stats = flush_all()
+    flush_exports()
+    if pending_rows() or pending_exports():
+        print("Some cases could not be written, they stay unpersisted in the crawl queue")
+        return stats
+    promoted = queue.promote(court, worker)
+    if promoted:
+        print(f"Checkpoint: {promoted} cases persisted")
+    return stats
+
+
+def print_status(queue, court=None):
+    counts = queue.counts(court)
+    print("  ".join(f"{state}: {counts[state]}" for state in STATES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and manage the crawl queue")
+    parser.add_argument("command", choices=["add", "status", "failures", "retry-failed"])
+    parser.add_argument("court", nargs="?", choices=["district", "high", "supreme"])
+    parser.add_argument("input", nargs="?", help="File with one CNR number per line ('-' for stdin), for add")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite queue file")
+    args = parser.parse_args()
+
+    queue = CrawlQueue(args.queue)
+    if args.command == "add":
+        if not args.court or not args.input:
+            parser.error("add needs a court and an input file")
+        from unattended import read_cnr_numbers
+        print(f"Added {queue.add(args.court, read_cnr_numbers(args.input))} CNR numbers")
+    elif args.command == "retry-failed":
+        if not args.court:
+            parser.error("retry-failed needs a court")
+        print(f"Requeued {queue.retry_failed(args.court)} failed CNR numbers")
+    elif args.command == "failures":
+        for cnr_number, attempts, last_error in queue.failures(args.court or "district"):
+            print(f"{cnr_number} ({attempts} attempts): {last_error}")
+    print_status(queue, args.court)
@@ -0,0 +1,100 @@
+"""
+Debug-only browser helpers: screenshots, scrolling and element highlighting.
+
+In production (the default) every helper is a no-op, so the hot path makes
+no extra WebDriver round trips and writes nothing to the working directory.
+With ECOURTS_DEBUG=1 the scrapers keep the last few screenshots of the
+current case in memory and only write them out when something fails:
+
+    debug_captures/<CNR number>/<time>-<reason>/01_before_click.png
+                                               ...
+                                               page.html
+
+so parallel workers never overwrite each other's files.
+"""
+import os
+import threading
+import time
+import traceback
+from collections import deque
+
+DEBUG = os.environ.get("ECOURTS_DEBUG") == "1"
+DEBUG_DIR = os.environ.get("ECOURTS_DEBUG_DIR", "debug_captures")
+
+# Screenshots kept per case until a failure writes them out
+RING_SIZE = int(os.environ.get("ECOURTS_DEBUG_RING_SIZE", "8"))
+
+# Scrapers may run several cases on threads, each thread has its own case and ring
+_state = threading.local()
+
+
+def current_case():
+    return getattr(_state, "case", None) or "no_case"
+
+
+def ring():
+    if getattr(_state, "ring", None) is None:
+        _state.ring = deque(maxlen=RING_SIZE)
+    return _state.ring
+
+
+def start_case(cnr_number):
+    """
+    Begin a new case: later screenshots are kept under cnr_number
+    """
+    _state.case = (cnr_number or "").replace("/", "_")
+    ring().clear()
+
+
+def snapshot(driver, name):
+    """
+    Keep a screenshot of the current page in the case's ring buffer (debug mode only)
+    """
+    if not DEBUG:
+        return
+    try:
+        ring().append((name, driver.get_screenshot_as_png()))
+    except Exception as e:
+        print(f"Could not take debug screenshot {name}: {e}")
+
+
+def capture_failure(driver, reason):
+    """
+    Write the case's ring buffer, a final screenshot and the page HTML to a fresh
+    directory under DEBUG_DIR (debug mode only). Returns the directory or None.
+    """
+    if not DEBUG or driver is None:
+        return None
+    snapshot(driver, reason)
+    folder = os.path.join(DEBUG_DIR, current_case(), f"{time.strftime('%Y%m%d-%H%M%S')}-{reason}")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        for index, (name, png) in enumerate(ring(), start=1):
+            with open(os.path.join(folder, f"{index:02d}_{name}.png"), "wb") as f:
+                f.write(png)
+        with open(os.path.join(folder, "page.html"), "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        ring().clear()
+        print(f"Saved debug capture to {folder}")
+        return folder
+    except Exception as e:
+        print(f"Could not save debug capture: {e}")
+        traceback.print_exc()
+        return None
+
+
+def scroll_into_view(driver, element):
+    """
+    Centre element in the viewport so it shows up in screenshots (debug mode only).
+    Clicking does not need it, WebDriver scrolls the element into view itself.
+    """
+    if DEBUG:
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+
+
+def highlight(driver, element, color="red"):
+    """
+    Draw a border around element (debug mode only)
+    """
+    if DEBUG:
+        driver.execute_script(f"arguments[0].style.border='3px solid {color}';", element)
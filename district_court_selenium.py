@@ -1,28 +1,125 @@
 #!/usr/bin/env python3
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+import sys
 import traceback
 import os
-import pandas as pd
-import requests
 from urllib.parse import urljoin
 from selenium.webdriver.common.keys import Keys
+from case_parser import parse_case_html, parse_modal_html
+from browser import create_chrome_driver
+from business_history import crawl_history, fetch_in_browser
+from case_output import save_case
+from locator_cache import find_element
+from debug_tools import capture_failure, highlight, scroll_into_view, snapshot, start_case
+from metrics import timed, timed_case
+from case_manifest import CaseManifest, case_status
+from pdf_downloader import download_documents, order_filename, pdf_filename
+from sites import ECOURTS_HOME_URL, ECOURTS_V6_BASE_URL
+from unattended import main as run_from_command_line
+from waits import (open_cnr_form, wait_for_page_load, wait_for_cnr_form, wait_for_case_results,
+                   wait_for_modal_closed, wait_for_modal_content)
 
-def extract_case_details(driver):
+# The CNR search form is opened straight from this URL; the homepage walk is only
+# the fallback when it does not show the form (or always, with ECOURTS_DEEP_LINK=0)
+CNR_SEARCH_URL = os.environ.get("ECOURTS_CNR_SEARCH_URL", ECOURTS_V6_BASE_URL)
+DEEP_LINK = os.environ.get("ECOURTS_DEEP_LINK", "1") != "0"
+DEEP_LINK_TIMEOUT = 10
+
+@timed("modal")
+def extract_modal_data(driver):
+    """
+    Open the acknowledgement modal, read its body in one call and close it again.
+    Returns the modal's label -> value pairs.
+    """
+    modal_link = driver.find_element(By.XPATH, "//a[contains(@onclick, 'display_case_acknowledgement')]")
+    modal_link.click()
+    
+    wait_for_modal_content(driver)
+    modal_body = driver.find_element(By.ID, "modal_ack_body")
+    modal = parse_modal_html(modal_body.get_attribute("innerHTML"))
+    
+    try:
+        driver.find_element(By.CSS_SELECTOR, ".modal-header .close").click()
+    except Exception:
+        driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
+    wait_for_modal_closed(driver)
+    
+    return modal
+
+@timed("extract")
+def extract_case_record(driver):
+    """
+    Parse the results page into a CaseRecord by fetching the page HTML once.
+    Returns None if the page could not be parsed.
+    """
+    print("Extracting case details (single pass)...")
+    
+    try:
+        # Take a screenshot of results for reference
+        snapshot(driver, "case_details")
+        
+        html = driver.page_source
+        record = parse_case_html(html, base_url=driver.current_url)
+        
+        # The modal content is loaded on demand, so it still needs a click
+        if "display_case_acknowledgement" in html:
+            try:
+                record.modal = extract_modal_data(driver)
+                print("Modal data extracted and added.")
+            except Exception as e:
+                print(f"Error extracting modal data: {e}")
+        else:
+            print("Modal trigger link not found.")
+        
+        return record
+    except Exception as e:
+        print(f"Error in extract_case_record: {e}")
+        traceback.print_exc()
+        return None
+
+def extract_case_details_single_pass(driver, record=None):
+    """
+    Extract case details by fetching the page HTML once and parsing it locally
+    """
+    record = record or extract_case_record(driver)
+    if record is None:
+        return {}
+    
+    case_data = record.to_case_data()
+    for key, value in case_data.items():
+        if key != "pdf_links":
+            print(f"Extracted: {key} = {value}")
+    print(f"Found {len(case_data['pdf_links'])} PDF links")
+    
+    return case_data
+
+def detail_value(key, value_cell):
+    """
+    Value of a Case Details cell, only the number (in its <span>) for the CNR Number
     """
-    Extract case details from the results page
+    if key == "CNR Number":
+        spans = value_cell.find_elements(By.TAG_NAME, "span")
+        if spans and spans[0].text.strip():
+            return spans[0].text.strip()
+    return value_cell.text.strip()
+
+def extract_case_details(driver, single_pass=True):
+    """
+    Extract case details from the results page.
+    With single_pass (the default) the page HTML is fetched once and parsed locally;
+    otherwise every table, row and cell is read through WebDriver.
     """
+    if single_pass:
+        return extract_case_details_single_pass(driver)
+    
     print("Extracting case details...")
     case_data = {}
     
     try:
         # Take a screenshot of results for reference
-        driver.save_screenshot("case_details.png")
-        print("Saved case details screenshot")
+        snapshot(driver, "case_details")
         
         # Extract case details from the page
         # Case Details section
@@ -31,12 +128,13 @@ def extract_case_details(driver):
             if case_details_tables:
                 print(f"Found {len(case_details_tables)} case details tables")
                 
-                # Process first table (Case Details)
+                # Process first table (Case Details), label | value pairs, two per row for
+                # e.g. Filing Number | Filing Date, read like case_parser.ecourts.parse_details
                 rows = case_details_tables[0].find_elements(By.TAG_NAME, "tr")
                 for row in rows:
                     cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 2:
-                        label_cell = cells[0]
+                    for index in range(0, len(cells) - 1, 2):
+                        label_cell = cells[index]
                         
                         # Use JavaScript to get the text content of the direct text nodes in the cell
                         js_script = """
@@ -65,11 +163,11 @@ def extract_case_details(driver):
                                 if label_text:
                                     key = label_text
                             
-                        # Clean up potential extra whitespace/newlines in the key
-                        key = ' '.join(key.split())
+                        # Clean up potential extra whitespace/newlines and a trailing colon in the key
+                        key = ' '.join(key.split()).rstrip(":").strip()
 
-                        if key and len(cells) > 1:
-                            value = cells[1].text.strip()
+                        if key:
+                            value = detail_value(key, cells[index + 1])
                             case_data[key] = value
                             print(f"Extracted: {key} = {value}")
         except Exception as e:
@@ -225,6 +323,7 @@ def extract_case_details(driver):
                     close_button = driver.find_element(By.CSS_SELECTOR, ".modal-header .close") # Common class for modal close button
                     print("Found modal close button. Clicking...")
                     close_button.click()
+                    wait_for_modal_closed(driver)
                     print("Modal closed.")
                 except Exception as close_e:
                     print(f"Could not find a common modal close button: {close_e}. Trying Escape key...")
@@ -232,8 +331,8 @@ def extract_case_details(driver):
                     from selenium.webdriver.common.keys import Keys
                     driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
                     print("Sent Escape key.")
-                    # Give a moment for modal to close
-                    time.sleep(1)
+                    # Wait for the modal to close
+                    wait_for_modal_closed(driver)
 
             else:
                 print("Modal trigger link not found.")
@@ -263,495 +362,392 @@ def extract_case_details(driver):
         traceback.print_exc()
         return {}
 
-def extract_order_pdfs(driver, folder_path):
+def extract_order_pdfs(driver, folder_path, manifest=None):
     """
-    Extract and download PDFs from the order table
+    Extract and download PDFs from the order table.
+    Orders already recorded in the case manifest are skipped.
     """
     try:
         print("Looking for order table...")
-        # Find the order table - it has class "order_table table"
-        order_table = driver.find_element(By.CSS_SELECTOR, "table.order_table.table")
-        
-        if order_table:
-            print("Found order table")
-            # Find all rows in tbody
-            rows = order_table.find_elements(By.TAG_NAME, "tr")
-            
-            for row_index, row in enumerate(rows):
-                try:
-                    # Find cells
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 3:  # We expect at least 3 columns
-                        # The third column contains the PDF link
-                        pdf_cell = cells[2]
-                        pdf_link = pdf_cell.find_element(By.TAG_NAME, "a")
-                        
-                        if pdf_link:
-                            # Get the onclick attribute
-                            onclick_attr = pdf_link.get_attribute("onclick")
-                            if onclick_attr and "displayPdf" in onclick_attr:
-                                print(f"Found PDF link in row {row_index + 1}")
-                                
-                                # Extract the URL parameters from onclick attribute
-                                params_start = onclick_attr.find("('") + 2
-                                params_end = onclick_attr.find("')")
-                                if params_start > 1 and params_end > params_start:
-                                    params = onclick_attr[params_start:params_end]
-                                    
-                                    # Construct the PDF URL
-                                    base_url = "https://services.ecourts.gov.in/ecourtindia_v6/"
-                                    pdf_url = f"{base_url}{params}"
-                                    
-                                    try:
-                                        # Get cookies from the driver
-                                        cookies = driver.get_cookies()
-                                        cookies_dict = {cookie['name']: cookie['value'] for cookie in cookies}
-                                        
-                                        # Make request with cookies
-                                        print(f"Downloading PDF from {pdf_url}")
-                                        response = requests.get(pdf_url, cookies=cookies_dict, stream=True)
-                                        
-                                        if response.status_code == 200:
-                                            # Create a filename using the date from the row
-                                            date_cell = cells[1]
-                                            date_text = date_cell.text.strip().replace("/", "-")
-                                            filename = f"order_{date_text}.pdf"
-                                            file_path = os.path.join(folder_path, filename)
-                                            
-                                            # Save the PDF
-                                            with open(file_path, 'wb') as pdf_file:
-                                                for chunk in response.iter_content(chunk_size=1024):
-                                                    if chunk:
-                                                        pdf_file.write(chunk)
-                                            
-                                            print(f"Successfully downloaded PDF to {file_path}")
-                                        else:
-                                            print(f"Failed to download PDF. Status code: {response.status_code}")
-                                            
-                                    except Exception as download_e:
-                                        print(f"Error downloading PDF: {download_e}")
-                                        traceback.print_exc()
-                                        
-                except Exception as row_e:
-                    print(f"Error processing row {row_index + 1}: {row_e}")
-                    continue
-            
+        # Read the order table from one page_source fetch instead of per-row lookups
+        record = parse_case_html(driver.page_source, sections=(), orders_base_url=ECOURTS_V6_BASE_URL)
+        if not record.orders:
+            print("No order PDFs found")
+            return 0
+
+        print(f"Found {len(record.orders)} order PDFs")
+        jobs = [(order.url, os.path.join(folder_path, order_filename(order.date))) for order in record.orders]
+        return download_documents(driver, jobs, manifest=manifest)
+
     except Exception as e:
         print(f"Error extracting order PDFs: {e}")
         traceback.print_exc()
+        return 0
+
+def download_pdfs(driver, pdf_links, folder_path, manifest=None):
+    """
+    Download PDF files from the provided links.
+    Files already recorded in the case manifest are skipped.
+    """
+    print(f"Downloading {len(pdf_links)} PDF files...")
+
+    # Resolve relative links against the results page once, then fetch them all
+    # concurrently over one session carrying the browser cookies
+    current_url = driver.current_url
+    jobs = []
+    for i, pdf_url in enumerate(pdf_links):
+        if not pdf_url.startswith(('http://', 'https://')):
+            pdf_url = urljoin(current_url, pdf_url)
+        jobs.append((pdf_url, os.path.join(folder_path, pdf_filename(pdf_url, i))))
+
+    try:
+        downloaded = download_documents(driver, jobs, manifest=manifest)
+    except Exception as e:
+        print(f"Error downloading PDFs: {e}")
+        traceback.print_exc()
+        downloaded = 0
+
+    print(f"Downloaded {downloaded}/{len(pdf_links)} PDF files")
+    return downloaded
+
+@timed("business_history")
+def extract_business_details(driver, folder_path, record=None):
+    """
+    Save the business details of every hearing in the case history that is not saved yet.
+    The viewBusiness requests are sent from the page itself, no modal is opened.
+    Returns the number of business dates saved.
+    """
+    try:
+        print("\nLooking for case history business links...")
+        if record is None:
+            record = parse_case_html(driver.page_source, sections=("history",))
+        hearings = [hearing for hearing in record.hearings if hearing.business_params]
+        if not hearings:
+            print("No business history links found")
+            return 0
+        
+        print(f"Found {len(hearings)} hearings with business details")
+        return crawl_history(folder_path, hearings, lambda forms: fetch_in_browser(driver, forms))
+    
+    except Exception as e:
+        print(f"Error in extract_business_details: {e}")
+        traceback.print_exc()
+        return 0
+
+def create_driver(headless=False, download_dir=None, lean=None):
+    """
+    Create a Chrome driver with the scraper's standard options (lean profile: see browser.py)
+    """
+    return create_chrome_driver(headless=headless, download_dir=download_dir, lean=lean)
+
+# Ways to find the District Court Services button, tried in order (see locator_cache)
+SERVICES_BUTTON_LOCATORS = [
+    ("href_and_title", By.CSS_SELECTOR, 'a[href="https://services.ecourts.gov.in"][title="District Court Services"]'),
+    ("href", By.CSS_SELECTOR, 'a[href="https://services.ecourts.gov.in"]'),
+    ("title", By.CSS_SELECTOR, 'a[title="District Court Services"]'),
+    ("link_text", By.LINK_TEXT, "District Court Services"),
+    ("partial_link_text", By.PARTIAL_LINK_TEXT, "District Court"),
+    ("xpath_text", By.XPATH, "//a[contains(text(), 'District Court Services')]"),
+    ("class_and_tabindex", By.CSS_SELECTOR, "a.btn.btn-default[tabindex='0']"),
+]
+
+@timed("button_search")
+def find_services_button(driver):
+    """
+    Find the District Court Services button on the eCourts homepage
+    """
+    print("Looking for District Court Services button...")
+    return find_element(driver, "district_home:services_button", SERVICES_BUTTON_LOCATORS)
 
-def create_case_folder(cnr_number, case_data):
+@timed("homepage")
+def open_cnr_search_page(driver, wait):
     """
-    Create a folder named after the CNR number and save case data to Excel
+    Open the CNR search form, directly from CNR_SEARCH_URL unless deep links are off.
+    Falls back to walking from the eCourts homepage when the form does not show up.
+    Returns True once the form was reached (or the District Court Services button was clicked).
     """
-    print(f"Creating folder for CNR: {cnr_number}")
+    if DEEP_LINK:
+        print(f"Opening CNR search form: {CNR_SEARCH_URL}")
+        if open_cnr_form(driver, CNR_SEARCH_URL, timeout=DEEP_LINK_TIMEOUT):
+            return True
+        print("CNR search form did not load directly, walking from the homepage")
     
-    # Create folder if it doesn't exist
-    folder_name = cnr_number.replace("/", "_").replace("\\", "_").strip()
-    if not folder_name:
-        folder_name = "unknown_cnr"
+    return walk_from_homepage(driver)
+
+def walk_from_homepage(driver):
+    """
+    Navigate from the eCourts homepage to the CNR search form.
+    Returns True if the District Court Services button was found and clicked.
+    """
+    # Navigate to the eCourts homepage
+    print("Navigating to eCourts homepage...")
+    driver.get(ECOURTS_HOME_URL)
     
-    os.makedirs(folder_name, exist_ok=True)
-    print(f"Created folder: {folder_name}")
+    # Wait for the page to load
+    wait_for_page_load(driver)
     
-    # Create Excel file with case data
-    if case_data:
-        try:
-            # Convert dictionary to DataFrame
-            # Remove any PDF links first as they won't display well in Excel
-            pdf_links = case_data.pop("pdf_links", [])
-            
-            # Create DataFrame from remaining data
-            df = pd.DataFrame([case_data])
-            
-            # Save to Excel
-            excel_path = os.path.join(folder_name, f"{folder_name}_case_details.xlsx")
-            df.to_excel(excel_path, index=False)
-            print(f"Saved case details to Excel: {excel_path}")
-            
-            # Return the folder path for PDF downloads
-            return folder_name
-        except Exception as e:
-            print(f"Error saving Excel file: {e}")
-            traceback.print_exc()
+    # Print page title for confirmation
+    print(f"Page title: {driver.title}")
+    
+    button = find_services_button(driver)
+    if not button:
+        print("Could not find the District Court Services button with any strategy")
+        
+        # Save a screenshot and the page source (debug mode)
+        capture_failure(driver, "button_not_found")
+        return False
+    
+    # Take a screenshot before clicking
+    snapshot(driver, "before_click")
+    
+    # Scroll to the button
+    scroll_into_view(driver, button)
+    
+    # Highlight the button for visibility
+    highlight(driver, button, "red")
     
-    return folder_name
+    # Click the button
+    print("Clicking button...")
+    button.click()
+    
+    # Wait for navigation to the CNR search form
+    if not wait_for_cnr_form(driver):
+        print("CNR search form did not appear after clicking")
+    
+    # Take a screenshot after clicking
+    snapshot(driver, "after_click")
+    
+    # Print the current URL
+    print(f"Current URL after click: {driver.current_url}")
+    
+    print("Successfully clicked on District Court Services button!")
+    return True
 
-def download_pdfs(driver, pdf_links, folder_path):
+@timed("return_to_form")
+def return_to_search_form(driver, wait, search_url):
     """
-    Download PDF files from the provided links
+    Reload the CNR search form in the current browser session.
+    Falls back to the full homepage walk if the form does not come back.
     """
-    print(f"Downloading {len(pdf_links)} PDF files...")
+    print(f"Returning to CNR search form: {search_url}")
+    if open_cnr_form(driver, search_url):
+        return True
+    print("CNR search form did not load directly")
     
-    downloaded = 0
-    for i, pdf_url in enumerate(pdf_links):
+    return walk_from_homepage(driver)
+
+# Ways to find the search form fields, tried in order (see locator_cache)
+CNR_INPUT_LOCATORS = [
+    ("id", By.ID, "cino"),
+    ("name", By.NAME, "cino"),
+    ("placeholder", By.CSS_SELECTOR, "input[placeholder='Enter 16 digit CNR number']"),
+]
+
+CAPTCHA_INPUT_LOCATORS = [
+    ("id", By.ID, "fcaptcha_code"),
+    ("name", By.NAME, "fcaptcha_code"),
+    ("class", By.CSS_SELECTOR, "input.form-control.w-125"),
+    ("placeholder", By.CSS_SELECTOR, "input[placeholder='Enter Captcha']"),
+    ("type_and_maxlength", By.XPATH, "//input[@type='text' and @maxlength='6']"),
+]
+
+SEARCH_BUTTON_LOCATORS = [
+    ("id", By.ID, "searchbtn"),
+    ("type_and_onclick", By.CSS_SELECTOR, "button[type='button'][onclick='funViewCinoHistory();']"),
+    ("text", By.XPATH, "//button[contains(text(), 'Search')]"),
+    ("class", By.CSS_SELECTOR, "button.btn.btn-primary"),
+]
+
+def find_cnr_input(driver):
+    """
+    Find the CNR number input field on the search form
+    """
+    print("Looking for CNR number input field...")
+    cnr_input = find_element(driver, "district_search:cnr_input", CNR_INPUT_LOCATORS)
+    if cnr_input is None:
+        print("Could not find CNR input with standard selectors")
+    return cnr_input
+
+def find_captcha_input(driver):
+    """
+    Find the CAPTCHA input field on the search form
+    """
+    print("Looking for CAPTCHA input field...")
+    return find_element(driver, "district_search:captcha_input", CAPTCHA_INPUT_LOCATORS)
+
+def find_search_button(driver):
+    """
+    Find the search button on the CNR search form
+    """
+    print("Looking for search button...")
+    return find_element(driver, "district_search:search_button", SEARCH_BUTTON_LOCATORS)
+
+def prompt_captcha(driver):
+    """
+    Ask the user to read the CAPTCHA from the browser window.
+    Without a terminal there is nobody to ask, and None is returned.
+    """
+    if not sys.stdin.isatty():
+        print("No terminal to enter the CAPTCHA on, use the CAPTCHA service (see unattended.py)")
+        return None
+    print("\n*** CAPTCHA ENTRY REQUIRED ***")
+    print("Please look at the browser window and enter the CAPTCHA code shown.")
+    return input("Enter CAPTCHA value: ")
+
+def service_captcha_solver(driver):
+    """
+    Solve the CAPTCHA with the CAPTCHA service of the High Court scraper (CAPTCHA_BACKEND),
+    for runs without a terminal to prompt on
+    """
+    import high_court_selenium
+    return high_court_selenium.solve_captcha(driver, WebDriverWait(driver, 20))
+
+def default_captcha_solver(driver):
+    """
+    Prompt for the CAPTCHA on a terminal, otherwise (e.g. when the CNR numbers were read
+    from stdin) hand it to the CAPTCHA service
+    """
+    if sys.stdin.isatty():
         try:
-            print(f"Downloading PDF {i+1}/{len(pdf_links)}: {pdf_url}")
-            
-            # Get cookies from the driver
-            cookies = driver.get_cookies()
-            cookies_dict = {cookie['name']: cookie['value'] for cookie in cookies}
-            
-            # Ensure the URL is absolute
-            if not pdf_url.startswith(('http://', 'https://')):
-                pdf_url = urljoin(driver.current_url, pdf_url)
-            
-            # Make request with cookies and download the file
-            response = requests.get(pdf_url, cookies=cookies_dict, stream=True)
-            
-            if response.status_code == 200:
-                # Extract filename from URL or use a default name
-                filename = pdf_url.split('/')[-1]
-                if not filename or not filename.endswith('.pdf'):
-                    filename = f"document_{i+1}.pdf"
-                
-                # Save PDF to the folder
-                file_path = os.path.join(folder_path, filename)
-                with open(file_path, 'wb') as file:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        if chunk:
-                            file.write(chunk)
-                
-                print(f"Downloaded PDF to {file_path}")
-                downloaded += 1
-            else:
-                print(f"Failed to download PDF. Status code: {response.status_code}")
-        
-        except Exception as e:
-            print(f"Error downloading PDF: {e}")
-            traceback.print_exc()
+            return prompt_captcha(driver)
+        except EOFError:
+            print("Terminal input closed, using the CAPTCHA service")
+    return service_captcha_solver(driver)
+
+def save_case_results(driver, cnr_number, on_stage=None):
+    """
+    Extract case details from the results page and save everything to the CNR folder.
+    on_stage(stage, folder_path) is called once the case details are saved ("extracted").
+    Returns the folder path, or None if no case details were extracted.
+    """
+    # Now extract the case details
+    record = extract_case_record(driver)
+    case_data = extract_case_details_single_pass(driver, record)
     
-    print(f"Downloaded {downloaded}/{len(pdf_links)} PDF files")
-    return downloaded
+    if not case_data:
+        print("No case details were extracted. Please check if the search was successful.")
+        return None
+    
+    print("Successfully extracted case details")
+    pdf_links = case_data.get("pdf_links", [])
+    
+    # Create the folder, export the case and queue it for the normalized case tables
+    folder_path = save_case("district", cnr_number, case_data, record)
+    if on_stage:
+        on_stage("extracted", folder_path)
+    
+    # Compare with what the previous scrape left in the folder
+    manifest = CaseManifest(folder_path)
+    status = case_status(case_data)
+    if not manifest.status_changed(status):
+        print("Case status unchanged since the last scrape")
+    
+    # Download PDF files if available
+    if pdf_links:
+        download_pdfs(driver, pdf_links, folder_path, manifest=manifest)
+    else:
+        print("No PDF links found to download")
+    
+    # Extract and download order PDFs
+    print("\nAttempting to download order PDFs...")
+    extract_order_pdfs(driver, folder_path, manifest=manifest)
+    
+    # Extract business details, dates saved by an earlier scrape are skipped
+    print("\nAttempting to extract business details...")
+    extract_business_details(driver, folder_path, record)
+    
+    manifest.update_status(status)
+    manifest.save()
+    
+    print(f"All data has been saved to folder: {folder_path}")
+    return folder_path
 
-def extract_business_details(driver, folder_path):
+@timed_case("district")
+def scrape_case(driver, wait, cnr_number, captcha_solver=default_captcha_solver, on_stage=None):
     """
-    Extract business details from the case history popup/page
+    Search for one CNR number on the already loaded search form and save its results.
+    on_stage is passed on to save_case_results. Returns the case folder path, or None if the case could not be scraped.
     """
-    try:
-        print("\nLooking for case history business link...")
-        # Find all links with viewBusiness in onclick
-        business_links = driver.find_elements(By.CSS_SELECTOR, "a[onclick*='viewBusiness']")
-        
-        if business_links:
-            # Get the last link as it contains the most recent history
-            last_link = business_links[-1]
-            print("Found business history link")
-            
-            # Extract date and other parameters from onclick
-            onclick = last_link.get_attribute("onclick")
-            if onclick:
-                # Get the parameters from viewBusiness function call
-                params_start = onclick.find("(") + 1
-                params_end = onclick.find(")")
-                if params_start > 0 and params_end > params_start:
-                    params = onclick[params_start:params_end].replace("'", "").split(",")
-                    date = params[6] if len(params) > 6 else "unknown_date"
-                    print(f"Business details date: {date}")
-                    
-                    # Store main window handle
-                    main_window = driver.current_window_handle
-                    
-                    # Scroll to and click the link
-                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", last_link)
-                    time.sleep(1)
-                    last_link.click()
-                    time.sleep(2)
-                    
-                    try:
-                        # Wait for the business details div to load
-                        wait = WebDriverWait(driver, 10)
-                        business_div = wait.until(EC.presence_of_element_located((By.ID, "caseBusinessDiv_cnr")))
-                        
-                        if business_div:
-                            print("Found business details div")
-                            
-                            # Create history folder
-                            history_folder = os.path.join(folder_path, "history")
-                            os.makedirs(history_folder, exist_ok=True)
-                            
-                            # Extract all text content
-                            content = []
-                            
-                            # Add Daily Status header
-                            daily_status = business_div.find_element(By.XPATH, ".//span[contains(., 'Daily Status')]")
-                            if daily_status:
-                                content.append("Daily Status")
-                                content.append("-" * 50)  # Add separator line
-                            
-                            # Extract court details
-                            court_details = business_div.find_elements(By.TAG_NAME, "center")
-                            for detail in court_details:
-                                text = detail.text.strip()
-                                if text:
-                                    content.append(text)
-                            
-                            # Extract table data
-                            table = business_div.find_element(By.CSS_SELECTOR, "table[width='87%']")
-                            if table:
-                                rows = table.find_elements(By.TAG_NAME, "tr")
-                                for row in rows:
-                                    cells = row.find_elements(By.TAG_NAME, "td")
-                                    if len(cells) >= 3:  # We expect 3 columns
-                                        # Get the label (first column)
-                                        label = cells[0].text.strip()
-                                        if label:
-                                            # Get the value (third column)
-                                            value = cells[2].text.strip()
-                                            if value:
-                                                content.append(f"{label}: {value}")
-                            
-                            # Save to file
-                            filename = f"business_details_{date.replace('/', '-')}.txt"
-                            file_path = os.path.join(history_folder, filename)
-                            
-                            with open(file_path, 'w', encoding='utf-8') as f:
-                                f.write("\n".join(content))
-                            
-                            print(f"✅ Saved business details to: {file_path}")
-                            
-                            # Try multiple methods to close the modal/popup
-                            print("Attempting to close modal...")
-                            close_success = False
-                            
-                            # Method 1: Try clicking close button with wait
-                            try:
-                                wait = WebDriverWait(driver, 5)
-                                close_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 
-                                    "button.btn-close[data-bs-dismiss='modal'], .modal-header .close")))
-                                close_button.click()
-                                time.sleep(1)
-                                close_success = True
-                                print("Closed modal using close button")
-                            except Exception as e:
-                                print(f"Method 1 failed: {e}")
-                            
-                            # Method 2: Try JavaScript click on close button
-                            if not close_success:
-                                try:
-                                    driver.execute_script("""
-                                        var closeButtons = document.querySelectorAll('button.btn-close[data-bs-dismiss="modal"], .modal-header .close');
-                                        if (closeButtons.length > 0) closeButtons[0].click();
-                                    """)
-                                    time.sleep(1)
-                                    close_success = True
-                                    print("Closed modal using JavaScript click")
-                                except Exception as e:
-                                    print(f"Method 2 failed: {e}")
-                            
-                            # Method 3: Try to hide modal using JavaScript
-                            if not close_success:
-                                try:
-                                    driver.execute_script("""
-                                        var modals = document.querySelectorAll('.modal.show');
-                                        modals.forEach(function(modal) {
-                                            modal.style.display = 'none';
-                                            modal.classList.remove('show');
-                                        });
-                                        var backdrops = document.querySelectorAll('.modal-backdrop');
-                                        backdrops.forEach(function(backdrop) {
-                                            backdrop.remove();
-                                        });
-                                        document.body.classList.remove('modal-open');
-                                        document.body.style.overflow = '';
-                                        document.body.style.paddingRight = '';
-                                    """)
-                                    time.sleep(1)
-                                    close_success = True
-                                    print("Closed modal using JavaScript hide")
-                                except Exception as e:
-                                    print(f"Method 3 failed: {e}")
-                            
-                            # Method 4: Try Escape key as last resort
-                            if not close_success:
-                                try:
-                                    actions = webdriver.ActionChains(driver)
-                                    actions.send_keys(Keys.ESCAPE).perform()
-                                    time.sleep(1)
-                                    print("Sent Escape key to close modal")
-                                except Exception as e:
-                                    print(f"Method 4 failed: {e}")
-                            
-                            return True
-                            
-                    except Exception as e:
-                        print(f"Error extracting business details: {e}")
-                        traceback.print_exc()
-                        
-                        # Ensure we're back on main window
-                        if len(driver.window_handles) > 1:
-                            driver.close()
-                            driver.switch_to.window(main_window)
-        else:
-            print("No business history links found")
-            
-    except Exception as e:
-        print(f"Error in extract_business_details: {e}")
-        traceback.print_exc()
+    print(f"\n=== Processing CNR: {cnr_number} ===")
+    start_case(cnr_number)
+    
+    cnr_input = find_cnr_input(driver)
+    if not cnr_input:
+        print("Could not find CNR input field")
+        capture_failure(driver, "cnr_input_not_found")
+        return None
+    
+    # Input the CNR number
+    cnr_input.clear()
+    cnr_input.send_keys(cnr_number)
+    print(f"Entered CNR number: {cnr_number}")
+    
+    captcha_input = find_captcha_input(driver)
+    if not captcha_input:
+        print("Could not find CAPTCHA input field with any strategy")
+        return None
+    
+    # Take a screenshot of the captcha area
+    snapshot(driver, "captcha_highlighted")
+    
+    captcha_value = captcha_solver(driver)
+    if not captcha_value:
+        print("No CAPTCHA value available, skipping case")
+        return None
+    
+    # Input the CAPTCHA value
+    captcha_input.clear()
+    captcha_input.send_keys(captcha_value)
+    print("Entered CAPTCHA value")
+    
+    search_button = find_search_button(driver)
+    if not search_button:
+        print("Could not find search button with any strategy")
+        capture_failure(driver, "search_button_not_found")
+        return None
+    
+    # Click the search button
+    print("Clicking search button...")
+    search_button.click()
+    
+    # Wait for search results
+    print("Waiting for search results...")
+    wait_for_case_results(driver)
     
-    return False
+    return save_case_results(driver, cnr_number, on_stage=on_stage)
 
 def main():
     """
-    Use Selenium to navigate to the eCourts website, click on the High Courts Services button,
+    Use Selenium to navigate to the eCourts website, click on the District Court Services button,
     and then allow manual entry of CNR number and CAPTCHA before clicking search.
+    Returns the case folder path, or None if no case was saved.
     """
     print("Starting eCourts navigation with Selenium...")
     
     # Create a browser instance
     driver = None
+    folder = None
     try:
-        # Set up Chrome options
-        print("Setting up Chrome options...")
-        options = Options()
-        options.add_argument("--start-maximized")  # Start maximized
-        options.add_argument("--disable-notifications")  # Disable notifications
-        
-        # Initialize the Chrome driver
-        print("Initializing Chrome driver...")
-        driver = webdriver.Chrome(options=options)
+        driver = create_driver()
         
         # Create a wait object for waiting for elements
         wait = WebDriverWait(driver, 20)  # Wait up to 20 seconds
         
-        # Navigate to the eCourts homepage
-        print("Navigating to eCourts homepage...")
-        driver.get("https://ecourts.gov.in/ecourts_home/")
-        
-        # Wait for the page to load
-        time.sleep(3)
-        
-        # Print page title for confirmation
-        print(f"Page title: {driver.title}")
-        
-        # Try different strategies to find the District Court Services button
-        print("Looking for District Court Services button...")
-        button = None
-        
-        # Strategy 1: Find by href and title
-        try:
-            print("Strategy 1: Find by href and title...")
-            button = driver.find_element(By.CSS_SELECTOR, 'a[href="https://services.ecourts.gov.in"][title="District Court Services"]')
-            print("Found button by href and title")
-        except Exception as e:
-            print(f"Strategy 1 failed: {e}")
-        
-        # Strategy 2: Find by href only
-        if button is None:
-            try:
-                print("Strategy 2: Find by href only...")
-                button = driver.find_element(By.CSS_SELECTOR, 'a[href="https://services.ecourts.gov.in"]')
-                print("Found button by href")
-            except Exception as e:
-                print(f"Strategy 2 failed: {e}")
-        
-        # Strategy 3: Find by title only
-        if button is None:
-            try:
-                print("Strategy 3: Find by title only...")
-                button = driver.find_element(By.CSS_SELECTOR, 'a[title="District Court Services"]')
-                print("Found button by title")
-            except Exception as e:
-                print(f"Strategy 3 failed: {e}")
-        
-        # Strategy 4: Find by link text
-        if button is None:
-            try:
-                print("Strategy 4: Find by link text...")
-                button = driver.find_element(By.LINK_TEXT, "District Court Services")
-                print("Found button by link text")
-            except Exception as e:
-                print(f"Strategy 4 failed: {e}")
-                
-        # Strategy 5: Find by partial link text
-        if button is None:
-            try:
-                print("Strategy 5: Find by partial link text...")
-                button = driver.find_element(By.PARTIAL_LINK_TEXT, "District Court")
-                print("Found button by partial link text")
-            except Exception as e:
-                print(f"Strategy 5 failed: {e}")
-                
-        # Strategy 6: Find by XPath containing text
-        if button is None:
-            try:
-                print("Strategy 6: Find by XPath...")
-                button = driver.find_element(By.XPATH, "//a[contains(text(), 'District Court Services')]")
-                print("Found button by XPath")
-            except Exception as e:
-                print(f"Strategy 6 failed: {e}")
-                
-        # Strategy 7: Find by class and tabindex (from the screenshot)
-        if button is None:
-            try:
-                print("Strategy 7: Find by class and tabindex...")
-                button = driver.find_element(By.CSS_SELECTOR, "a.btn.btn-default[tabindex='0']")
-                print("Found button by class and tabindex")
-            except Exception as e:
-                print(f"Strategy 7 failed: {e}")
-                
-        # If button is found, take a screenshot, scroll to it, and click it
-        if button:
-            # Take a screenshot before clicking
-            print("Taking screenshot before clicking...")
-            driver.save_screenshot("before_click.png")
-            
-            # Scroll to the button
-            print("Scrolling to button...")
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", button)
-            time.sleep(2)
-            
-            # Highlight the button for visibility
-            print("Highlighting button...")
-            driver.execute_script("arguments[0].style.border='3px solid red';", button)
-            time.sleep(1)
-            
-            # Click the button
-            print("Clicking button...")
-            button.click()
-            
-            # Wait for navigation
-            time.sleep(5)
-            
-            # Take a screenshot after clicking
-            print("Taking screenshot after clicking...")
-            driver.save_screenshot("after_click.png")
-            
-            # Print the current URL
-            print(f"Current URL after click: {driver.current_url}")
-            
-            print("Successfully clicked on District Court Services button!")
-            
+        if open_cnr_search_page(driver, wait):
             # Now find and interact with the CNR number input field
             try:
-                print("Looking for CNR number input field...")
-                cnr_input = None
-                
-                # Try multiple strategies to find the CNR input
-                try:
-                    cnr_input = driver.find_element(By.ID, "cino")
-                    print("Found CNR input by ID")
-                except Exception:
-                    try:
-                        cnr_input = driver.find_element(By.NAME, "cino")
-                        print("Found CNR input by name")
-                    except Exception:
-                        try:
-                            cnr_input = driver.find_element(By.CSS_SELECTOR, "input[placeholder='Enter 16 digit CNR number']")
-                            print("Found CNR input by placeholder")
-                        except Exception:
-                            print("Could not find CNR input with standard selectors")
+                cnr_input = find_cnr_input(driver)
                 
                 if cnr_input:
                     # Focus on the CNR input field
-                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", cnr_input)
-                    time.sleep(1)
+                    scroll_into_view(driver, cnr_input)
                     
                     # Highlight the CNR input field
-                    driver.execute_script("arguments[0].style.border='3px solid blue';", cnr_input)
+                    highlight(driver, cnr_input, "blue")
                     
                     # Ask for CNR number
                     cnr_number = input("Please enter the 16-digit CNR number: ")
+                    start_case(cnr_number)
                     
                     # Input the CNR number
                     cnr_input.clear()
@@ -759,120 +755,41 @@ def main():
                     print(f"Entered CNR number: {cnr_number}")
                     
                     # Take a screenshot of the whole page to see CAPTCHA
-                    print("Taking screenshot to show CAPTCHA...")
-                    driver.save_screenshot("captcha_page.png")
-                    print("Screenshot saved as 'captcha_page.png' - check this file to see the CAPTCHA")
+                    snapshot(driver, "captcha_page")
                     
-                    # Now find the CAPTCHA input field - use multiple strategies
-                    print("Looking for CAPTCHA input field...")
-                    captcha_input = None
-                    
-                    # Strategy 1: By ID
-                    try:
-                        captcha_input = driver.find_element(By.ID, "fcaptcha_code")
-                        print("Found CAPTCHA input by ID")
-                    except Exception as e:
-                        print(f"Could not find CAPTCHA by ID: {e}")
-                        
-                    # Strategy 2: By name
-                    if captcha_input is None:
-                        try:
-                            captcha_input = driver.find_element(By.NAME, "fcaptcha_code")
-                            print("Found CAPTCHA input by name")
-                        except Exception as e:
-                            print(f"Could not find CAPTCHA by name: {e}")
-                            
-                    # Strategy 3: By class
-                    if captcha_input is None:
-                        try:
-                            captcha_input = driver.find_element(By.CSS_SELECTOR, "input.form-control.w-125")
-                            print("Found CAPTCHA input by class")
-                        except Exception as e:
-                            print(f"Could not find CAPTCHA by class: {e}")
-                            
-                    # Strategy 4: By placeholder
-                    if captcha_input is None:
-                        try:
-                            captcha_input = driver.find_element(By.CSS_SELECTOR, "input[placeholder='Enter Captcha']")
-                            print("Found CAPTCHA input by placeholder")
-                        except Exception as e:
-                            print(f"Could not find CAPTCHA by placeholder: {e}")
-                            
-                    # Strategy 5: By XPath
-                    if captcha_input is None:
-                        try:
-                            captcha_input = driver.find_element(By.XPATH, "//input[@type='text' and @maxlength='6']")
-                            print("Found CAPTCHA input by xpath type and maxlength")
-                        except Exception as e:
-                            print(f"Could not find CAPTCHA by xpath: {e}")
+                    captcha_input = find_captcha_input(driver)
                             
                     # If CAPTCHA input is found, interact with it
                     if captcha_input:
                         # Focus on the CAPTCHA input field
-                        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", captcha_input)
-                        time.sleep(1)
+                        scroll_into_view(driver, captcha_input)
                         
                         # Highlight the CAPTCHA input field
-                        driver.execute_script("arguments[0].style.border='3px solid green';", captcha_input)
+                        highlight(driver, captcha_input, "green")
                         
                         # Take a screenshot of the captcha area
-                        driver.save_screenshot("captcha_highlighted.png")
+                        snapshot(driver, "captcha_highlighted")
                         
-                        # Ask user to enter the CAPTCHA
-                        print("\n*** CAPTCHA ENTRY REQUIRED ***")
-                        print("A screenshot has been saved as 'captcha_highlighted.png' for reference.")
-                        print("Please look at the browser window and enter the CAPTCHA code shown.")
-                        captcha_value = input("Enter CAPTCHA value: ")
+                        # Ask user to enter the CAPTCHA, or the CAPTCHA service without a terminal
+                        captcha_value = default_captcha_solver(driver)
+                        if not captcha_value:
+                            print("No CAPTCHA value. Exiting...")
+                            return
                         
                         # Input the CAPTCHA value
                         captcha_input.clear()
                         captcha_input.send_keys(captcha_value)
                         print("Entered CAPTCHA value")
                         
-                        # Now find and click the search button using multiple strategies
-                        print("Looking for search button...")
-                        search_button = None
-                        
-                        # Strategy 1: By ID
-                        try:
-                            search_button = driver.find_element(By.ID, "searchbtn")
-                            print("Found search button by ID")
-                        except Exception:
-                            print("Could not find search button by ID")
-                            
-                        # Strategy 2: By type and value
-                        if search_button is None:
-                            try:
-                                search_button = driver.find_element(By.CSS_SELECTOR, "button[type='button'][onclick='funViewCinoHistory();']")
-                                print("Found search button by type and onclick")
-                            except Exception:
-                                print("Could not find search button by type and onclick")
-                                
-                        # Strategy 3: By XPath with text
-                        if search_button is None:
-                            try:
-                                search_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Search')]")
-                                print("Found search button by text")
-                            except Exception:
-                                print("Could not find search button by text")
-                                
-                        # Strategy 4: By class
-                        if search_button is None:
-                            try:
-                                search_button = driver.find_element(By.CSS_SELECTOR, "button.btn.btn-primary")
-                                print("Found search button by class")
-                            except Exception:
-                                print("Could not find search button by class")
+                        search_button = find_search_button(driver)
                         
                         # If search button is found, click it
                         if search_button:
                             # Focus on the search button
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", search_button)
-                            time.sleep(1)
+                            scroll_into_view(driver, search_button)
                             
                             # Highlight the search button
-                            driver.execute_script("arguments[0].style.border='3px solid red';", search_button)
-                            time.sleep(1)
+                            highlight(driver, search_button, "red")
                             
                             # Click the search button
                             print("Clicking search button...")
@@ -880,70 +797,36 @@ def main():
                             
                             # Wait for search results
                             print("Waiting for search results...")
-                            time.sleep(5)
+                            wait_for_case_results(driver)
                             
                             # Take a screenshot of the results
-                            driver.save_screenshot("search_results.png")
-                            print("Search results screenshot saved as 'search_results.png'")
+                            snapshot(driver, "search_results")
                             
-                            # Now extract the case details
-                            case_data = extract_case_details(driver)
-                            
-                            if case_data:
-                                print("Successfully extracted case details")
-                                
-                                # Create folder and Excel file
-                                folder_path = create_case_folder(cnr_number, case_data)
-                                
-                                # Download PDF files if available
-                                if case_data.get("pdf_links", []):
-                                    download_pdfs(driver, case_data["pdf_links"], folder_path)
-                                else:
-                                    print("No PDF links found to download")
-                                
-                                # Extract and download order PDFs
-                                print("\nAttempting to download order PDFs...")
-                                extract_order_pdfs(driver, folder_path)
-                                
-                                # Extract business details
-                                print("\nAttempting to extract business details...")
-                                extract_business_details(driver, folder_path)
-                                
-                                print(f"All data has been saved to folder: {folder_path}")
-                            else:
-                                print("No case details were extracted. Please check if the search was successful.")
+                            # Now extract and save the case details
+                            folder = save_case_results(driver, cnr_number)
                             
                             # Wait for user to continue
                             input("Press ENTER to close the browser when finished viewing the results...")
                             
                         else:
                             print("Could not find search button with any strategy")
-                            driver.save_screenshot("search_button_not_found.png")
-                            print("Screenshot saved as 'search_button_not_found.png'")
+                            capture_failure(driver, "search_button_not_found")
                             
                             # Try direct JavaScript execution as a last resort
                             try:
                                 print("Attempting to click search button using JavaScript...")
                                 driver.execute_script("funViewCinoHistory();")
                                 print("Executed JavaScript search function")
-                                time.sleep(5)
-                                driver.save_screenshot("js_search_results.png")
+                                wait_for_case_results(driver)
+                                snapshot(driver, "js_search_results")
                                 input("JavaScript search executed. Press ENTER to close the browser...")
                             except Exception as e:
                                 print(f"JavaScript execution failed: {e}")
                             
                     else:
                         print("Could not find CAPTCHA input field with any strategy")
-                        # Print page source to help debug
-                        print("Page source excerpt:")
-                        try:
-                            page_source = driver.page_source
-                            print(page_source[:500] + "..." + page_source[-500:])
-                            with open("page_source_captcha.html", "w", encoding="utf-8") as f:
-                                f.write(page_source)
-                            print("Saved full page source to page_source_captcha.html")
-                        except Exception:
-                            print("Could not save page source")
+                        # Keep the page source and screenshots for debugging (debug mode only)
+                        capture_failure(driver, "captcha_input_not_found")
                             
                         # Ask for manual continuation
                         proceed = input("Do you want to manually enter CAPTCHA in the browser and continue? (y/n): ")
@@ -956,35 +839,11 @@ def main():
                                 search_button = driver.find_element(By.CSS_SELECTOR, "button.btn.btn-primary")
                                 search_button.click()
                                 print("Clicked search button")
-                                time.sleep(5)
-                                driver.save_screenshot("manual_search_results.png")
+                                wait_for_case_results(driver)
+                                snapshot(driver, "manual_search_results")
                                 
-                                # Extract case details
-                                case_data = extract_case_details(driver)
-                                
-                                if case_data:
-                                    print("Successfully extracted case details")
-                                    
-                                    # Create folder and Excel file
-                                    folder_path = create_case_folder(cnr_number, case_data)
-                                    
-                                    # Download PDF files if available
-                                    if case_data.get("pdf_links", []):
-                                        download_pdfs(driver, case_data["pdf_links"], folder_path)
-                                    else:
-                                        print("No PDF links found to download")
-                                    
-                                    # Extract and download order PDFs
-                                    print("\nAttempting to download order PDFs...")
-                                    extract_order_pdfs(driver, folder_path)
-                                    
-                                    # Extract business details
-                                    print("\nAttempting to extract business details...")
-                                    extract_business_details(driver, folder_path)
-                                    
-                                    print(f"All data has been saved to folder: {folder_path}")
-                                else:
-                                    print("No case details were extracted. Please check if the search was successful.")
+                                # Extract and save the case details
+                                folder = save_case_results(driver, cnr_number)
                                 
                                 input("Press ENTER to close the browser...")
                             except Exception as e:
@@ -992,31 +851,18 @@ def main():
                             
                 else:
                     print("Could not find CNR input field")
-                    driver.save_screenshot("cnr_input_not_found.png")
+                    capture_failure(driver, "cnr_input_not_found")
                     
             except Exception as e:
                 print(f"Error in CNR/CAPTCHA handling: {e}")
                 traceback.print_exc()
-                driver.save_screenshot("cnr_captcha_error.png")
-                
-        else:
-            print("Could not find the District Court Services button with any strategy")
-            
-            # Save page source for debugging
-            with open("page_source.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            print("Saved page source to page_source.html")
-            
-            # Take a screenshot
-            driver.save_screenshot("button_not_found.png")
-            print("Saved screenshot to button_not_found.png")
+                capture_failure(driver, "cnr_captcha_error")
     
     except Exception as e:
         print(f"Error: {e}")
         traceback.print_exc()
         if driver:
-            driver.save_screenshot("error.png")
-            print("Saved error screenshot to error.png")
+            capture_failure(driver, "error")
     
     finally:
         # Close the browser only if user confirms
@@ -1029,6 +875,8 @@ def main():
                 print("Browser will remain open. Close it manually when done.")
             
     print("Script completed.")
+    return folder
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(run_from_command_line("district", sys.modules[__name__], main,
+                                   "Scrape District Court case details from eCourts by CNR number"))
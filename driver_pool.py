@@ -0,0 +1,313 @@
+"""
+Pool of warm Chrome drivers.
+
+Launching Chrome costs seconds and a few hundred MB, and a browser that
+stays up for thousands of cases keeps growing. A DriverPool launches its
+drivers up front, parks each one on the court's CNR search form and hands
+them out to tasks. A driver goes back to the search form when it is
+released, and is replaced by a fresh one after max_cases cases, once its
+process tree uses more than max_rss_mb, or when it crashed.
+
+    pool = DriverPool(court_module, size=2, download_dir=worker_dir)
+    pool.start()
+    with pool.lease() as pooled:
+        court_module.scrape_case(pooled.driver, pooled.wait, cnr_number)
+    pool.close()
+
+Every scraper module provides create_driver(), open_cnr_search_page() and
+return_to_search_form(), which is all the pool needs.
+"""
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from session_manager import close_session, session_for
+
+# Recycling limits, overridable through the environment
+MAX_CASES = int(os.environ.get("ECOURTS_DRIVER_MAX_CASES", "50"))
+MAX_RSS_MB = float(os.environ.get("ECOURTS_DRIVER_MAX_RSS_MB", "1500"))
+
+# Attempts to launch and park a driver before giving up on that slot
+LAUNCH_ATTEMPTS = 3
+
+
+def process_tree_pids(root_pid):
+    """
+    root_pid and all its descendants, read from /proc
+    """
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                # The command name may contain spaces, the fields after it do not
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(name))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    pids = [root_pid]
+    for pid in pids:
+        pids.extend(children.get(pid, []))
+    return pids
+
+
+def process_tree_rss_mb(root_pid):
+    """
+    Resident memory of a process and its descendants in MB, or None where it cannot be measured
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(root_pid)
+            processes = [root] + root.children(recursive=True)
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir("/proc"):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in process_tree_pids(root_pid):
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
+
+
+def driver_rss_mb(driver):
+    """
+    Memory used by chromedriver and the browser processes it started, in MB (None if unknown)
+    """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    return process_tree_rss_mb(pid)
+
+
+def driver_alive(driver):
+    """
+    False once the browser or chromedriver has gone away
+    """
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+
+class PooledDriver:
+    """
+    A driver handed out by a DriverPool, with the wait and search URL that belong to it
+    """
+
+    def __init__(self, slot, driver, wait, search_url):
+        self.slot = slot
+        self.driver = driver
+        self.wait = wait
+        self.search_url = search_url
+        self.cases = 0
+        self.started = time.time()
+
+
+class DriverPool:
+    """
+    Launches `size` drivers parked on the CNR search form and recycles them
+    """
+
+    def __init__(self, court_module, size=1, max_cases=MAX_CASES, max_rss_mb=MAX_RSS_MB, headless=True,
+                 download_dir=None, wait_timeout=20, lean=None):
+        self.court_module = court_module
+        self.size = size
+        self.max_cases = max_cases
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.lean = lean
+        self.download_dir = download_dir
+        self.wait_timeout = wait_timeout
+        self.idle = queue.Queue()
+        self.live = {}
+        self.launching = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.executor = ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix="driver-launch")
+        self.stats = {"launched": 0, "recycled": 0, "crashed": 0}
+
+    def start(self):
+        """
+        Launch every driver in parallel and wait until they are parked.
+        Returns the number of drivers that came up.
+        """
+        futures = [self.submit_launch(slot) for slot in range(self.size)]
+        ready = sum(1 for future in futures if future.result())
+        print(f"Driver pool ready: {ready}/{self.size} drivers on the search form")
+        return ready
+
+    def submit_launch(self, slot):
+        """
+        Launch a driver for slot on the launcher threads
+        """
+        with self.lock:
+            self.launching += 1
+        return self.executor.submit(self.launch_counted, slot)
+
+    def launch_counted(self, slot):
+        try:
+            return self.launch(slot)
+        finally:
+            with self.lock:
+                self.launching -= 1
+
+    def launch(self, slot):
+        """
+        Create a driver for slot, park it on the search form and add it to the idle queue.
+        Returns True on success.
+        """
+        for attempt in range(LAUNCH_ATTEMPTS):
+            if self.closed:
+                return False
+            driver = None
+            try:
+                driver = self.court_module.create_driver(headless=self.headless, download_dir=self.download_dir,
+                                                         lean=self.lean)
+                wait = WebDriverWait(driver, self.wait_timeout)
+                if not self.court_module.open_cnr_search_page(driver, wait):
+                    raise RuntimeError("Could not reach the CNR search form")
+                # Lets scrape_one and the PDF downloads renew this driver's session
+                session_for(driver, self.court_module)
+                pooled = PooledDriver(slot, driver, wait, driver.current_url)
+                with self.lock:
+                    self.live[slot] = pooled
+                    self.stats["launched"] += 1
+                self.idle.put(pooled)
+                return True
+            except Exception as e:
+                print(f"Driver {slot}: launch attempt {attempt + 1} failed: {e}")
+                traceback.print_exc()
+                self.quit_driver(driver)
+        print(f"Driver {slot}: giving up after {LAUNCH_ATTEMPTS} attempts")
+        return False
+
+    def quit_driver(self, driver):
+        if driver is None:
+            return
+        close_session(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error closing driver: {e}")
+
+    def acquire(self, timeout=None):
+        """
+        Take a parked driver, waiting up to timeout seconds. Returns a PooledDriver or None.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.closed:
+            with self.lock:
+                if not self.live and not self.launching and self.idle.empty():
+                    print("Driver pool has no drivers left")
+                    return None
+            try:
+                pooled = self.idle.get(timeout=1 if deadline is None else max(0.1, min(1, deadline - time.time())))
+            except queue.Empty:
+                if deadline is not None and time.time() >= deadline:
+                    return None
+                continue
+            if driver_alive(pooled.driver):
+                return pooled
+            print(f"Driver {pooled.slot} died while parked, replacing it")
+            self.replace(pooled, "crashed")
+        return None
+
+    def recycle_reason(self, pooled):
+        """
+        Why pooled should be replaced rather than reused, or None
+        """
+        if not driver_alive(pooled.driver):
+            return "crashed"
+        if self.max_cases and pooled.cases >= self.max_cases:
+            return f"served {pooled.cases} cases"
+        if self.max_rss_mb:
+            rss = driver_rss_mb(pooled.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                return f"uses {rss:.0f} MB"
+        return None
+
+    def release(self, pooled):
+        """
+        Return a driver after a case: park it on the search form again, or replace it
+        if it crashed, reached its case or memory limit, or the form will not load
+        """
+        pooled.cases += 1
+        reason = self.recycle_reason(pooled)
+        if reason is None:
+            try:
+                if self.court_module.return_to_search_form(pooled.driver, pooled.wait, pooled.search_url):
+                    pooled.search_url = pooled.driver.current_url
+                    self.idle.put(pooled)
+                    return
+                reason = "lost the search form"
+            except Exception as e:
+                reason = "crashed" if not driver_alive(pooled.driver) else f"lost the search form ({e})"
+        self.replace(pooled, reason)
+
+    def replace(self, pooled, reason):
+        """
+        Quit pooled and launch a fresh driver for its slot in the background
+        """
+        print(f"Recycling driver {pooled.slot} ({reason}) after {pooled.cases} cases")
+        with self.lock:
+            self.live.pop(pooled.slot, None)
+            self.stats["crashed" if reason == "crashed" else "recycled"] += 1
+        self.quit_driver(pooled.driver)
+        if not self.closed:
+            self.submit_launch(pooled.slot)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        with pool.lease() as pooled: ... - acquire a driver and always release it.
+        Raises RuntimeError if no driver becomes available.
+        """
+        pooled = self.acquire(timeout)
+        if pooled is None:
+            raise RuntimeError("No browser driver available")
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def close(self):
+        """
+        Quit every driver, parked or not
+        """
+        self.closed = True
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            drivers = list(self.live.values())
+            self.live.clear()
+        for pooled in drivers:
+            self.quit_driver(pooled.driver)
+        print(f"Driver pool closed: {self.stats['launched']} launched, {self.stats['recycled']} recycled, "
+              f"{self.stats['crashed']} crashed")
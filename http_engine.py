@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Browserless CNR lookups against the eCourts services over plain HTTP.
+
+The search form, CAPTCHA image, search endpoint and PDFs are all fetched
+with one pooled requests.Session per client, so a worker needs a few MB
+instead of a whole Chrome instance. Cases that cannot be fetched over
+HTTP fall back to the Selenium scrapers.
+"""
+import argparse
+import importlib
+import os
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from business_history import BUSINESS_PATH, crawl_history, fetch_over_http
+from captcha_service import get_captcha_service
+from case_parser import CASE_SECTIONS, HIGH_COURT_SECTIONS, parse_case_html
+from case_manifest import CaseManifest, case_status
+from case_output import save_case
+from case_store import flush_all, print_stats
+from crawl_queue import PDFS, CrawlQueue, checkpoint, print_status
+from http_session import create_pooled_session
+from metrics import add_retries, finish_case, stage, start_case, timed
+from pdf_downloader import DOWNLOAD_CHUNK_SIZE, PdfDownloader, order_filename, pdf_filename, unique_jobs
+from session_manager import EXPIRED, classify_text
+from sites import ECOURTS_V6_BASE_URL, HCSERVICES_BASE_URL
+
+# Endpoints used by the CNR search form's own JavaScript (funViewCinoHistory)
+COURTS = {
+    "district": {
+        "module": "district_court_selenium",
+        "base_url": ECOURTS_V6_BASE_URL,
+        "search_page": "",
+        "captcha": "vendor/securimage/securimage_show.php",
+        "search": "?p=cnr_status/searchByCNR/",
+        "captcha_field": "fcaptcha_code",
+        "sections": CASE_SECTIONS,
+    },
+    "high": {
+        "module": "high_court_selenium",
+        "base_url": HCSERVICES_BASE_URL,
+        "search_page": "main.php",
+        "captcha": "securimage/securimage_show.php",
+        "search": "cases_qry/o_civil_case_history.php",
+        "captcha_field": "captcha",
+        "sections": HIGH_COURT_SECTIONS,
+    },
+}
+
+class CaptchaRejected(Exception):
+    """
+    The server rejected the CAPTCHA answer
+    """
+
+
+class SessionExpired(Exception):
+    """
+    The server no longer accepts the session cookie or app_token
+    """
+
+
+def submit_captcha_image(image_bytes):
+    """
+    Hand a CAPTCHA image to the HTTP engine's CAPTCHA service, returns its CaptchaTicket
+    """
+    return get_captcha_service().submit(image_bytes)
+
+
+class EcourtsHttpClient:
+    """
+    HTTP client for one eCourts CNR search service (district or high court)
+    """
+
+    def __init__(self, court="district", pool_size=10, timeout=30, session=None):
+        self.court = court
+        self.config = COURTS[court]
+        self.base_url = self.config["base_url"]
+        self.timeout = timeout
+        self.session = session or create_pooled_session(pool_size)
+        self.app_token = ""
+        self.search_page_loaded = False
+
+    def url(self, path):
+        return urljoin(self.base_url, path)
+
+    def update_app_token(self, text):
+        """
+        Remember the anti-CSRF app_token the site rotates on every response
+        """
+        match = re.search(r"app_token[\"']?\s*(?:=|:|value=)\s*[\"']([0-9a-fA-F]+)[\"']", text or "")
+        if match:
+            self.app_token = match.group(1)
+
+    @timed("homepage")
+    def open_search_page(self):
+        """
+        Load the CNR search page to get a session cookie and the first app_token
+        """
+        response = self.session.get(self.url(self.config["search_page"]), timeout=self.timeout)
+        response.raise_for_status()
+        self.update_app_token(response.text)
+        self.search_page_loaded = True
+        return response.text
+
+    def renew_session(self):
+        """
+        Drop the expired session cookie and app_token and start a new session
+        """
+        print("eCourts session expired, starting a new one")
+        add_retries()
+        self.session.cookies.clear()
+        self.app_token = ""
+        self.open_search_page()
+
+    def fetch_captcha(self):
+        """
+        Download a fresh CAPTCHA image for the current session
+        """
+        response = self.session.get(
+            self.url(self.config["captcha"]),
+            params={"_": str(int(time.time() * 1000))},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.content
+
+    @timed("search")
+    def search_cnr(self, cnr_number, captcha_code):
+        """
+        Submit the CNR search and return the results HTML, or None if the case was not found.
+        Raises CaptchaRejected if the CAPTCHA answer was wrong, SessionExpired if the session is gone.
+        """
+        data = {
+            "cino": cnr_number,
+            self.config["captcha_field"]: captcha_code,
+            "ajax_req": "true",
+            "app_token": self.app_token,
+        }
+        response = self.session.post(
+            self.url(self.config["search"]),
+            data=data,
+            headers={"X-Requested-With": "XMLHttpRequest"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        self.update_app_token(response.text)
+
+        # The v6 endpoint answers with JSON wrapping an HTML fragment, hcservices with HTML
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+
+        if isinstance(payload, dict):
+            if payload.get("app_token"):
+                self.app_token = payload["app_token"]
+            error = payload.get("errormsg") or payload.get("error") or ""
+            html = next((value for value in payload.values() if isinstance(value, str) and "<table" in value), "")
+        else:
+            error = ""
+            html = response.text
+
+        if "captcha" in str(error).lower() or (not html and "invalid captcha" in response.text.lower()):
+            raise CaptchaRejected(error or "Invalid Captcha")
+        if not html and classify_text(f"{error} {response.text}") == EXPIRED:
+            raise SessionExpired(error or "Session expired")
+        if "case_details_table" not in html:
+            print(f"No case details returned for {cnr_number}: {error or 'empty response'}")
+            return None
+        return html
+
+    def fetch_case(self, cnr_number, captcha_solver=submit_captcha_image, retries=3):
+        """
+        Look up one CNR number, solving a fresh CAPTCHA per attempt (captcha_solver turns the
+        image into a CaptchaTicket). An expired session is renewed before the next attempt,
+        a rejected CAPTCHA is reported to the backend and only costs a new challenge.
+        Returns the parsed CaseRecord, or None if the lookup failed.
+        """
+        if not self.search_page_loaded:
+            self.open_search_page()
+
+        for attempt in range(retries):
+            print(f"Attempt {attempt+1} to fetch {cnr_number} over HTTP...")
+            ticket = captcha_solver(self.fetch_captcha())
+            captcha_code = ticket.result()
+            if not captcha_code:
+                continue
+            try:
+                html = self.search_cnr(cnr_number, captcha_code)
+            except CaptchaRejected as e:
+                print(f"CAPTCHA rejected: {e}")
+                ticket.report_bad()
+                add_retries()
+                continue
+            except SessionExpired as e:
+                print(f"Session rejected: {e}")
+                self.renew_session()
+                continue
+            if html is None:
+                return None
+            record = parse_case_html(html, base_url=self.base_url, sections=self.config["sections"],
+                                     orders_base_url=self.base_url)
+            return record
+
+        print(f"All {retries} attempts failed for {cnr_number}")
+        return None
+
+    def fetch_business(self, forms):
+        """
+        Post viewBusiness forms (business_history.business_form) over the client's session.
+        Returns the response texts, None for failed requests.
+        """
+        responses, self.app_token = fetch_over_http(self.session, self.url(BUSINESS_PATH), forms,
+                                                    self.app_token, self.timeout)
+        return responses
+
+    def download(self, url, file_path):
+        """
+        Stream a document to file_path with the session cookies. Returns True on success.
+        """
+        response = self.session.get(url, stream=True, timeout=self.timeout)
+        if response.status_code != 200:
+            print(f"Failed to download PDF. Status code: {response.status_code}")
+            return False
+        with open(file_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+        print(f"Downloaded PDF to {file_path}")
+        return True
+
+
+def scrape_case_http(client, cnr_number, captcha_solver=submit_captcha_image, on_stage=None):
+    """
+    Fetch one case over HTTP and save it like the Selenium scrapers do.
+    on_stage(stage, folder_path) is called once the case details are saved ("extracted").
+    Returns the case folder path, or None if the case could not be fetched.
+    """
+    record = client.fetch_case(cnr_number, captcha_solver)
+    if record is None:
+        return None
+    case_data = record.to_case_data()
+    pdf_links = case_data.get("pdf_links", [])
+    folder_path = save_case(client.court, cnr_number, case_data, record)
+    if on_stage:
+        on_stage("extracted", folder_path)
+
+    # Linked documents and order PDFs share the client's pooled session,
+    # documents saved by an earlier scrape are skipped
+    manifest = CaseManifest(folder_path)
+    status = case_status(case_data)
+    if not manifest.status_changed(status):
+        print("Case status unchanged since the last scrape")
+
+    jobs = [(pdf_url, os.path.join(folder_path, pdf_filename(pdf_url, i))) for i, pdf_url in enumerate(pdf_links)]
+    jobs += [(order.url, os.path.join(folder_path, order_filename(order.date))) for order in record.orders]
+    jobs = manifest.pending(unique_jobs(jobs))
+    results = PdfDownloader(client.session).download_all(jobs)
+    expired = [index for index, result in enumerate(results) if result["expired"]]
+    if expired:
+        client.renew_session()
+        retried = PdfDownloader(client.session).download_all([jobs[index] for index in expired])
+        for index, result in zip(expired, retried):
+            results[index] = result
+    manifest.record_downloads(results)
+
+    # District hearing history over the same session, dates saved earlier are skipped
+    if client.court == "district" and record.hearings:
+        with stage("business_history"):
+            crawl_history(folder_path, record.hearings, client.fetch_business)
+
+    manifest.update_status(status)
+    manifest.save()
+
+    print(f"All data has been saved to folder: {folder_path}")
+    return folder_path
+
+
+# claimed_by of the jobs this process takes from a crawl queue
+HTTP_WORKER = f"http_{os.getpid()}"
+
+
+def run_selenium_fallback(court, cnr_numbers, crawl=None, headless=True):
+    """
+    Scrape the CNR numbers the HTTP engine could not handle with one pooled Selenium browser.
+    With a crawl queue, jobs that have used up their attempts are left alone.
+    """
+    # Selenium is only loaded once a case actually needs the browser
+    from driver_pool import DriverPool
+    from worker_pool import scrape_one
+
+    court_module = importlib.import_module(COURTS[court]["module"])
+    results = {}
+    pool = DriverPool(court_module, size=1, headless=headless)
+    try:
+        if not pool.start():
+            return results
+        for cnr_number in cnr_numbers:
+            if crawl and not crawl.claim(court, HTTP_WORKER, cnr_number):
+                continue
+            try:
+                with pool.lease() as pooled:
+                    on_stage = queue_stage_recorder(crawl, court, cnr_number)
+                    results[cnr_number] = scrape_one(court, court_module, pooled.driver, pooled.wait, cnr_number,
+                                                     on_stage=on_stage)
+                record_result(crawl, court, cnr_number, results[cnr_number])
+            except Exception as e:
+                print(f"Error processing CNR {cnr_number}: {e}")
+                traceback.print_exc()
+                results[cnr_number] = None
+                record_result(crawl, court, cnr_number, None, str(e))
+    finally:
+        pool.close()
+    return results
+
+
+def queue_stage_recorder(crawl, court, cnr_number):
+    """
+    on_stage callback that records a case's progress in the crawl queue (None without one)
+    """
+    if crawl is None:
+        return None
+    return lambda stage, folder: crawl.mark(court, cnr_number, stage, folder=os.path.abspath(folder))
+
+
+def record_result(crawl, court, cnr_number, folder, error=None):
+    """
+    Mark a finished case as downloaded, or record the failed attempt
+    """
+    if crawl is None:
+        return
+    if folder:
+        crawl.mark(court, cnr_number, PDFS, folder=os.path.abspath(folder), worker=HTTP_WORKER)
+    else:
+        crawl.fail(court, cnr_number, error or "Case could not be fetched")
+
+
+def run_http_batch(court, cnr_numbers, captcha_solver=submit_captcha_image, selenium_fallback=True, concurrency=1,
+                   queue_path=None, headless=True):
+    """
+    Scrape CNR numbers over HTTP, retrying failures with Selenium if selenium_fallback is set
+    (in a headless browser unless headless is False).
+    With concurrency > 1 several cases are in flight at once (one session each), so one
+    case's CAPTCHA latency overlaps with the others' searches and downloads.
+    With queue_path the CNR numbers go through that crawl queue: only unfinished jobs are
+    scraped and the cases are marked persisted once the buffered rows are flushed at the end.
+    Returns a dict of CNR number -> folder path (or None).
+    """
+    crawl = None
+    if queue_path:
+        crawl = CrawlQueue(queue_path)
+        crawl.add(court, cnr_numbers)
+        crawl.requeue_interrupted(court)
+        cnr_numbers = crawl.pending(court)
+        print(f"Crawl queue {queue_path}: {len(cnr_numbers)} CNR numbers to scrape")
+
+    # The CAPTCHA is bound to the session, so every thread needs its own client,
+    # and SQLite connections cannot be shared between threads either
+    local = threading.local()
+
+    def scrape(cnr_number):
+        if not hasattr(local, "client"):
+            local.client = EcourtsHttpClient(court)
+            local.crawl = CrawlQueue(queue_path) if queue_path else None
+        if local.crawl and not local.crawl.claim(court, HTTP_WORKER, cnr_number):
+            return None
+        print(f"\n=== Processing CNR: {cnr_number} ===")
+        start_case(court, cnr_number)
+        folder = None
+        try:
+            folder = scrape_case_http(local.client, cnr_number, captcha_solver,
+                                      on_stage=queue_stage_recorder(local.crawl, court, cnr_number))
+            record_result(local.crawl, court, cnr_number, folder)
+            return folder
+        except Exception as e:
+            print(f"HTTP engine failed for {cnr_number}: {e}")
+            traceback.print_exc()
+            record_result(local.crawl, court, cnr_number, None, str(e))
+            return None
+        finally:
+            finish_case(folder)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        results = dict(zip(cnr_numbers, executor.map(scrape, cnr_numbers)))
+
+    failed = [cnr_number for cnr_number, folder in results.items() if not folder]
+    if failed and selenium_fallback:
+        print(f"\nRetrying {len(failed)} CNR numbers with Selenium...")
+        results.update(run_selenium_fallback(court, failed, crawl=crawl, headless=headless))
+
+    succeeded = sum(1 for folder in results.values() if folder)
+    print(f"Batch completed: {succeeded}/{len(cnr_numbers)} cases scraped")
+    if crawl:
+        print_stats(checkpoint(crawl, court, HTTP_WORKER))
+        print_status(crawl, court)
+    else:
+        print_stats(flush_all())
+    return results
+
+
+if __name__ == "__main__":
+    from unattended import read_cnr_numbers
+
+    parser = argparse.ArgumentParser(description="Scrape eCourts cases over HTTP without a browser")
+    parser.add_argument("court", choices=sorted(COURTS), help="Which court service to query")
+    parser.add_argument("input", help="File with one CNR number per line ('-' for stdin)")
+    parser.add_argument("--no-selenium-fallback", action="store_true",
+                        help="Do not retry failed cases with the Selenium scraper")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of cases to process at once, each with its own session")
+    parser.add_argument("--queue", default=None,
+                        help="SQLite crawl queue file; reruns resume from it and skip persisted cases")
+    parser.add_argument("--visible", action="store_true", help="Show the browser of the Selenium fallback")
+    args = parser.parse_args()
+
+    run_http_batch(args.court, read_cnr_numbers(args.input), selenium_fallback=not args.no_selenium_fallback,
+                   concurrency=args.concurrency, queue_path=args.queue, headless=not args.visible)
@@ -0,0 +1,38 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# The CNR search and viewBusiness POSTs spend a one-time CAPTCHA or the rotating app_token,
+# sending them again would only hide the real failure
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+
+
+def create_pooled_session(pool_size=10):
+    """
+    Create a requests.Session that keeps up to pool_size connections alive per host
+    and retries transient gateway errors of GET and HEAD requests
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=RETRY_METHODS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def copy_driver_cookies(driver, session):
+    """
+    Copy the browser's cookies into the session with a single get_cookies() call
+    """
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+    return session
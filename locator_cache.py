@@ -0,0 +1,168 @@
+"""
+Remember which locator strategy finds each element.
+
+The scrapers know several ways to find the services button, the CNR and
+CAPTCHA inputs and the search button, because the sites have changed
+their markup over time. Trying them one find_element at a time costs a
+round trip, and a logged exception, for every strategy that fails.
+
+find_element(driver, key, candidates) instead resolves the candidates in
+the browser with one script, in order, and remembers the winner for key
+(e.g. "district_home:services_button"). When the winner is the first,
+most precise candidate, later lookups try it alone with a single
+find_elements call. A lower-priority winner (say the "class" or
+"partial_link_text" fallback) is never trusted on its own: it is resolved
+again together with the candidates ahead of it, so a precise candidate
+takes over as soon as it matches again.
+
+The winners are saved to ECOURTS_LOCATOR_CACHE (default
+~/.cache/ecourts/locator_cache.json, or under $XDG_CACHE_HOME) so the next
+run starts with them; set it to an empty string to keep them in memory
+only.
+"""
+import json
+import os
+import threading
+
+DEFAULT_LOCATOR_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "ecourts",
+    "locator_cache.json",
+)
+
+# Returns [index, element] of the first candidate ([name, using, value]) that matches, or null.
+# `using` is a Selenium By value.
+RESOLVE_SCRIPT = """
+var candidates = arguments[0];
+function linkMatching(test) {
+    var links = document.getElementsByTagName("a");
+    for (var i = 0; i < links.length; i++) {
+        if (test((links[i].innerText || links[i].textContent || "").trim())) { return links[i]; }
+    }
+    return null;
+}
+for (var i = 0; i < candidates.length; i++) {
+    var using = candidates[i][1], value = candidates[i][2], element = null;
+    try {
+        if (using === "id") {
+            element = document.getElementById(value);
+        } else if (using === "name") {
+            element = document.getElementsByName(value)[0] || null;
+        } else if (using === "css selector") {
+            element = document.querySelector(value);
+        } else if (using === "xpath") {
+            element = document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else if (using === "link text") {
+            element = linkMatching(function (text) { return text === value; });
+        } else if (using === "partial link text") {
+            element = linkMatching(function (text) { return text.indexOf(value) !== -1; });
+        } else if (using === "tag name") {
+            element = document.getElementsByTagName(value)[0] || null;
+        }
+    } catch (e) {
+        element = null;
+    }
+    if (element) { return [i, element]; }
+}
+return null;
+"""
+
+
+class LocatorCache:
+    """
+    key -> name of the candidate that last found the element, persisted as JSON
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.winners = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.winners = json.load(f)
+        except Exception as e:
+            # A damaged cache only costs one full resolution per element
+            print(f"Ignoring unreadable locator cache {self.path}: {e}")
+
+    def save(self):
+        """
+        Write the cache atomically, parallel workers may be reading it
+        """
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.winners, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save locator cache: {e}")
+
+    def get(self, key):
+        return self.winners.get(key)
+
+    def remember(self, key, name):
+        with self.lock:
+            if self.winners.get(key) == name:
+                return
+            self.winners[key] = name
+            self.save()
+
+    def find_element(self, driver, key, candidates):
+        """
+        Find an element with the first of candidates ((name, By, value) triples) that matches.
+        Only a cached first candidate is tried on its own, any other winner could be a loose
+        fallback that shadows a precise candidate. Returns the element or None.
+        """
+        candidates = list(candidates)
+        if not candidates:
+            return None
+        remaining = [[name, by, value] for name, by, value in candidates]
+
+        name, by, value = candidates[0]
+        if self.get(key) == name:
+            elements = driver.find_elements(by, value)
+            if elements:
+                return elements[0]
+            print(f"Cached locator '{name}' for {key} no longer matches")
+            remaining = remaining[1:]
+
+        if not remaining:
+            return None
+        match = driver.execute_script(RESOLVE_SCRIPT, remaining)
+        if not match:
+            return None
+        index, element = match
+        name = remaining[int(index)][0]
+        if self.get(key) != name:
+            print(f"Found {key} by {name}")
+        self.remember(key, name)
+        return element
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_locator_cache():
+    """
+    The process-wide locator cache, loaded from ECOURTS_LOCATOR_CACHE on first use
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LocatorCache(os.environ.get("ECOURTS_LOCATOR_CACHE", DEFAULT_LOCATOR_CACHE))
+        return _cache
+
+
+def find_element(driver, key, candidates):
+    """
+    Find an element through the process-wide locator cache (see LocatorCache.find_element)
+    """
+    return get_locator_cache().find_element(driver, key, candidates)
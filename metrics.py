@@ -0,0 +1,307 @@
+"""
+Per-stage timing and counters for every scrape.
+
+A case is bracketed by start_case()/finish_case() (or the timed_case
+decorator on scrape_case). A scrape_case called while a case is already
+open on the thread, like the retry of worker_pool.scrape_one after a
+session renewal, is counted as part of that case. Inside it, the scrapers' stages are timed with
+the timed() decorator or the stage() context manager:
+
+    homepage, button_search, return_to_form, captcha, search, extract,
+    modal, business_history, pdfs, db_write
+
+For every stage the wall time, the number of WebDriver round trips
+(instrument_driver wraps driver.execute, which every WebDriver and
+WebElement call goes through), bytes downloaded and retries are recorded.
+Stages may nest (pdfs inside business_history, say); each one counts
+everything that happened while it was open.
+
+Nothing is written to disk unless asked for. With ECOURTS_METRICS_LOG
+set, one JSON line is appended to that file when a case finishes. With
+ECOURTS_METRICS_DIR set, the process totals are rewritten as the
+Prometheus text file ECOURTS_METRICS_DIR/scrape_metrics-<instance>.prom,
+which the node_exporter textfile collector can pick up. The instance is
+ECOURTS_METRICS_INSTANCE ("main" by default; the worker pool uses
+worker_<n>). It names the file and is the series' "instance" label, so a
+rerun overwrites its own file and the label set stays bounded. Both
+variables are read when written, so the worker pool can point its
+workers at one directory.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# File outputs are off unless the environment switches them on
+DEFAULT_METRICS_LOG = ""
+DEFAULT_METRICS_DIR = ""
+DEFAULT_METRICS_INSTANCE = "main"
+
+# Seconds between rewrites of the Prometheus file
+PROMETHEUS_INTERVAL = 5
+
+COUNTERS = ("seconds", "calls", "round_trips", "bytes", "retries")
+
+# Stage timings outside of any case (e.g. database flushes on the writer timer thread)
+NO_COURT = "none"
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}
+_cases = {}
+_last_written = 0.0
+
+
+class CaseMetrics:
+    """
+    Stage counters of the case being scraped on this thread
+    """
+
+    def __init__(self, court, cnr_number):
+        self.court = court
+        self.cnr_number = cnr_number
+        self.started = time.time()
+        self.stages = {}
+        self.totals = {"round_trips": 0, "bytes": 0, "retries": 0}
+
+    def to_dict(self, ok):
+        return {
+            "event": "case",
+            "time": round(time.time(), 3),
+            "pid": os.getpid(),
+            "court": self.court,
+            "cnr_number": self.cnr_number,
+            "ok": ok,
+            "seconds": round(time.time() - self.started, 3),
+            **self.totals,
+            "stages": {name: {key: round(value, 3) if key == "seconds" else value for key, value in counts.items()}
+                       for name, counts in self.stages.items()},
+        }
+
+
+def current_case():
+    return getattr(_local, "case", None)
+
+
+def active_stages():
+    if getattr(_local, "stack", None) is None:
+        _local.stack = []
+    return _local.stack
+
+
+def new_counts():
+    return {key: 0 for key in COUNTERS}
+
+
+def start_case(court, cnr_number):
+    """
+    Begin recording a case on this thread
+    """
+    _local.case = CaseMetrics(court, cnr_number)
+    _local.stack = []
+    return _local.case
+
+
+def finish_case(ok):
+    """
+    Stop recording the current case, log it and update the process totals.
+    Returns the case's metrics dict, or None if no case was started.
+    """
+    case = current_case()
+    _local.case = None
+    if case is None:
+        return None
+    entry = case.to_dict(bool(ok))
+    with _lock:
+        key = (case.court, "ok" if ok else "failed")
+        _cases[key] = _cases.get(key, 0) + 1
+    write_log(entry)
+    write_prometheus()
+    return entry
+
+
+def timed_case(court):
+    """
+    Decorator for scrape_case(driver, wait, cnr_number, ...): records the call as one case,
+    successful if it returned something truthy, unless the caller already started the case
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(driver, wait, cnr_number, *args, **kwargs):
+            if current_case() is not None:
+                return func(driver, wait, cnr_number, *args, **kwargs)
+            start_case(court, cnr_number)
+            result = None
+            try:
+                result = func(driver, wait, cnr_number, *args, **kwargs)
+                return result
+            finally:
+                finish_case(bool(result))
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage(name):
+    """
+    with stage("captcha"): ... - time the block and count what happens inside it
+    """
+    frame = new_counts()
+    stack = active_stages()
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        frame["seconds"] = time.perf_counter() - started
+        frame["calls"] = 1
+        stack.remove(frame)
+        record(name, frame)
+
+
+def timed(name):
+    """
+    Decorator form of stage(name)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, counts):
+    """
+    Add a finished stage's counts to the current case and the process totals
+    """
+    case = current_case()
+    court = case.court if case else NO_COURT
+    if case is not None:
+        case_counts = case.stages.setdefault(name, new_counts())
+        for key in COUNTERS:
+            case_counts[key] += counts.get(key, 0)
+    with _lock:
+        totals = _totals.setdefault((court, name), new_counts())
+        for key in COUNTERS:
+            totals[key] += counts.get(key, 0)
+
+
+def count(key, amount=1):
+    """
+    Add to a counter of every open stage and of the current case
+    """
+    for frame in active_stages():
+        frame[key] += amount
+    case = current_case()
+    if case is not None:
+        case.totals[key] += amount
+
+
+def add_bytes(amount):
+    count("bytes", amount)
+
+
+def add_retries(amount=1):
+    if amount > 0:
+        count("retries", amount)
+
+
+def instrument_driver(driver):
+    """
+    Count every WebDriver command sent by driver as one round trip
+    """
+    if getattr(driver, "metrics_instrumented", False):
+        return driver
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        count("round_trips")
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    driver.metrics_instrumented = True
+    return driver
+
+
+def write_log(entry):
+    log_path = os.environ.get("ECOURTS_METRICS_LOG", DEFAULT_METRICS_LOG)
+    if not log_path:
+        return
+    try:
+        with _lock, open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write metrics log: {e}")
+
+
+def prometheus_text():
+    """
+    The process totals in the Prometheus text exposition format
+    """
+    instance = metrics_instance()
+    with _lock:
+        totals = {key: dict(value) for key, value in _totals.items()}
+        cases = dict(_cases)
+
+    lines = [
+        "# HELP ecourts_cases_total Cases scraped, by result.",
+        "# TYPE ecourts_cases_total counter",
+    ]
+    for (court, result), value in sorted(cases.items()):
+        lines.append(f'ecourts_cases_total{{court="{court}",result="{result}",instance="{instance}"}} {value}')
+
+    descriptions = {
+        "seconds": ("ecourts_stage_seconds_total", "Wall time spent in the stage."),
+        "calls": ("ecourts_stage_calls_total", "Times the stage ran."),
+        "round_trips": ("ecourts_stage_webdriver_round_trips_total", "WebDriver commands sent during the stage."),
+        "bytes": ("ecourts_stage_downloaded_bytes_total", "Bytes downloaded during the stage."),
+        "retries": ("ecourts_stage_retries_total", "Retries during the stage."),
+    }
+    for key in COUNTERS:
+        metric, description = descriptions[key]
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for (court, name), counts in sorted(totals.items()):
+            value = round(counts[key], 3) if key == "seconds" else counts[key]
+            lines.append(f'{metric}{{court="{court}",stage="{name}",instance="{instance}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_instance():
+    return os.environ.get("ECOURTS_METRICS_INSTANCE", DEFAULT_METRICS_INSTANCE)
+
+
+def write_prometheus(force=False):
+    """
+    Rewrite this process's Prometheus text file, at most every PROMETHEUS_INTERVAL seconds unless forced.
+    A process that recorded nothing (e.g. one that only printed --help) writes no file.
+    """
+    global _last_written
+    metrics_dir = os.environ.get("ECOURTS_METRICS_DIR", DEFAULT_METRICS_DIR)
+    if not metrics_dir:
+        return
+    with _lock:
+        if not _totals and not _cases:
+            return
+    now = time.time()
+    if not force and now - _last_written < PROMETHEUS_INTERVAL:
+        return
+    _last_written = now
+    path = os.path.join(metrics_dir, f"scrape_metrics-{metrics_instance()}.prom")
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        # The textfile collector must never see a half-written file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write Prometheus metrics: {e}")
+
+
+atexit.register(write_prometheus, True)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Export scraped cases to a partitioned Parquet dataset.
+
+Cases are buffered per process and appended in batches as new part files
+under a hive-style layout:
+
+    case_dataset/court=district/state=MH/part-<time>-<pid>-0.parquet
+    case_dataset/court=high/state=HCBM/part-<time>-<pid>-0.parquet
+
+state is the CNR prefix: the two-letter state code for District Courts and
+the four-letter High Court establishment code (HC + bench) for High Courts.
+Every file has the same schema (CASE_SCHEMA), so the whole dataset can be
+read at once:
+
+    pandas.read_parquet("case_dataset", filters=[("state", "=", "MH")])
+"""
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from case_parser import parse_court_date, split_party_entries
+
+DATASET_DIR = os.environ.get("ECOURTS_DATASET_DIR", "case_dataset")
+EXPORT_BATCH_SIZE = int(os.environ.get("ECOURTS_EXPORT_BATCH_SIZE", "500"))
+
+# The per-case Excel workbooks the scrapers used to write, now only on request
+WRITE_EXCEL = os.environ.get("ECOURTS_WRITE_EXCEL") == "1"
+
+PARTITION_COLUMNS = ["court", "state"]
+
+CASE_SCHEMA = pa.schema([
+    ("cnr_number", pa.string()),
+    ("court", pa.string()),
+    ("state", pa.string()),
+    ("case_type", pa.string()),
+    ("filing_number", pa.string()),
+    ("filing_date", pa.date32()),
+    ("registration_number", pa.string()),
+    ("registration_date", pa.date32()),
+    ("first_hearing_date", pa.date32()),
+    ("next_hearing_date", pa.date32()),
+    ("case_stage", pa.string()),
+    ("court_number_and_judge", pa.string()),
+    ("petitioners", pa.list_(pa.string())),
+    ("respondents", pa.list_(pa.string())),
+    ("petitioner_advocates", pa.list_(pa.string())),
+    ("respondent_advocates", pa.list_(pa.string())),
+    ("acts", pa.list_(pa.struct([("act", pa.string()), ("section", pa.string())]))),
+    # Any other label of the case page (e.g. Modal_* fields) as a JSON object
+    ("extra", pa.string()),
+    ("scraped_at", pa.timestamp("s", tz="UTC")),
+])
+
+# case_data keys -> schema columns
+TEXT_FIELDS = {
+    "Case Type": "case_type",
+    "Filing Number": "filing_number",
+    "Registration Number": "registration_number",
+    "Status_Case Stage": "case_stage",
+    "Status_Court Number and Judge": "court_number_and_judge",
+}
+DATE_FIELDS = {
+    "Filing Date": "filing_date",
+    "Registration Date": "registration_date",
+    "Status_First Hearing Date": "first_hearing_date",
+    "Status_Next Hearing Date": "next_hearing_date",
+}
+
+
+def state_from_cnr(cnr_number, court):
+    """
+    Partition key from the CNR prefix
+    """
+    cnr_number = (cnr_number or "").strip().upper()
+    prefix = cnr_number[:4] if court == "high" else cnr_number[:2]
+    return prefix if re.fullmatch(r"[A-Z]+", prefix or "") else "unknown"
+
+
+def numbered_values(case_data, prefix):
+    """
+    Values of prefix1, prefix2, ... keys in numeric order
+    """
+    numbered = []
+    for key, value in case_data.items():
+        match = re.fullmatch(re.escape(prefix) + r"(\d+)", key)
+        if match:
+            numbered.append((int(match.group(1)), key, value))
+    return sorted(numbered)
+
+
+def case_row(case_data, court, cnr_number=None):
+    """
+    Turn the flat case_data dict of the scrapers into a row of CASE_SCHEMA
+    """
+    used = {"pdf_links", "CNR Number"}
+    # The searched CNR number, the parsed one only when none was given
+    cnr = cnr_number or case_data.get("CNR Number")
+    row = {
+        "cnr_number": cnr,
+        "court": court,
+        "state": state_from_cnr(cnr, court),
+        "scraped_at": datetime.now(timezone.utc).replace(microsecond=0),
+    }
+    for key, column in TEXT_FIELDS.items():
+        row[column] = case_data.get(key)
+        used.add(key)
+    for key, column in DATE_FIELDS.items():
+        row[column] = parse_court_date(case_data.get(key))
+        used.add(key)
+
+    for side in ("Petitioner", "Respondent"):
+        entries = numbered_values(case_data, f"{side}_Advocate_")
+        used.update(key for _, key, _ in entries)
+        parties = split_party_entries(side.lower(), [value for _, _, value in entries])
+        row[f"{side.lower()}s"] = [party.name for party in parties]
+        row[f"{side.lower()}_advocates"] = [advocate for party in parties for advocate in party.advocates]
+
+    acts = numbered_values(case_data, "Acts_Act_")
+    row["acts"] = []
+    for number, key, act in acts:
+        section_key = f"Acts_Section_{number}"
+        row["acts"].append({"act": act, "section": case_data.get(section_key)})
+        used.update((key, section_key))
+
+    extra = {key: value for key, value in case_data.items() if key not in used}
+    row["extra"] = json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+    return row
+
+
+class CaseExporter:
+    """
+    Buffers case rows and appends them to the Parquet dataset in batches
+    """
+
+    def __init__(self, root=None, batch_size=EXPORT_BATCH_SIZE):
+        # Read the environment now rather than at import, the worker pool sets it after importing
+        self.root = root or os.environ.get("ECOURTS_DATASET_DIR", DATASET_DIR)
+        self.batch_size = batch_size
+        self.rows = []
+        self.lock = threading.Lock()
+        self.parts = 0
+        self.exported = 0
+
+    def add(self, case_data, court, cnr_number=None):
+        """
+        Queue one case; writes a batch once batch_size cases are queued
+        """
+        with self.lock:
+            self.rows.append(case_row(case_data, court, cnr_number))
+            due = len(self.rows) >= self.batch_size
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Append all queued rows as new part files. Returns the number of rows written.
+        """
+        with self.lock:
+            rows, self.rows = self.rows, []
+            part = self.parts
+            self.parts += 1
+        if not rows:
+            return 0
+
+        try:
+            table = pa.Table.from_pylist(rows, schema=CASE_SCHEMA)
+            pq.write_to_dataset(
+                table,
+                root_path=self.root,
+                partition_cols=PARTITION_COLUMNS,
+                basename_template=f"part-{int(time.time())}-{os.getpid()}-{part}-{{i}}.parquet",
+            )
+            self.exported += len(rows)
+            print(f"Exported {len(rows)} cases to Parquet dataset: {self.root}")
+            return len(rows)
+        except Exception as e:
+            print(f"Error exporting {len(rows)} cases to Parquet: {e}")
+            traceback.print_exc()
+            with self.lock:
+                self.rows = rows + self.rows
+            return 0
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """
+    The process-wide CaseExporter
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = CaseExporter()
+        return _exporter
+
+
+def flush_exports():
+    """
+    Write out queued cases, e.g. before a worker process exits
+    """
+    if _exporter is not None:
+        _exporter.flush()
+
+
+def pending_exports():
+    """
+    Cases queued and not yet written, e.g. because the last flush failed
+    """
+    if _exporter is None:
+        return 0
+    with _exporter.lock:
+        return len(_exporter.rows)
+
+
+atexit.register(flush_exports)
+
+
+def export_case(case_data, court, cnr_number=None):
+    """
+    Queue a scraped case for the Parquet dataset. Errors are reported, never raised,
+    so an export problem cannot fail a scrape.
+    """
+    try:
+        get_exporter().add(case_data, court, cnr_number)
+    except Exception as e:
+        print(f"Error queueing case for Parquet export: {e}")
+        traceback.print_exc()
+
+
+def compact(root=DATASET_DIR):
+    """
+    Rewrite every partition as a single file, merging the small part files of many runs
+    """
+    for court_dir in sorted(os.listdir(root)):
+        court_path = os.path.join(root, court_dir)
+        if not os.path.isdir(court_path):
+            continue
+        for state_dir in sorted(os.listdir(court_path)):
+            partition = os.path.join(court_path, state_dir)
+            parts = sorted(name for name in os.listdir(partition) if name.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            partition_schema = pa.schema([field for field in CASE_SCHEMA if field.name not in PARTITION_COLUMNS])
+            table = pa.concat_tables(pq.read_table(os.path.join(partition, name), schema=partition_schema)
+                                     for name in parts)
+            # Put the merged file in place before removing the parts it replaces
+            tmp_path = os.path.join(partition, "compacted.parquet.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, os.path.join(partition, f"part-{int(time.time())}-compacted.parquet"))
+            for name in parts:
+                os.remove(os.path.join(partition, name))
+            print(f"Compacted {len(parts)} files in {partition} ({table.num_rows} cases)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the Parquet case dataset")
+    parser.add_argument("command", choices=["compact", "summary"])
+    parser.add_argument("--root", default=DATASET_DIR, help="Dataset directory")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        compact(args.root)
+    else:
+        dataset = pq.ParquetDataset(args.root)
+        table = dataset.read(columns=["cnr_number", "court", "state"])
+        print(table.group_by(["court", "state"]).aggregate([("cnr_number", "count")]).to_pandas().to_string(index=False))
@@ -0,0 +1,212 @@
+"""
+Concurrent PDF downloads over one pooled requests.Session.
+
+download_documents() uses the browser's shared session (session_manager),
+whose cookies are copied from the browser once and again only after the
+eCourts session was renewed, instead of calling driver.get_cookies() for
+every file or case. Connections are kept alive between files, and a
+handful of documents are streamed in parallel while never hitting a
+single host with more than a few requests at a time.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from metrics import add_bytes, stage
+from session_manager import EXPIRED, response_expired, session_for
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+FILE_BUFFER_SIZE = 1024 * 1024
+
+# Politeness towards the eCourts servers
+MAX_IN_FLIGHT = 6
+MAX_PER_HOST = 3
+MIN_HOST_INTERVAL = 0.2
+
+
+class HostThrottle:
+    """
+    Limit concurrent requests per host and space out request starts to the same host
+    """
+
+    def __init__(self, max_per_host=MAX_PER_HOST, min_interval=MIN_HOST_INTERVAL):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.semaphores = {}
+        self.next_start = {}
+
+    def acquire(self, host):
+        with self.lock:
+            semaphore = self.semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+        semaphore.acquire()
+
+        # Reserve the next start slot for this host, then sleep until it comes up
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host):
+        self.semaphores[host].release()
+
+
+class PdfDownloader:
+    """
+    Download many documents concurrently over one keep-alive session
+    """
+
+    def __init__(self, session, max_in_flight=MAX_IN_FLIGHT, max_per_host=MAX_PER_HOST,
+                 min_host_interval=MIN_HOST_INTERVAL, timeout=60):
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self.throttle = HostThrottle(max_per_host, min_host_interval)
+        self.timeout = timeout
+
+    def fetch(self, url, file_path):
+        """
+        Stream one document to file_path.
+        Returns a result dict with url, path, ok, bytes, sha256, error and expired.
+        """
+        result = {"url": url, "path": file_path, "ok": False, "bytes": 0, "sha256": None, "error": None,
+                  "expired": False}
+        host = urlparse(url).netloc
+        # Written to a temporary name so an interrupted download never looks complete
+        part_path = file_path + ".part"
+        self.throttle.acquire(host)
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                # The sites answer with an HTML page instead of the PDF once the session has expired
+                if response_expired(response):
+                    result["error"] = "Session expired"
+                    result["expired"] = True
+                    print(f"Session expired while downloading {url}")
+                    return result
+                if response.status_code != 200:
+                    result["error"] = f"HTTP {response.status_code}"
+                    print(f"Failed to download PDF. Status code: {response.status_code}")
+                    return result
+
+                digest = hashlib.sha256()
+                with open(part_path, "wb", buffering=FILE_BUFFER_SIZE) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            result["bytes"] += len(chunk)
+                os.replace(part_path, file_path)
+                result["sha256"] = digest.hexdigest()
+
+            result["ok"] = True
+            print(f"Downloaded PDF to {file_path}")
+        except Exception as e:
+            result["error"] = str(e)
+            result["bytes"] = 0
+            print(f"Error downloading PDF {url}: {e}")
+            # Drop what a broken stream left behind
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+        finally:
+            self.throttle.release(host)
+        return result
+
+    def download_all(self, jobs):
+        """
+        Download a list of (url, file_path) pairs with distinct file paths (see unique_jobs)
+        concurrently. Returns the result dicts in the same order as jobs.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        workers = max(1, min(self.max_in_flight, len(jobs)))
+        with stage("pdfs"):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda job: self.fetch(*job), jobs))
+            add_bytes(sum(result["bytes"] or 0 for result in results))
+        return results
+
+
+def pdf_filename(url, index):
+    """
+    File name for a linked PDF, as the scrapers have always named them
+    """
+    filename = url.split('/')[-1]
+    if not filename or not filename.endswith('.pdf'):
+        filename = f"document_{index+1}.pdf"
+    return filename
+
+
+def order_filename(date_text):
+    """
+    File name for an order PDF dated date_text (dd/mm/yyyy)
+    """
+    return f"order_{date_text.strip().replace('/', '-')}.pdf"
+
+
+def unique_jobs(jobs):
+    """
+    Drop repeated (url, file_path) pairs and give every other job its own file_path,
+    numbering later documents that would land on the same file (e.g. two orders of one date
+    become order_01-02-2024.pdf and order_01-02-2024_2.pdf), so no two downloads share a file
+    """
+    unique = []
+    seen = set()
+    taken = set()
+    for url, file_path in jobs:
+        if (url, file_path) in seen:
+            continue
+        seen.add((url, file_path))
+        target = file_path
+        root, extension = os.path.splitext(file_path)
+        counter = 2
+        while target in taken:
+            target = f"{root}_{counter}{extension}"
+            counter += 1
+        taken.add(target)
+        unique.append((url, target))
+    return unique
+
+
+def download_documents(driver, jobs, manifest=None, **kwargs):
+    """
+    Download (url, file_path) pairs over the browser's shared session.
+    Documents refused because the session expired are fetched once more after the session
+    manager started a new browser session.
+    With a CaseManifest, documents already saved in the case folder are skipped
+    and the new ones are recorded in it.
+    Returns the number of files saved.
+    """
+    jobs = unique_jobs(jobs)
+    if manifest is not None:
+        jobs = manifest.pending(jobs)
+    if not jobs:
+        return 0
+
+    manager = session_for(driver)
+    results = PdfDownloader(manager.http, **kwargs).download_all(jobs)
+
+    expired = [index for index, result in enumerate(results) if result["expired"]]
+    if expired:
+        print(f"Retrying {len(expired)} PDFs in a new session")
+        # A new browser session, whose cookies manager.http copies before the retry
+        if not manager.recover(EXPIRED):
+            print("Could not renew the session, retrying with the browser's current cookies")
+            manager.invalidate_cookies()
+        retried = PdfDownloader(manager.http, **kwargs).download_all([jobs[index] for index in expired])
+        for index, result in zip(expired, retried):
+            results[index] = result
+
+    if manifest is not None:
+        manifest.record_downloads(results)
+        manifest.save()
+
+    saved = sum(1 for result in results if result["ok"])
+    print(f"Downloaded {saved}/{len(jobs)} PDFs")
+    return saved
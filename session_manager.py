@@ -0,0 +1,212 @@
+"""
+Keep a browser's eCourts session usable through long batch runs.
+
+The sites drop idle sessions and re-challenge the CAPTCHA, and a scrape
+that runs into either used to end with a failed case (or a prompt). A
+SessionManager wraps one WebDriver and a pooled requests session that
+shares the browser's cookies:
+
+- check() reads the page text once and tells an expired or invalid session
+  (EXPIRED) from a rejected CAPTCHA (CAPTCHA) by the sites' messages. A
+  rejected answer is reported to the CAPTCHA backend through the ticket the
+  scraper handed to captcha_submitted().
+- recover() re-opens the search form through the court module: a fresh
+  session after EXPIRED, only a new CAPTCHA challenge after CAPTCHA.
+- http is the requests session for PDF downloads. The browser cookies are
+  copied into it on first use and again only after the session was
+  re-established, instead of a new session and get_cookies() call for
+  every batch of files. A download that comes back with an expired-session
+  page makes download_documents() renew the session through recover().
+
+There is one manager per driver, session_for(driver) returns it.
+"""
+import threading
+import weakref
+
+from http_session import copy_driver_cookies, create_pooled_session
+from metrics import add_retries
+
+EXPIRED = "expired"
+CAPTCHA = "captcha"
+
+# Lower-case text the sites show for an expired or invalid session
+EXPIRED_MARKERS = (
+    "session expired",
+    "session has expired",
+    "session timed out",
+    "session timeout",
+    "invalid request",
+    "invalid token",
+    "invalid app_token",
+    "token mismatch",
+    "please refresh the page",
+)
+
+# ... and for a CAPTCHA answer that was not accepted
+CAPTCHA_MARKERS = (
+    "invalid captcha",
+    "incorrect captcha",
+    "wrong captcha",
+    "captcha code entered was incorrect",
+    "captcha mismatch",
+)
+
+# Visible text of the page, modals included
+PAGE_TEXT_SCRIPT = "return document.body ? (document.body.innerText || '').slice(0, 20000) : '';"
+
+HTTP_POOL_SIZE = 6
+
+# Seconds recover() waits for the search form when the caller has no WebDriverWait
+RECOVER_TIMEOUT = 20
+
+
+def classify_text(text):
+    """
+    EXPIRED or CAPTCHA if text carries one of the sites' session or CAPTCHA messages, else None
+    """
+    text = (text or "").lower()
+    if any(marker in text for marker in EXPIRED_MARKERS):
+        return EXPIRED
+    if any(marker in text for marker in CAPTCHA_MARKERS):
+        return CAPTCHA
+    return None
+
+
+def response_expired(response):
+    """
+    True if an HTTP response is an expired-session page instead of the requested document
+    """
+    if response.status_code in (401, 403, 440):
+        return True
+    content_type = response.headers.get("Content-Type", "")
+    if "html" not in content_type and "text" not in content_type:
+        return False
+    return classify_text(response.text[:20000]) == EXPIRED
+
+
+class SessionManager:
+    """
+    Detect and repair an expired eCourts session of one browser, and share its cookies over HTTP
+    """
+
+    def __init__(self, driver, court_module=None):
+        self.driver = driver
+        self.court_module = court_module
+        self.search_url = None
+        self.lock = threading.Lock()
+        self._http = None
+        self.cookies_stale = True
+        self.captcha_ticket = None
+        self.stats = {"expired": 0, "captcha": 0, "cookie_syncs": 0}
+
+    @property
+    def http(self):
+        """
+        The pooled requests session carrying the browser's current cookies
+        """
+        with self.lock:
+            if self._http is None:
+                self._http = create_pooled_session(HTTP_POOL_SIZE)
+                try:
+                    self._http.headers["User-Agent"] = self.driver.execute_script("return navigator.userAgent;")
+                except Exception:
+                    pass
+            if self.cookies_stale:
+                copy_driver_cookies(self.driver, self._http)
+                self.cookies_stale = False
+                self.stats["cookie_syncs"] += 1
+            return self._http
+
+    def invalidate_cookies(self):
+        """
+        Copy the browser cookies again before the next HTTP request
+        """
+        self.cookies_stale = True
+
+    def captcha_submitted(self, ticket):
+        """
+        Remember the CaptchaTicket whose answer goes into the form next
+        """
+        self.captcha_ticket = ticket
+
+    def check(self):
+        """
+        EXPIRED if the page says the session expired or is invalid, CAPTCHA if it says
+        the CAPTCHA answer was wrong, None if neither (the case failed for another reason)
+        """
+        try:
+            text = self.driver.execute_script(PAGE_TEXT_SCRIPT)
+        except Exception as e:
+            print(f"Could not read the page: {e}")
+            return EXPIRED
+        problem = classify_text(text)
+        if problem == CAPTCHA and self.captcha_ticket is not None:
+            self.captcha_ticket.report_bad()
+        self.captcha_ticket = None
+        return problem
+
+    def default_search_url(self):
+        module = self.court_module
+        return self.search_url or getattr(module, "CNR_SEARCH_URL", None) or getattr(module, "SCI_CNR_SEARCH_URL", None)
+
+    def recover(self, problem, wait=None):
+        """
+        After EXPIRED start a new session on the search form, after CAPTCHA only reload the form
+        for a new challenge. Returns True once the form is back.
+        """
+        if self.court_module is None:
+            return False
+        if wait is None:
+            # Imported here so the HTTP engine can use this module without Selenium
+            from selenium.webdriver.support.ui import WebDriverWait
+            wait = WebDriverWait(self.driver, RECOVER_TIMEOUT)
+        self.stats[problem] += 1
+        add_retries()
+        if problem == CAPTCHA:
+            print("CAPTCHA rejected, reloading the search form for a new challenge")
+            return self.court_module.return_to_search_form(self.driver, wait, self.default_search_url())
+
+        print("eCourts session expired, starting a new one")
+        try:
+            self.driver.delete_all_cookies()
+        except Exception as e:
+            print(f"Could not clear the browser cookies: {e}")
+        self.invalidate_cookies()
+        if not self.court_module.open_cnr_search_page(self.driver, wait):
+            return False
+        self.search_url = self.driver.current_url
+        return True
+
+    def close(self):
+        with self.lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+
+_managers = weakref.WeakKeyDictionary()
+_managers_lock = threading.Lock()
+
+
+def session_for(driver, court_module=None):
+    """
+    The SessionManager of driver, created on first use
+    """
+    with _managers_lock:
+        manager = _managers.get(driver)
+        if manager is None:
+            manager = SessionManager(driver, court_module)
+            _managers[driver] = manager
+        elif court_module is not None and manager.court_module is None:
+            manager.court_module = court_module
+        return manager
+
+
+def close_session(driver):
+    """
+    Close and forget the SessionManager of driver, before the driver quits
+    """
+    with _managers_lock:
+        manager = _managers.pop(driver, None)
+    if manager is not None:
+        manager.close()
@@ -0,0 +1,13 @@
+"""
+Addresses of the eCourts sites, shared by the Selenium scrapers and the HTTP engine.
+
+Overridable to point the scrapers at a mirror, or at the replay benchmark's
+mock server. This module imports nothing, so the browserless HTTP engine
+gets the URLs without loading Selenium or pandas.
+"""
+import os
+
+ECOURTS_HOME_URL = os.environ.get("ECOURTS_HOME_URL", "https://ecourts.gov.in/ecourts_home/")
+ECOURTS_V6_BASE_URL = os.environ.get("ECOURTS_V6_BASE_URL", "https://services.ecourts.gov.in/ecourtindia_v6/")
+HCSERVICES_BASE_URL = os.environ.get("ECOURTS_HC_BASE_URL", "https://hcservices.ecourts.gov.in/hcservices/")
+SCI_CNR_SEARCH_URL = os.environ.get("ECOURTS_SCI_SEARCH_URL", "https://www.sci.gov.in/case-status-cnr-number/")
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "case_parser", "fixtures")
+BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+
+# The modules live at the repository root
+sys.path.insert(0, ROOT)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def district_record():
+    from case_parser import parse_case_html
+
+    return parse_case_html(load_fixture("district_case.html"), base_url=BASE_URL, orders_base_url=BASE_URL)
+
+
+@pytest.fixture
+def high_court_record():
+    from case_parser import HIGH_COURT_SECTIONS, parse_case_html
+
+    return parse_case_html(load_fixture("high_court_case.html"), base_url=BASE_URL, sections=HIGH_COURT_SECTIONS)
@@ -0,0 +1,20 @@
+import json
+
+from business_history import business_filename, pending_hearings, unwrap_response
+
+
+def test_unwrap_response():
+    assert unwrap_response("") == ("", None)
+    assert unwrap_response("<table></table>") == ("<table></table>", None)
+    payload = json.dumps({"data_list": "<table></table>", "app_token": "abc123", "status": 1})
+    assert unwrap_response(payload) == ("<table></table>", "abc123")
+
+
+def test_pending_hearings_skips_saved_dates(district_record, tmp_path):
+    hearings = district_record.hearings
+    (tmp_path / business_filename(hearings[0])).write_text("saved", encoding="utf-8")
+
+    pending = pending_hearings(hearings, str(tmp_path))
+    assert hearings[0] not in pending
+    assert len({business_filename(hearing) for hearing in pending}) == len(pending)
+    assert len(pending) == len({business_filename(hearing) for hearing in hearings}) - 1
@@ -0,0 +1,72 @@
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+from captcha_recognizer import RecognizerBackend, TemplateRecognizer, load_labelled_captures
+from captcha_service import LocalCaptchaBackend
+
+
+def captcha_image(text):
+    image = Image.new("L", (24 * len(text) + 16, 40), 235)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for index, char in enumerate(text):
+        draw.text((8 + index * 24, 12), char, fill=20, font=font)
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FallbackBackend(LocalCaptchaBackend):
+    def __init__(self, answer):
+        super().__init__(answer)
+        self.reports = []
+
+    def solve(self, image_bytes):
+        return self.answer, "remote-1"
+
+    def report(self, solve_id, correct):
+        self.reports.append((solve_id, correct))
+
+
+def test_recognizes_trained_glyphs():
+    recognizer = TemplateRecognizer.train([(captcha_image(text), text) for text in ("abc12", "x7k2p", "4b9ca")])
+    text, confidence = recognizer.recognize(captcha_image("cab21"))
+    assert text == "cab21"
+    assert confidence > 0.9
+
+
+def test_untrained_recognizer_answers_nothing():
+    assert TemplateRecognizer().recognize(captcha_image("abc")) == ("", 0.0)
+
+
+def test_low_confidence_goes_to_the_fallback_and_is_captured(tmp_path):
+    fallback = FallbackBackend("zq7")
+    backend = RecognizerBackend(TemplateRecognizer(), fallback=fallback, capture_dir=str(tmp_path))
+
+    code, solve_id = backend.solve(captcha_image("zq7"))
+    assert code == "zq7"
+    assert [label for _, label in load_labelled_captures(str(tmp_path))] == ["zq7"]
+
+    backend.report(solve_id, True)
+    assert fallback.reports == [("remote-1", True)]
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_rejected_answer_deletes_its_capture(tmp_path):
+    fallback = FallbackBackend("zq7")
+    backend = RecognizerBackend(TemplateRecognizer(), fallback=fallback, capture_dir=str(tmp_path))
+
+    _, solve_id = backend.solve(captcha_image("zq7"))
+    backend.report(solve_id, False)
+    assert fallback.reports == [("remote-1", False)]
+    assert not list(tmp_path.iterdir())
+
+
+def test_confident_local_answer_skips_the_fallback(tmp_path):
+    recognizer = TemplateRecognizer.train([(captcha_image(text), text) for text in ("abc12", "x7k2p")])
+    fallback = FallbackBackend("wrong")
+    backend = RecognizerBackend(recognizer, fallback=fallback, capture_dir=str(tmp_path), min_confidence=0.9)
+
+    assert backend.solve(captcha_image("cab21")) == ("cab21", None)
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from captcha_service import CaptchaService, LocalCaptchaBackend, backend_from_env
+
+
+class FlakyBackend:
+    """
+    Fails (raising or answering nothing) before it answers, and records the reports it gets
+    """
+    name = "flaky"
+
+    def __init__(self, failures, code="ab12c"):
+        self.failures = list(failures)
+        self.code = code
+        self.calls = 0
+        self.reports = []
+
+    def solve(self, image_bytes):
+        self.calls += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return None, None
+        return self.code, f"solve-{self.calls}"
+
+    def report(self, solve_id, correct):
+        self.reports.append((solve_id, correct))
+
+
+@pytest.fixture
+def service_for():
+    services = []
+
+    def make(backend, **kwargs):
+        service = CaptchaService(backend, max_workers=1, **kwargs)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.shutdown()
+
+
+def test_retries_until_the_backend_answers(service_for):
+    backend = FlakyBackend([RuntimeError("network"), None])
+    ticket = service_for(backend, retries=3).submit(b"image")
+    assert ticket.result() == "ab12c"
+    assert ticket.future.result()["attempts"] == 3
+    assert backend.calls == 3
+
+
+def test_gives_up_after_the_retries(service_for):
+    backend = FlakyBackend([None, RuntimeError("network")])
+    service = service_for(backend, retries=2)
+    assert service.solve(b"image") is None
+    assert backend.calls == 2
+
+
+def test_report_bad_reports_the_solve_of_the_ticket(service_for):
+    backend = FlakyBackend([])
+    ticket = service_for(backend).submit(b"image")
+    assert ticket.result() == "ab12c"
+    ticket.report_bad()
+    assert backend.reports == [("solve-1", False)]
+
+
+def test_report_bad_without_an_answer_reports_nothing(service_for):
+    backend = FlakyBackend([None])
+    ticket = service_for(backend, retries=1).submit(b"image")
+    assert ticket.result() is None
+    ticket.report_bad()
+    assert backend.reports == []
+
+
+def test_result_times_out_while_the_backend_is_busy(service_for):
+    release = threading.Event()
+    backend = LocalCaptchaBackend(answer=lambda image_bytes: release.wait(5) and "late")
+    ticket = service_for(backend).submit(b"image")
+    assert ticket.result(timeout=0.05) is None
+    release.set()
+
+
+def test_2captcha_backend_needs_an_api_key(monkeypatch):
+    monkeypatch.delenv("CAPTCHA_BACKEND", raising=False)
+    monkeypatch.delenv("TWOCAPTCHA_API_KEY", raising=False)
+    with pytest.raises(RuntimeError, match="TWOCAPTCHA_API_KEY"):
+        backend_from_env()
+
+    monkeypatch.setenv("CAPTCHA_BACKEND", "local")
+    monkeypatch.setenv("CAPTCHA_LOCAL_ANSWER", "xyz12")
+    assert backend_from_env().solve(b"image") == ("xyz12", None)
@@ -0,0 +1,57 @@
+from case_manifest import CaseManifest, case_status
+
+
+def downloaded(path, url, content=b"%PDF-1.4"):
+    path.write_bytes(content)
+    return {"ok": True, "url": url, "path": str(path), "bytes": len(content), "sha256": None}
+
+
+def test_pending_skips_documents_saved_before(tmp_path):
+    manifest = CaseManifest(str(tmp_path))
+    manifest.record_downloads([downloaded(tmp_path / "order_01-02-2024.pdf", "https://example.org/1")])
+    manifest.save()
+
+    manifest = CaseManifest(str(tmp_path))
+    jobs = [
+        ("https://example.org/1", str(tmp_path / "order_01-02-2024.pdf")),
+        ("https://example.org/2", str(tmp_path / "order_05-02-2024.pdf")),
+    ]
+    assert manifest.pending(jobs) == jobs[1:]
+
+
+def test_pending_redownloads_changed_or_missing_files(tmp_path):
+    manifest = CaseManifest(str(tmp_path))
+    manifest.record_downloads([
+        downloaded(tmp_path / "a.pdf", "https://example.org/a"),
+        downloaded(tmp_path / "b.pdf", "https://example.org/b"),
+    ])
+    (tmp_path / "a.pdf").write_bytes(b"truncated")
+    (tmp_path / "b.pdf").unlink()
+
+    jobs = [("https://example.org/a", str(tmp_path / "a.pdf")), ("https://example.org/b", str(tmp_path / "b.pdf"))]
+    assert manifest.pending(jobs) == jobs
+
+
+def test_pending_with_verify_hash(tmp_path):
+    manifest = CaseManifest(str(tmp_path))
+    manifest.record_downloads([downloaded(tmp_path / "a.pdf", "https://example.org/a", b"12345678")])
+    # Same size, different content
+    (tmp_path / "a.pdf").write_bytes(b"87654321")
+
+    jobs = [("https://example.org/a", str(tmp_path / "a.pdf"))]
+    assert manifest.pending(jobs) == []
+    assert manifest.pending(jobs, verify_hash=True) == jobs
+
+
+def test_status_changed(tmp_path):
+    case_data = {"Status_Next Hearing Date": "18th November 2025", "Status_Case Stage": "Evidence"}
+    status = case_status(case_data)
+
+    manifest = CaseManifest(str(tmp_path))
+    assert manifest.status_changed(status)
+    manifest.update_status(status)
+    manifest.save()
+
+    manifest = CaseManifest(str(tmp_path))
+    assert not manifest.status_changed(case_status(dict(case_data)))
+    assert manifest.status_changed(case_status(dict(case_data, **{"Status_Case Stage": "Arguments"})))
@@ -0,0 +1,74 @@
+from datetime import date
+
+from case_parser import parse_court_date, parse_modal_html, parse_sci_case_html, split_party_entries
+from conftest import BASE_URL, load_fixture
+
+
+def test_district_details_parse_every_label_value_pair(district_record):
+    assert district_record.details == {
+        "Case Type": "CS - Civil Suit",
+        "Filing Number": "2145/2019",
+        "Filing Date": "01-03-2019",
+        "Registration Number": "123/2019",
+        "Registration Date": "04-03-2019",
+        "CNR Number": "MHPU010012342019",
+    }
+
+
+def test_district_status(district_record):
+    assert district_record.status == {
+        "First Hearing Date": "04th March 2019",
+        "Next Hearing Date": "18th November 2025",
+        "Case Stage": "Evidence",
+        "Court Number and Judge": "5-Civil Judge Senior Division",
+    }
+
+
+def test_district_acts_history_and_orders(district_record):
+    assert [(act.act, act.section) for act in district_record.acts] == [
+        ("Code of Civil Procedure", "9"),
+        ("Specific Relief Act", "38,39"),
+    ]
+
+    assert len(district_record.hearings) == 42
+    first = district_record.hearings[0]
+    assert (first.business_date, first.hearing_date, first.purpose) == ("04-03-2019", "27-03-2019", "Appearance")
+    assert first.business_params[0] == "MHPU010012342019"
+
+    assert len(district_record.orders) == 14
+    assert district_record.orders[0].date == "04-03-2019"
+    assert district_record.orders[0].url.startswith(BASE_URL)
+    assert district_record.pdf_links == [BASE_URL + "?p=home/display_pdf&filename=/judgements/MHPU010012342019.pdf"]
+
+
+def test_high_court_details_and_status(high_court_record):
+    assert high_court_record.details["CNR Number"] == "HCBM010183452021"
+    assert high_court_record.details["Filing Date"] == "10-08-2021"
+    assert high_court_record.details["Registration Date"] == "12-08-2021"
+    assert high_court_record.status["Case Stage"] == "FOR ADMISSION"
+
+
+def test_split_party_entries(district_record):
+    parties = split_party_entries("petitioner", district_record.petitioner_advocates)
+    assert [(party.position, party.name, party.advocates) for party in parties] == [
+        (1, "Shri. Ramesh Kulkarni & Sons", ["A. P. Deshmukh"]),
+        (2, "Smt. Sunita R. Kulkarni", []),
+    ]
+
+
+def test_modal():
+    modal = parse_modal_html(load_fixture("district_modal.html"))
+    assert modal["CNR Number"] == "MHPU010012342019"
+    assert modal["Petitioner"] == "Shri. Ramesh Kulkarni & Sons"
+
+
+def test_sci_case():
+    record = parse_sci_case_html(load_fixture("sci_case.html"))
+    assert record.fields["CNR Number"] == "SCIN010281732022"
+    assert record.fields["Respondent Advocate(s)"] == "MS. P. RAO [AOR]"
+
+
+def test_parse_court_date():
+    assert parse_court_date("05-03-2021") == date(2021, 3, 5)
+    assert parse_court_date("18th November 2025") == date(2025, 11, 18)
+    assert parse_court_date("") is None
@@ -0,0 +1,32 @@
+from datetime import date
+
+from case_schema import normalize_record
+
+
+def test_normalize_record(district_record):
+    rows = normalize_record(district_record, "district")
+    case = rows["cases"][0]
+    assert case["cnr_number"] == "MHPU010012342019"
+    assert case["filing_date"] == date(2019, 3, 1)
+    assert case["registration_date"] == date(2019, 3, 4)
+    assert case["next_hearing_date"] == date(2025, 11, 18)
+    assert case["case_stage"] == "Evidence"
+
+    assert [(party["side"], party["name"]) for party in rows["case_parties"]] == [
+        ("petitioner", "Shri. Ramesh Kulkarni & Sons"),
+        ("petitioner", "Smt. Sunita R. Kulkarni"),
+        ("respondent", "Pune Municipal Corporation"),
+    ]
+    assert [(advocate["party_position"], advocate["name"]) for advocate in rows["case_advocates"]] == [
+        (1, "A. P. Deshmukh"),
+        (1, "S. V. Joshi"),
+    ]
+    assert len(rows["case_acts"]) == 2
+    assert len(rows["case_hearings"]) == 42
+    assert rows["case_hearings"][0]["business_date"] == date(2019, 3, 4)
+
+
+def test_normalize_record_keys_on_the_searched_cnr(district_record):
+    rows = normalize_record(district_record, "district", "MHPU019999992019")
+    assert rows["cases"][0]["cnr_number"] == "MHPU019999992019"
+    assert {party["cnr_number"] for party in rows["case_parties"]} == {"MHPU019999992019"}
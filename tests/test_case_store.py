@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+
+from sqlalchemy.dialects import postgresql
+
+from case_store import BufferedWriter, content_hash, high_courts_table
+
+
+class FakeEngine:
+    """
+    Hands the upsert statements to a connection that answers with the given RETURNING rows
+    """
+
+    def __init__(self, returned=(), error=None):
+        self.returned = list(returned)
+        self.error = error
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement):
+        if self.error is not None:
+            raise self.error
+        self.statements.append(statement)
+        return [(inserted,) for inserted in self.returned]
+
+
+def writer_for(engine):
+    writer = BufferedWriter(high_courts_table, engine=engine, batch_size=100, flush_interval=3600)
+    # No database here to create the table in
+    writer.table_checked = True
+    return writer
+
+
+def test_content_hash_ignores_column_order_and_follows_values():
+    columns = ["cnr_number", "filing_number"]
+    row = {"cnr_number": "HCBM010183452021", "filing_number": "1/2021"}
+    assert content_hash(row, columns) == content_hash(dict(reversed(list(row.items()))), list(reversed(columns)))
+    assert content_hash(row, columns) != content_hash(dict(row, filing_number="2/2021"), columns)
+
+
+def test_add_keeps_the_latest_row_of_a_case():
+    writer = writer_for(FakeEngine())
+    writer.add({"cnr_number": "A", "filing_number": "1/2021"})
+    writer.add({"cnr_number": "A", "filing_number": "2/2021", "Unknown": "x"})
+    writer.add({"filing_number": "3/2021"})
+
+    assert writer.pending() == 1
+    row = writer.rows["A"]
+    assert row["filing_number"] == "2/2021"
+    assert "Unknown" not in row
+    assert row["content_hash"] == content_hash(row, writer.columns)
+    assert writer.ignored_columns == {"Unknown"}
+
+
+def test_upsert_only_rewrites_changed_rows():
+    stmt = writer_for(FakeEngine()).statement([{"cnr_number": "A", "content_hash": "h"}])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (cnr_number) DO UPDATE" in sql
+    assert "content_hash IS DISTINCT FROM excluded.content_hash" in sql
+    assert "RETURNING (xmax = 0)" in sql
+
+
+def test_flush_counts_inserted_updated_and_unchanged_rows():
+    engine = FakeEngine(returned=[True, False])
+    writer = writer_for(engine)
+    for cnr_number in ("A", "B", "C"):
+        writer.add({"cnr_number": cnr_number})
+
+    assert writer.flush() == {"inserted": 1, "updated": 1, "unchanged": 1}
+    assert len(engine.statements) == 1
+    assert writer.pending() == 0
+    assert writer.stats == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+
+def test_failed_flush_keeps_the_rows_and_newer_ones_win():
+    engine = FakeEngine(error=RuntimeError("database down"))
+    writer = writer_for(engine)
+    writer.add({"cnr_number": "A", "filing_number": "1/2021"})
+
+    assert writer.flush() == {"inserted": 0, "updated": 0, "unchanged": 0}
+    assert writer.pending() == 1
+
+    writer.add({"cnr_number": "A", "filing_number": "2/2021"})
+    engine.error = None
+    engine.returned = [False]
+    assert writer.flush()["updated"] == 1
+    assert engine.statements[0].compile().params["filing_number_m0"] == "2/2021"
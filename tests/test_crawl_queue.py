@@ -0,0 +1,63 @@
+import pytest
+
+from crawl_queue import CAPTCHA, EXTRACTED, FAILED, PDFS, PENDING, PERSISTED, CrawlQueue
+
+
+@pytest.fixture
+def crawl(tmp_path):
+    queue = CrawlQueue(str(tmp_path / "queue.sqlite3"), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def state_of(queue, cnr_number):
+    return queue.conn.execute("SELECT state FROM jobs WHERE cnr_number = ?", (cnr_number,)).fetchone()[0]
+
+
+def test_add_skips_known_cnr_numbers(crawl):
+    assert crawl.add("district", ["A", "B"]) == 2
+    assert crawl.add("district", ["B", "C"]) == 1
+    assert crawl.pending("district") == ["A", "B", "C"]
+
+
+def test_job_moves_through_the_states(crawl):
+    crawl.add("district", ["A"])
+    assert crawl.claim("district", "worker_0") == "A"
+    assert state_of(crawl, "A") == CAPTCHA
+    assert crawl.claim("district", "worker_0") is None
+
+    crawl.mark("district", "A", EXTRACTED, folder="case_A")
+    crawl.mark("district", "A", PDFS)
+    assert crawl.promote("district", "worker_0") == 1
+    assert state_of(crawl, "A") == PERSISTED
+    assert crawl.persisted("district", ["A", "B"]) == 1
+
+
+def test_failed_attempts_retry_until_max_attempts(crawl):
+    crawl.add("high", ["A"])
+    crawl.claim("high", "worker_0")
+    assert crawl.fail("high", "A", "CAPTCHA rejected") == PENDING
+    crawl.claim("high", "worker_0")
+    assert crawl.fail("high", "A", "CAPTCHA rejected") == FAILED
+    assert crawl.failures("high") == [("A", 2, "CAPTCHA rejected")]
+
+    assert crawl.retry_failed("high") == 1
+    assert crawl.pending("high") == ["A"]
+
+
+def test_requeue_interrupted(crawl):
+    crawl.add("district", ["A", "B"])
+    crawl.claim("district", "worker_0", "A")
+    crawl.mark("district", "A", PDFS)
+    assert crawl.requeue_interrupted("district") == 1
+    assert crawl.counts("district")[PENDING] == 2
+
+
+def test_promote_only_touches_the_workers_own_jobs(crawl):
+    crawl.add("district", ["A", "B"])
+    crawl.claim("district", "worker_0", "A")
+    crawl.claim("district", "worker_1", "B")
+    crawl.mark("district", "A", PDFS)
+    crawl.mark("district", "B", PDFS)
+    assert crawl.promote("district", "worker_0") == 1
+    assert state_of(crawl, "B") == PDFS
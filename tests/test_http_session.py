@@ -0,0 +1,8 @@
+from http_session import create_pooled_session
+
+
+def test_pooled_session_retries_only_idempotent_requests():
+    retries = create_pooled_session(2).get_adapter("https://services.ecourts.gov.in").max_retries
+    assert retries.is_retry("GET", 503)
+    assert retries.is_retry("HEAD", 502)
+    assert not retries.is_retry("POST", 503)
@@ -0,0 +1,77 @@
+"""
+The WebDriver extractors (single_pass=False) must give the same case_data keys and
+values as the single-pass parser. A small lxml-backed fake WebDriver stands in for Chrome.
+"""
+import pytest
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import district_court_selenium
+import high_court_selenium
+from case_parser.text import first_text_node, inner_html
+from conftest import load_fixture
+
+
+class FakeElement:
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def text(self):
+        return " ".join(self.element.text_content().split())
+
+    def get_attribute(self, name):
+        if name == "textContent":
+            return self.element.text_content()
+        return self.element.get(name)
+
+    def find_elements(self, by, value):
+        if by == By.TAG_NAME:
+            return [FakeElement(element) for element in self.element.iter(value) if element is not self.element]
+        if by == By.CSS_SELECTOR and value.startswith("table."):
+            class_name = value.split(".", 1)[1]
+            return [FakeElement(table) for table in self.element.iter("table")
+                    if class_name in (table.get("class") or "").split()]
+        raise NoSuchElementException(value)
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+
+class FakeDriver(FakeElement):
+    def __init__(self, page):
+        super().__init__(lxml_html.fromstring(page))
+
+    def execute_script(self, script, element):
+        if "innerHTML" in script:
+            return inner_html(element.element)
+        return first_text_node(element.element)
+
+    def find_elements(self, by, value):
+        if by == By.XPATH:
+            return []
+        return super().find_elements(by, value)
+
+
+@pytest.mark.parametrize("court_module, fixture", [
+    (district_court_selenium, "district_case.html"),
+    (high_court_selenium, "high_court_case.html"),
+])
+def test_both_extraction_modes_give_the_same_case_data(monkeypatch, court_module, fixture):
+    page = load_fixture(fixture).decode("utf-8")
+    single_pass = court_module.extract_case_details_single_pass(type("Driver", (), {
+        "page_source": page,
+        "current_url": "https://services.ecourts.gov.in/ecourtindia_v6/",
+    })())
+    legacy = court_module.extract_case_details(FakeDriver(page), single_pass=False)
+
+    details = ("Case Type", "Filing Number", "Filing Date", "Registration Number", "Registration Date",
+               "CNR Number")
+    assert {key: legacy.get(key) for key in details} == {key: single_pass.get(key) for key in details}
+    status = sorted(key for key in single_pass if key.startswith("Status_"))
+    assert sorted(key for key in legacy if key.startswith("Status_")) == status
+    assert {key: legacy[key] for key in status} == {key: single_pass[key] for key in status}
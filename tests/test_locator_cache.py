@@ -0,0 +1,75 @@
+from locator_cache import LocatorCache
+
+CANDIDATES = [
+    ("id", "id", "main_search"),
+    ("class", "css selector", ".search-button"),
+    ("link_text", "link text", "Search"),
+]
+
+
+class FakeDriver:
+    """
+    A page holding the elements of some (By, value) locators, counting the round trips
+    """
+
+    def __init__(self, *locators):
+        self.page = {locator: f"element {locator[1]}" for locator in locators}
+        self.calls = []
+
+    def find_elements(self, by, value):
+        self.calls.append(("find_elements", value))
+        element = self.page.get((by, value))
+        return [element] if element else []
+
+    def execute_script(self, script, candidates):
+        self.calls.append(("resolve", [name for name, by, value in candidates]))
+        for index, (name, by, value) in enumerate(candidates):
+            if (by, value) in self.page:
+                return [index, self.page[(by, value)]]
+        return None
+
+
+def test_cached_first_candidate_is_tried_alone(tmp_path):
+    cache = LocatorCache(str(tmp_path / "cache.json"))
+    driver = FakeDriver(("id", "main_search"), ("link text", "Search"))
+
+    assert cache.find_element(driver, "search", CANDIDATES) == "element main_search"
+    assert cache.get("search") == "id"
+
+    driver.calls = []
+    assert cache.find_element(driver, "search", CANDIDATES) == "element main_search"
+    assert driver.calls == [("find_elements", "main_search")]
+
+
+def test_loose_winner_is_resolved_with_the_candidates_ahead_of_it(tmp_path):
+    cache = LocatorCache(str(tmp_path / "cache.json"))
+    driver = FakeDriver(("link text", "Search"))
+    assert cache.find_element(driver, "search", CANDIDATES) == "element Search"
+    assert cache.get("search") == "link_text"
+
+    # The precise candidate takes over as soon as it matches again
+    driver.page[("id", "main_search")] = "element main_search"
+    driver.calls = []
+    assert cache.find_element(driver, "search", CANDIDATES) == "element main_search"
+    assert driver.calls == [("resolve", ["id", "class", "link_text"])]
+    assert cache.get("search") == "id"
+
+
+def test_stale_first_candidate_falls_back_to_the_others(tmp_path):
+    cache = LocatorCache(str(tmp_path / "cache.json"))
+    cache.remember("search", "id")
+    driver = FakeDriver(("css selector", ".search-button"))
+
+    assert cache.find_element(driver, "search", CANDIDATES) == "element .search-button"
+    assert driver.calls == [("find_elements", "main_search"), ("resolve", ["class", "link_text"])]
+    assert cache.get("search") == "class"
+    assert cache.find_element(FakeDriver(), "missing", CANDIDATES) is None
+
+
+def test_winners_are_saved_for_the_next_run(tmp_path):
+    path = str(tmp_path / "nested" / "cache.json")
+    LocatorCache(path).find_element(FakeDriver(("id", "main_search")), "search", CANDIDATES)
+    assert LocatorCache(path).get("search") == "id"
+
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    assert LocatorCache(str(tmp_path / "broken.json")).winners == {}
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_totals(monkeypatch):
+    monkeypatch.setattr(metrics, "_totals", {})
+    monkeypatch.setattr(metrics, "_cases", {})
+    monkeypatch.delenv("ECOURTS_METRICS_DIR", raising=False)
+    monkeypatch.delenv("ECOURTS_METRICS_INSTANCE", raising=False)
+
+
+class FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {"value": None}
+
+
+def test_stages_count_round_trips_bytes_and_retries_of_a_case(monkeypatch, tmp_path):
+    log_path = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv("ECOURTS_METRICS_LOG", str(log_path))
+    driver = metrics.instrument_driver(FakeDriver())
+
+    metrics.start_case("district", "MHPU010012342019")
+    with metrics.stage("business_history"):
+        driver.execute("findElement")
+        with metrics.stage("pdfs"):
+            metrics.add_bytes(1024)
+            metrics.add_retries()
+    entry = metrics.finish_case(True)
+
+    assert entry["ok"] is True
+    assert (entry["round_trips"], entry["bytes"], entry["retries"]) == (1, 1024, 1)
+    # The outer stage counts everything that happened while it was open
+    assert entry["stages"]["business_history"]["round_trips"] == 1
+    assert entry["stages"]["business_history"]["bytes"] == 1024
+    assert entry["stages"]["pdfs"]["round_trips"] == 0
+    assert entry["stages"]["pdfs"]["calls"] == 1
+    assert json.loads(log_path.read_text(encoding="utf-8")) == entry
+
+
+def test_timed_case_counts_a_nested_call_as_one_case():
+    calls = []
+
+    @metrics.timed_case("high")
+    def scrape_case(driver, wait, cnr_number):
+        calls.append(cnr_number)
+        if len(calls) == 1:
+            # A retry inside the same case
+            return scrape_case(driver, wait, cnr_number)
+        with metrics.stage("extract"):
+            pass
+        return "folder"
+
+    assert scrape_case(None, None, "HCBM010183452021") == "folder"
+    assert calls == ["HCBM010183452021", "HCBM010183452021"]
+    assert metrics._cases == {("high", "ok"): 1}
+    assert metrics._totals[("high", "extract")]["calls"] == 1
+
+
+def test_timed_stages_outside_a_case_and_prometheus_text(monkeypatch, tmp_path):
+    @metrics.timed("db_write")
+    def flush():
+        return 3
+
+    assert flush() == 3
+    assert metrics.current_case() is None
+    assert metrics._totals[("none", "db_write")]["calls"] == 1
+
+    metrics.start_case("sci", "SCIN010000012020")
+    metrics.finish_case(False)
+
+    monkeypatch.setenv("ECOURTS_METRICS_INSTANCE", "worker_1")
+    monkeypatch.setenv("ECOURTS_METRICS_DIR", str(tmp_path))
+    metrics.write_prometheus(force=True)
+    text = (tmp_path / "scrape_metrics-worker_1.prom").read_text(encoding="utf-8")
+    assert 'ecourts_cases_total{court="sci",result="failed",instance="worker_1"} 1' in text
+    assert 'ecourts_stage_calls_total{court="none",stage="db_write",instance="worker_1"} 1' in text
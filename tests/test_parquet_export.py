@@ -0,0 +1,24 @@
+from datetime import date
+
+from parquet_export import case_row
+
+
+def test_case_row(district_record):
+    row = case_row(district_record.to_case_data(), "district")
+    assert row["cnr_number"] == "MHPU010012342019"
+    assert row["state"] == "MH"
+    assert row["filing_date"] == date(2019, 3, 1)
+    assert row["first_hearing_date"] == date(2019, 3, 4)
+    assert row["petitioners"] == ["Shri. Ramesh Kulkarni & Sons", "Smt. Sunita R. Kulkarni"]
+    assert row["respondent_advocates"] == ["S. V. Joshi"]
+    assert row["acts"] == [
+        {"act": "Code of Civil Procedure", "section": "9"},
+        {"act": "Specific Relief Act", "section": "38,39"},
+    ]
+    assert row["extra"] is None
+
+
+def test_case_row_prefers_the_searched_cnr():
+    row = case_row({"CNR Number": "garbled"}, "high", "HCBM010183452021")
+    assert row["cnr_number"] == "HCBM010183452021"
+    assert row["state"] == "HCBM"
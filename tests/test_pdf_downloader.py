@@ -0,0 +1,97 @@
+import hashlib
+
+import pytest
+
+from pdf_downloader import PdfDownloader, order_filename, pdf_filename, unique_jobs
+
+
+class FakeResponse:
+    def __init__(self, chunks, status_code=200, content_type="application/pdf", fail_after=None):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type}
+        self.text = b"".join(chunks).decode("utf-8", "replace")
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_content(self, chunk_size):
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise ConnectionError("Connection reset")
+            yield chunk
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.requested.append(url)
+        return self.responses[url]
+
+
+def downloader(responses):
+    return PdfDownloader(FakeSession(responses), min_host_interval=0)
+
+
+def test_unique_jobs_numbers_documents_sharing_a_file():
+    jobs = [
+        ("https://example.org/1", "case/order_01-02-2024.pdf"),
+        ("https://example.org/2", "case/order_01-02-2024.pdf"),
+        ("https://example.org/1", "case/order_01-02-2024.pdf"),
+        ("https://example.org/3", "case/order_01-02-2024.pdf"),
+    ]
+    assert unique_jobs(jobs) == [
+        ("https://example.org/1", "case/order_01-02-2024.pdf"),
+        ("https://example.org/2", "case/order_01-02-2024_2.pdf"),
+        ("https://example.org/3", "case/order_01-02-2024_3.pdf"),
+    ]
+
+
+def test_file_names():
+    assert pdf_filename("https://example.org/files/judgement.pdf", 0) == "judgement.pdf"
+    assert pdf_filename("https://example.org/?p=display_pdf", 2) == "document_3.pdf"
+    assert order_filename(" 01/02/2024 ") == "order_01-02-2024.pdf"
+
+
+def test_download_all_saves_files_in_job_order(tmp_path):
+    jobs = [("https://a.example.org/1", str(tmp_path / "1.pdf")), ("https://b.example.org/2", str(tmp_path / "2.pdf"))]
+    results = downloader({
+        "https://a.example.org/1": FakeResponse([b"%PDF-", b"one"]),
+        "https://b.example.org/2": FakeResponse([b"%PDF-two"]),
+    }).download_all(jobs)
+
+    assert [result["ok"] for result in results] == [True, True]
+    assert (tmp_path / "1.pdf").read_bytes() == b"%PDF-one"
+    assert results[0]["bytes"] == 8
+    assert results[0]["sha256"] == hashlib.sha256(b"%PDF-one").hexdigest()
+    assert not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.parametrize("response, expired", [
+    (FakeResponse([b"<html>Session expired</html>"], content_type="text/html"), True),
+    (FakeResponse([], status_code=404), False),
+])
+def test_refused_downloads_save_nothing(tmp_path, response, expired):
+    path = tmp_path / "1.pdf"
+    result = downloader({"https://example.org/1": response}).fetch("https://example.org/1", str(path))
+    assert not result["ok"]
+    assert result["expired"] is expired
+    assert not path.exists()
+
+
+def test_broken_stream_leaves_no_part_file(tmp_path):
+    path = tmp_path / "1.pdf"
+    response = FakeResponse([b"%PDF-", b"never"], fail_after=1)
+    result = downloader({"https://example.org/1": response}).fetch("https://example.org/1", str(path))
+
+    assert not result["ok"]
+    assert "Connection reset" in result["error"]
+    assert not path.exists()
+    assert not list(tmp_path.iterdir())
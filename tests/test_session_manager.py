@@ -0,0 +1,74 @@
+from session_manager import CAPTCHA, EXPIRED, SessionManager, classify_text, response_expired
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content_type="application/pdf", text=""):
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type}
+        self.text = text
+
+
+class FakeCourtModule:
+    CNR_SEARCH_URL = "https://example.org/search"
+
+    def __init__(self):
+        self.calls = []
+
+    def open_cnr_search_page(self, driver, wait):
+        self.calls.append("open")
+        return True
+
+    def return_to_search_form(self, driver, wait, url):
+        self.calls.append(("reload", url))
+        return True
+
+
+class FakeDriver:
+    current_url = "https://example.org/search?session=2"
+
+    def __init__(self, page_text=""):
+        self.page_text = page_text
+        self.cookies_deleted = False
+
+    def execute_script(self, script):
+        return self.page_text
+
+    def delete_all_cookies(self):
+        self.cookies_deleted = True
+
+
+def test_classify_text():
+    assert classify_text("Your Session Expired, please search again") == EXPIRED
+    assert classify_text("Invalid Captcha") == CAPTCHA
+    assert classify_text("Case Status: Pending") is None
+    assert classify_text(None) is None
+
+
+def test_response_expired():
+    assert not response_expired(FakeResponse())
+    assert response_expired(FakeResponse(status_code=403))
+    assert response_expired(FakeResponse(content_type="text/html", text="<p>Invalid Token</p>"))
+    assert not response_expired(FakeResponse(content_type="text/html", text="<p>Order</p>"))
+
+
+def test_recover_after_expired_starts_a_new_session():
+    court_module = FakeCourtModule()
+    driver = FakeDriver("session timed out")
+    manager = SessionManager(driver, court_module)
+    manager.cookies_stale = False
+
+    problem = manager.check()
+    assert problem == EXPIRED
+    assert manager.recover(problem, wait=object())
+    assert driver.cookies_deleted
+    assert manager.cookies_stale
+    assert court_module.calls == ["open"]
+    assert manager.search_url == driver.current_url
+
+
+def test_recover_after_captcha_only_reloads_the_form():
+    court_module = FakeCourtModule()
+    manager = SessionManager(FakeDriver("Invalid Captcha"), court_module)
+    assert manager.recover(manager.check(), wait=object())
+    assert court_module.calls == [("reload", FakeCourtModule.CNR_SEARCH_URL)]
+    assert manager.stats["captcha"] == 1
@@ -0,0 +1,7 @@
+from unattended import EXIT_FAILED, EXIT_OK, EXIT_PARTIAL, exit_code
+
+
+def test_exit_code():
+    assert exit_code(3, 3) == EXIT_OK
+    assert exit_code(1, 3) == EXIT_PARTIAL
+    assert exit_code(0, 3) == EXIT_FAILED
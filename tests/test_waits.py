@@ -0,0 +1,65 @@
+import time
+
+from selenium.webdriver.common.by import By
+
+import waits
+
+
+class FakeDriver:
+    """
+    A page whose elements show up after a number of polls
+    """
+
+    def __init__(self, appear_after=None, ready_after=0):
+        self.appear_after = appear_after or {}
+        self.ready_after = ready_after
+        self.polls = 0
+        self.scripts = 0
+        self.loaded = []
+
+    def find_elements(self, by, value):
+        self.polls += 1
+        after = self.appear_after.get((by, value))
+        if after is not None and self.polls > after:
+            return [f"element {value}"]
+        return []
+
+    def execute_script(self, script):
+        self.scripts += 1
+        return "complete" if self.scripts > self.ready_after else "loading"
+
+    def get(self, url):
+        if "down" in url:
+            raise RuntimeError("net::ERR_CONNECTION_REFUSED")
+        self.loaded.append(url)
+
+
+def test_wait_for_any_returns_as_soon_as_a_locator_matches():
+    driver = FakeDriver({(By.CSS_SELECTOR, "#history_cnr .alert, .alert-danger-cust, #errSpan:not(:empty)"): 3})
+    started = time.monotonic()
+    assert waits.wait_for_case_results(driver, timeout=5) == \
+        "element #history_cnr .alert, .alert-danger-cust, #errSpan:not(:empty)"
+    assert time.monotonic() - started < 1
+
+
+def test_wait_for_any_prefers_the_earlier_locator():
+    driver = FakeDriver({(By.NAME, "cino"): 0, (By.ID, "cino"): 0})
+    assert waits.wait_for_cnr_form(driver, timeout=1) == "element cino"
+    assert driver.polls == 1
+
+
+def test_waits_give_up_with_none_after_the_timeout():
+    assert waits.wait_for_modal_content(FakeDriver(), timeout=0.3) is None
+
+
+def test_wait_for_page_load_polls_the_ready_state():
+    driver = FakeDriver(ready_after=2)
+    assert waits.wait_for_page_load(driver, timeout=2) is True
+    assert driver.scripts == 3
+
+
+def test_open_cnr_form():
+    driver = FakeDriver({(By.ID, "cino"): 0})
+    assert waits.open_cnr_form(driver, "https://services.ecourts.gov.in/ecourtindia_v6/", timeout=1)
+    assert driver.loaded == ["https://services.ecourts.gov.in/ecourtindia_v6/"]
+    assert not waits.open_cnr_form(driver, "https://down.example/", timeout=1)
@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+
+from metrics import timed_case
+from session_manager import session_for
+from worker_pool import scrape_one
+
+
+class FakeDriver:
+    current_url = "https://example.org/search"
+
+    def __init__(self):
+        self.page_text = "Session expired"
+
+    def execute_script(self, script):
+        return self.page_text
+
+    def delete_all_cookies(self):
+        pass
+
+
+def court_module_failing_once():
+    attempts = []
+
+    @timed_case("high")
+    def scrape_case(driver, wait, cnr_number, on_stage=None):
+        attempts.append(cnr_number)
+        return "case_folder" if len(attempts) > 1 else None
+
+    def open_cnr_search_page(driver, wait):
+        driver.page_text = ""
+        return True
+
+    module = SimpleNamespace(scrape_case=scrape_case, open_cnr_search_page=open_cnr_search_page,
+                             CNR_SEARCH_URL="https://example.org/search")
+    return module, attempts
+
+
+def test_recovered_case_is_logged_once(tmp_path, monkeypatch):
+    log_path = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv("ECOURTS_METRICS_LOG", str(log_path))
+    monkeypatch.delenv("ECOURTS_METRICS_DIR", raising=False)
+    court_module, attempts = court_module_failing_once()
+    driver = FakeDriver()
+
+    assert scrape_one("high", court_module, driver, object(), "HCBM010183452021") == "case_folder"
+    assert attempts == ["HCBM010183452021", "HCBM010183452021"]
+
+    entries = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert len(entries) == 1
+    assert entries[0]["ok"] is True
+    assert entries[0]["retries"] == 1
+    assert session_for(driver).stats["expired"] == 1
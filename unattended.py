@@ -0,0 +1,193 @@
+"""
+Command line shared by the three court scripts, for runs without a terminal.
+
+    python district_court_selenium.py MHPU010012342019 MHPU010012352019
+    python high_court_selenium.py --batch cnr_numbers.txt --workers 4
+    ECOURTS_CNR_NUMBERS=SCIN010012342022 python supreme_court_selenium.py
+
+CNR numbers come from the arguments, a --batch file ('-' for stdin), the
+ECOURTS_CNR_NUMBERS variable (separated by commas or whitespace) or the
+ECOURTS_CNR_FILE file. With any of them the script never prompts: the
+browser runs headless unless --visible (or ECOURTS_HEADLESS=0), every
+CAPTCHA goes to the CAPTCHA service (CAPTCHA_BACKEND picks 2Captcha, the
+local model or a fixed answer) and expired sessions are renewed as in the
+worker pool. With --workers N the cases are spread over N worker_pool
+processes.
+
+Only when no CNR number is configured and stdin is a terminal does the
+script fall back to its interactive walk-through; --non-interactive (or
+ECOURTS_NON_INTERACTIVE=1) turns that off too.
+
+The exit code says how the run went:
+    0  every case was scraped
+    1  some cases failed
+    2  bad arguments, or no CNR number in a non-interactive run
+    3  no case could be scraped
+    4  no browser reached the CNR search form
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import traceback
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_NO_BROWSER = 4
+
+
+def env_flag(name, default):
+    return os.environ.get(name, default).strip().lower() not in ("0", "false", "no", "")
+
+
+def build_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("cnr_numbers", nargs="*", metavar="CNR", help="CNR numbers to scrape")
+    parser.add_argument("--batch", metavar="FILE", default=os.environ.get("ECOURTS_CNR_FILE"),
+                        help="File with one CNR number per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel browsers (worker_pool processes) for the cases")
+    parser.add_argument("--output-dir", default="pool_output", help="Directory for per-worker output with --workers")
+    parser.add_argument("--visible", action="store_true", default=not env_flag("ECOURTS_HEADLESS", "1"),
+                        help="Show the browser instead of running headless")
+    parser.add_argument("--non-interactive", action="store_true", default=env_flag("ECOURTS_NON_INTERACTIVE", "0"),
+                        help="Never prompt; exit with code 2 if no CNR number is configured")
+    return parser
+
+
+def read_cnr_numbers(source):
+    """
+    Read CNR numbers from a file, one per line ('-' reads from stdin).
+    Blank lines, '#' comments and duplicates are skipped.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    cnr_numbers = []
+    seen = set()
+    for line in lines:
+        cnr_number = line.split("#", 1)[0].strip()
+        if cnr_number and cnr_number not in seen:
+            seen.add(cnr_number)
+            cnr_numbers.append(cnr_number)
+
+    return cnr_numbers
+
+
+def configured_cnr_numbers(args):
+    """
+    CNR numbers from the arguments, the --batch file and ECOURTS_CNR_NUMBERS, in that order, without duplicates
+    """
+    cnr_numbers = list(args.cnr_numbers)
+    if args.batch:
+        cnr_numbers += read_cnr_numbers(args.batch)
+    cnr_numbers += re.split(r"[\s,]+", os.environ.get("ECOURTS_CNR_NUMBERS", ""))
+    return list(dict.fromkeys(cnr_number.strip() for cnr_number in cnr_numbers if cnr_number.strip()))
+
+
+def exit_code(succeeded, total):
+    """
+    The process exit code for `succeeded` scraped cases out of `total`
+    """
+    if succeeded == total:
+        return EXIT_OK
+    if succeeded:
+        return EXIT_PARTIAL
+    return EXIT_FAILED
+
+
+def run_cases(court, court_module, cnr_numbers, headless=True):
+    """
+    Scrape cnr_numbers one after another with a single pooled browser, routing CAPTCHAs
+    to the CAPTCHA service. Returns the exit code.
+    """
+    from driver_pool import DriverPool
+    from worker_pool import scrape_one
+
+    started = time.time()
+    succeeded = 0
+    pool = DriverPool(court_module, size=1, headless=headless)
+    try:
+        if not pool.start():
+            print("No browser reached the CNR search form")
+            return EXIT_NO_BROWSER
+
+        for index, cnr_number in enumerate(cnr_numbers):
+            pooled = pool.acquire()
+            if pooled is None:
+                print("Lost the browser, stopping")
+                break
+            try:
+                if scrape_one(court, court_module, pooled.driver, pooled.wait, cnr_number):
+                    succeeded += 1
+                else:
+                    print(f"{cnr_number}: FAILED")
+            except Exception as e:
+                print(f"Error processing CNR {cnr_number}: {e}")
+                traceback.print_exc()
+            finally:
+                pool.release(pooled)
+            print(f"[{index + 1}/{len(cnr_numbers)}] {succeeded} scraped")
+    finally:
+        pool.close()
+        flush_writers()
+
+    print(f"Completed: {succeeded}/{len(cnr_numbers)} cases scraped in {time.time() - started:.1f}s")
+    return exit_code(succeeded, len(cnr_numbers))
+
+
+def flush_writers():
+    """
+    Write out the buffered database rows and Parquet batches before the process exits
+    """
+    from case_store import flush_all
+    from parquet_export import flush_exports
+
+    try:
+        flush_all()
+    except Exception as e:
+        print(f"Could not flush database rows: {e}")
+    try:
+        flush_exports()
+    except Exception as e:
+        print(f"Could not flush Parquet export: {e}")
+
+
+def run_in_pool(court, cnr_numbers, workers, output_dir, headless=True):
+    """
+    Scrape cnr_numbers with worker_pool processes. Returns the exit code.
+    """
+    from worker_pool import NO_BROWSER_ERROR, run_pool
+
+    results = run_pool(court, cnr_numbers, workers=workers, output_dir=output_dir, headless=headless)
+    items = [item for worker_items in results.values() for item in worker_items]
+    if items and all(item["error"] == NO_BROWSER_ERROR for item in items):
+        return EXIT_NO_BROWSER
+    return exit_code(sum(1 for item in items if item["ok"]), len(cnr_numbers))
+
+
+def main(court, court_module, interactive_main, description):
+    """
+    Entry point of the court scripts: scrape the configured CNR numbers unattended,
+    or run interactive_main() when none are configured and a terminal is attached
+    (it returns whether the case was scraped). Returns the exit code.
+    """
+    args = build_parser(description).parse_args()
+    cnr_numbers = configured_cnr_numbers(args)
+
+    if not cnr_numbers:
+        if args.non_interactive or not sys.stdin.isatty():
+            print("No CNR numbers given: pass them as arguments, with --batch or in ECOURTS_CNR_NUMBERS")
+            return EXIT_USAGE
+        return EXIT_OK if interactive_main() else EXIT_FAILED
+
+    print(f"Scraping {len(cnr_numbers)} {court} court CNR numbers unattended...")
+    if args.workers > 1:
+        return run_in_pool(court, cnr_numbers, args.workers, args.output_dir, headless=not args.visible)
+    return run_cases(court, court_module, cnr_numbers, headless=not args.visible)
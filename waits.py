@@ -0,0 +1,137 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from metrics import timed
+
+DEFAULT_TIMEOUT = 20
+
+# Polling every 100 ms instead of Selenium's default 500 ms, the conditions
+# below usually hold well under a second after the triggering action.
+POLL_FREQUENCY = 0.1
+
+CNR_FORM_LOCATORS = [
+    (By.ID, "cino"),
+    (By.NAME, "cino"),
+    (By.CSS_SELECTOR, "input[placeholder='Enter 16 digit CNR number']"),
+]
+
+# The search either renders the case tables or an error message (invalid
+# CAPTCHA, unknown CNR), so stop waiting as soon as either shows up
+CASE_RESULT_LOCATORS = [
+    (By.CSS_SELECTOR, "table.case_details_table"),
+    (By.CSS_SELECTOR, "#history_cnr .alert, .alert-danger-cust, #errSpan:not(:empty)"),
+]
+
+# The acknowledgement modal is filled by AJAX after it opens. Waiting for its table rather
+# than for visibility also works in lean browsers, which load no stylesheets, so every
+# element counts as visible from the start.
+MODAL_CONTENT_LOCATORS = [
+    (By.CSS_SELECTOR, "#modal_ack_body table"),
+]
+
+SCI_RESULT_LOCATORS = [
+    (By.CSS_SELECTOR, "#cnrResultsDetails tbody[data-fetched='true']"),
+]
+
+
+def wait_until(driver, condition, timeout=DEFAULT_TIMEOUT):
+    """
+    Block until condition(driver) is truthy and return its value, or None on timeout
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+    except TimeoutException:
+        return None
+
+
+def wait_for_page_load(driver, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait until the current document has finished loading
+    """
+    return wait_until(
+        driver,
+        lambda d: d.execute_script("return document.readyState") == "complete",
+        timeout,
+    )
+
+
+def wait_for_any(driver, locators, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait until any of the locators matches an element and return that element, or None on timeout
+    """
+    def first_present(d):
+        for locator in locators:
+            elements = d.find_elements(*locator)
+            if elements:
+                return elements[0]
+        return False
+
+    return wait_until(driver, first_present, timeout)
+
+
+def wait_for_visible(driver, locator, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait until the element is visible and return it, or None on timeout
+    """
+    return wait_until(driver, EC.visibility_of_element_located(locator), timeout)
+
+
+def wait_for_invisible(driver, locator, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait until the element is hidden or removed from the page.
+    Returns True if it went away before the timeout.
+    """
+    return wait_until(driver, EC.invisibility_of_element_located(locator), timeout) is not None
+
+
+def wait_for_cnr_form(driver, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait for the CNR number input of the eCourts search form
+    """
+    return wait_for_any(driver, CNR_FORM_LOCATORS, timeout)
+
+
+def open_cnr_form(driver, url, timeout=DEFAULT_TIMEOUT):
+    """
+    Load url and wait for the CNR search form.
+    Returns True if the CNR input appeared, False if it did not or the page failed to load.
+    """
+    try:
+        driver.get(url)
+    except Exception as e:
+        print(f"Could not load {url}: {e}")
+        return False
+    return wait_for_cnr_form(driver, timeout) is not None
+
+
+@timed("search")
+def wait_for_case_results(driver, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait for the case details table (or the search error message) after clicking search
+    """
+    return wait_for_any(driver, CASE_RESULT_LOCATORS, timeout)
+
+
+@timed("search")
+def wait_for_sci_results(driver, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait for the SCI case detail table to be fetched into #cnrResultsDetails
+    """
+    return wait_for_any(driver, SCI_RESULT_LOCATORS, timeout)
+
+
+def wait_for_modal_content(driver, timeout=10):
+    """
+    Wait for the acknowledgement modal's table and return it, or None on timeout
+    """
+    return wait_for_any(driver, MODAL_CONTENT_LOCATORS, timeout)
+
+
+def wait_for_modal_closed(driver, timeout=5):
+    """
+    Wait until no Bootstrap modal is shown any more.
+    Returns True if the modal closed before the timeout.
+    """
+    return wait_for_invisible(driver, (By.CSS_SELECTOR, ".modal.show"), timeout)
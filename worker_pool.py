@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Scrape many CNR numbers in parallel with a pool of headless Chrome workers.
+
+Every worker is a separate process that owns one working directory (case
+folders, downloads and screenshots land there) and one warm driver from a
+DriverPool, which replaces the browser when it crashes, has served
+ECOURTS_DRIVER_MAX_CASES cases or outgrows ECOURTS_DRIVER_MAX_RSS_MB, and
+pulls CNR numbers from a shared queue until it is empty. Headless workers
+use the lean browser profile (browser.py) unless ECOURTS_LEAN_BROWSER=0.
+
+With --queue the CNR numbers go through a persistent crawl queue
+(crawl_queue) instead: workers claim jobs from the SQLite file, record each
+stage and checkpoint every few cases, so rerunning the same command after a
+crash resumes where it stopped and skips persisted cases.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import traceback
+
+from case_store import flush_all, merge_stats, print_stats
+from crawl_queue import PDFS, CrawlQueue, checkpoint, print_status
+from debug_tools import capture_failure
+from driver_pool import DriverPool
+from locator_cache import DEFAULT_LOCATOR_CACHE
+from metrics import finish_case, start_case, write_prometheus
+from session_manager import session_for
+
+COURT_MODULES = {
+    "district": "district_court_selenium",
+    "high": "high_court_selenium",
+    "supreme": "supreme_court_selenium",
+}
+
+# Result error of a case no pooled browser was available for
+NO_BROWSER_ERROR = "No browser could reach the CNR search form"
+
+# Cases between flushes of the buffered rows when running from a crawl queue
+CHECKPOINT_EVERY = int(os.environ.get("ECOURTS_CHECKPOINT_EVERY", "10"))
+
+
+def run_scrape_case(court, court_module, driver, wait, cnr_number, on_stage=None):
+    if court == "district":
+        # Workers have no terminal to prompt on
+        return court_module.scrape_case(driver, wait, cnr_number, captcha_solver=court_module.service_captcha_solver,
+                                        on_stage=on_stage)
+    return court_module.scrape_case(driver, wait, cnr_number, on_stage=on_stage)
+
+
+def scrape_one(court, court_module, driver, wait, cnr_number, on_stage=None):
+    """
+    Run a single case through the court module's scrape_case. If it fails because the
+    eCourts session expired or the CAPTCHA was rejected, renew the session (or only the
+    CAPTCHA) and try the case once more. Both attempts are measured as one case.
+    """
+    start_case(court, cnr_number)
+    folder = None
+    try:
+        folder = run_scrape_case(court, court_module, driver, wait, cnr_number, on_stage)
+        if folder:
+            return folder
+
+        manager = session_for(driver, court_module)
+        problem = manager.check()
+        if problem is None:
+            return folder
+        if not manager.recover(problem, wait):
+            print(f"Could not renew the session for {cnr_number}")
+            return folder
+        print(f"Retrying {cnr_number} after renewing the session ({problem})")
+        folder = run_scrape_case(court, court_module, driver, wait, cnr_number, on_stage)
+        return folder
+    finally:
+        finish_case(bool(folder))
+
+
+def worker_main(worker_id, court, task_queue, result_queue, output_dir, queue_path=None, headless=True):
+    """
+    Worker process: create a headless driver and scrape CNR numbers until a None sentinel
+    arrives, or until the crawl queue at queue_path has nothing left to claim
+    """
+    worker_dir = os.path.abspath(os.path.join(output_dir, f"worker_{worker_id}"))
+    os.makedirs(worker_dir, exist_ok=True)
+    os.chdir(worker_dir)
+    # Names this worker's Prometheus file, rewritten in place by the next run
+    os.environ["ECOURTS_METRICS_INSTANCE"] = f"worker_{worker_id}"
+
+    court_module = importlib.import_module(COURT_MODULES[court])
+    results_path = os.path.join(worker_dir, "results.jsonl")
+
+    # Every process opens its own connection to the crawl queue
+    crawl = CrawlQueue(queue_path) if queue_path else None
+    worker_name = f"worker_{worker_id}"
+    since_checkpoint = 0
+
+    # One warm driver per worker, recycled after a number of cases or when it grows too large
+    pool = DriverPool(court_module, size=1, headless=headless, download_dir=worker_dir)
+    try:
+        pool.start()
+
+        while True:
+            if crawl:
+                cnr_number = crawl.claim(court, worker_name)
+            else:
+                cnr_number = task_queue.get()
+            if cnr_number is None:
+                break
+
+            def on_stage(stage, folder, cnr_number=cnr_number):
+                if crawl:
+                    crawl.mark(court, cnr_number, stage, folder=os.path.join(worker_dir, folder))
+
+            started = time.time()
+            folder = None
+            error = None
+            # The pool hands out a driver already on the search form and parks it again afterwards
+            pooled = pool.acquire()
+            if pooled is None:
+                error = NO_BROWSER_ERROR
+            else:
+                try:
+                    folder = scrape_one(court, court_module, pooled.driver, pooled.wait, cnr_number,
+                                        on_stage=on_stage)
+                    if not folder:
+                        error = "Case could not be scraped"
+                except Exception as e:
+                    error = str(e)
+                    traceback.print_exc()
+                finally:
+                    if error:
+                        capture_failure(pooled.driver, "scrape_failed")
+                    pool.release(pooled)
+
+            if crawl:
+                if folder:
+                    crawl.mark(court, cnr_number, PDFS, folder=os.path.join(worker_dir, folder))
+                    since_checkpoint += 1
+                    if since_checkpoint >= CHECKPOINT_EVERY:
+                        checkpoint(crawl, court, worker_name)
+                        since_checkpoint = 0
+                else:
+                    crawl.fail(court, cnr_number, error)
+
+            result = {
+                "worker": worker_id,
+                "cnr_number": cnr_number,
+                "ok": bool(folder),
+                "folder": os.path.join(worker_dir, folder) if folder else None,
+                "error": error,
+                "seconds": round(time.time() - started, 2),
+            }
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+            result_queue.put(result)
+
+            if pooled is None:
+                print(f"[worker {worker_id}] No browser left, stopping")
+                break
+
+    except Exception as e:
+        print(f"[worker {worker_id}] Fatal error: {e}")
+        traceback.print_exc()
+
+    finally:
+        pool.close()
+        # Forked workers skip atexit handlers, so write out any buffered database rows here
+        db_stats = {}
+        try:
+            if crawl:
+                db_stats = checkpoint(crawl, court, worker_name)
+            else:
+                db_stats = flush_all()
+        except Exception as e:
+            print(f"[worker {worker_id}] Could not flush database rows: {e}")
+        if not crawl:
+            try:
+                from parquet_export import flush_exports
+                flush_exports()
+            except Exception as e:
+                print(f"[worker {worker_id}] Could not flush Parquet export: {e}")
+        write_prometheus(force=True)
+        result_queue.put({"worker": worker_id, "done": True, "db": db_stats})
+
+
+def run_pool(court, cnr_numbers, workers=None, output_dir="pool_output", queue_path=None, headless=True):
+    """
+    Scrape cnr_numbers with `workers` parallel browsers (headless unless headless is False).
+    With queue_path the CNR numbers are added to that crawl queue and only unfinished jobs are scraped.
+    Returns a dict of worker id -> list of per-case result dicts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    task_queue = mp.Queue()
+    result_queue = mp.Queue()
+
+    if queue_path:
+        # Workers change into their own directories before opening it
+        queue_path = os.path.abspath(queue_path)
+        crawl = CrawlQueue(queue_path)
+        added = crawl.add(court, cnr_numbers)
+        crawl.requeue_interrupted(court)
+        total = crawl.counts(court)
+        print(f"Crawl queue {queue_path}: {added} new CNR numbers, {total['pending']} to scrape, "
+              f"{total['persisted']} already persisted, {total['failed']} failed")
+        cnr_numbers = crawl.pending(court)
+        crawl.close()
+        if not cnr_numbers:
+            print("Nothing left to scrape")
+            return {}
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(cnr_numbers)))
+
+    # All workers append to one Parquet dataset instead of one per working directory,
+    # log their cases to one file, write their Prometheus metrics next to each other
+    # and share the locator cache
+    os.environ.setdefault("ECOURTS_DATASET_DIR", os.path.abspath(os.path.join(output_dir, "case_dataset")))
+    os.environ.setdefault("ECOURTS_METRICS_LOG", os.path.abspath(os.path.join(output_dir, "scrape_metrics.jsonl")))
+    os.environ.setdefault("ECOURTS_METRICS_DIR", os.path.abspath(os.path.join(output_dir, "metrics")))
+    os.environ.setdefault("ECOURTS_LOCATOR_CACHE", os.path.abspath(DEFAULT_LOCATOR_CACHE))
+
+    # Crawl queue workers claim their jobs from the SQLite file instead
+    if not queue_path:
+        for cnr_number in cnr_numbers:
+            task_queue.put(cnr_number)
+        for _ in range(workers):
+            task_queue.put(None)
+
+    print(f"Starting {workers} {court} court workers for {len(cnr_numbers)} CNR numbers...")
+    processes = {}
+    for worker_id in range(workers):
+        process = mp.Process(target=worker_main,
+                             args=(worker_id, court, task_queue, result_queue, output_dir, queue_path, headless))
+        process.start()
+        processes[worker_id] = process
+
+    results = {worker_id: [] for worker_id in processes}
+    db_stats = {}
+    running = set(processes)
+    started = time.time()
+    completed = 0
+
+    while running:
+        try:
+            message = result_queue.get(timeout=5)
+        except queue.Empty:
+            # A worker that died without saying goodbye (e.g. Chrome crash killed the process)
+            for worker_id in list(running):
+                if not processes[worker_id].is_alive():
+                    print(f"Worker {worker_id} exited unexpectedly")
+                    running.discard(worker_id)
+            continue
+
+        if message.get("done"):
+            running.discard(message["worker"])
+            merge_stats(db_stats, message.get("db"))
+            continue
+
+        results[message["worker"]].append(message)
+        completed += 1
+        status = "OK" if message["ok"] else f"FAILED ({message['error']})"
+        rate = completed / max(time.time() - started, 1e-6) * 60
+        print(f"[{completed}/{len(cnr_numbers)}] worker {message['worker']} {message['cnr_number']}: {status} - {rate:.1f} cases/min")
+
+    for process in processes.values():
+        process.join()
+
+    summary_path = os.path.join(output_dir, "results.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({str(worker_id): items for worker_id, items in results.items()}, f, indent=2)
+
+    succeeded = sum(1 for items in results.values() for item in items if item["ok"])
+    print(f"Pool completed: {succeeded}/{len(cnr_numbers)} cases scraped in {time.time() - started:.1f}s")
+    print_stats(db_stats)
+    print(f"Per-worker results saved to {summary_path}")
+    if queue_path:
+        crawl = CrawlQueue(queue_path)
+        print_status(crawl, court)
+        crawl.close()
+    return results
+
+
+if __name__ == "__main__":
+    from unattended import exit_code, read_cnr_numbers
+
+    parser = argparse.ArgumentParser(description="Scrape CNR numbers in parallel with headless Chrome workers")
+    parser.add_argument("court", choices=sorted(COURT_MODULES), help="Which court scraper to run")
+    parser.add_argument("input", help="File with one CNR number per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of browser workers (default: CPU count)")
+    parser.add_argument("--output-dir", default="pool_output", help="Directory for per-worker output")
+    parser.add_argument("--queue", default=None,
+                        help="SQLite crawl queue file; reruns resume from it and skip persisted cases")
+    parser.add_argument("--visible", action="store_true", help="Show the browsers instead of running headless")
+    args = parser.parse_args()
+
+    cnr_numbers = read_cnr_numbers(args.input)
+    results = run_pool(args.court, cnr_numbers, workers=args.workers, output_dir=args.output_dir,
+                       queue_path=args.queue, headless=not args.visible)
+
+    # Every CNR number counts, including the ones lost with a worker that died
+    if args.queue:
+        crawl = CrawlQueue(args.queue)
+        succeeded = crawl.persisted(args.court, cnr_numbers)
+        crawl.close()
+    else:
+        succeeded = sum(1 for items in results.values() for item in items if item["ok"])
+    sys.exit(exit_code(succeeded, len(cnr_numbers)))